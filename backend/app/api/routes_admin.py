@@ -0,0 +1,74 @@
+from datetime import datetime
+from typing import Any
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.core import backup, json_store, profiler, profiles
+from app.core.config import settings
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get("/profiles")
+async def list_profiles() -> dict[str, Any]:
+    return {"enabled": settings.profiling_enabled, "sample_rate": settings.profile_sample_rate, "routes": profiler.summary()}
+
+
+@router.get("/profiles/collapsed", response_class=PlainTextResponse)
+async def collapsed_profile(route: str | None = None) -> PlainTextResponse:
+    return PlainTextResponse(profiler.collapsed(route))
+
+
+@router.delete("/profiles")
+async def clear_profiles() -> dict[str, bool]:
+    profiler.clear()
+    return {"cleared": True}
+
+
+@router.get("/data-profiles")
+async def data_profiles() -> dict[str, Any]:
+    """Warm-cache usage per data profile (most recently used first); not the sampling profiler above."""
+    return profiles.stats()
+
+
+@router.delete("/data-profiles/{profile}/cache")
+def evict_data_profile(profile: str) -> dict[str, bool]:
+    if not json_store.valid_profile(profile):
+        raise HTTPException(status_code=400, detail="invalid profile name")
+    return {"evicted": profiles.evict(profile)}
+
+
+@router.get("/backups")
+def list_backups() -> list[dict[str, Any]]:
+    return backup.list_snapshots()
+
+
+@router.post("/backups")
+def create_backup(full: bool = Query(default=False)) -> dict[str, Any]:
+    try:
+        return backup.create_snapshot(full=full)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@router.post("/backups/restore")
+def restore_backup(
+    snapshot_id: str | None = Query(default=None),
+    at: datetime | None = Query(default=None, description="Latest snapshot at or before this time"),
+    files: list[str] | None = Query(default=None),
+) -> dict[str, Any]:
+    # Always restores into the live data directory; use the CLI to restore elsewhere.
+    try:
+        return backup.restore_snapshot(snapshot_id, at, files=files)
+    except LookupError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+
+
+@router.delete("/backups")
+def prune_backups(
+    keep_last: int | None = Query(default=None, ge=0), keep_daily: int | None = Query(default=None, ge=0)
+) -> dict[str, Any]:
+    return backup.prune_snapshots(keep_last, keep_daily)
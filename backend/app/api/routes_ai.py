@@ -1,68 +1,201 @@
-﻿from datetime import datetime
-from decimal import InvalidOperation
+﻿import json
+from collections.abc import AsyncIterator
+from datetime import date
 from uuid import uuid4
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
-from app.schemas.ai import AIChatRequest, AIChatResponse, AIParseRecordRequest, AIParseRecordResponse
+from app.api.routes_settings import get_settings
+from app.core import ai_gateway, metrics, record_parser
+from app.core.chat_sessions import SessionStore
+from app.core.config import settings
+from app.core.json_store import DATA_DIR, current_profile
+from app.core.response_cache import ResponseCache, make_key, normalize_prompt
+from app.schemas.ai import (
+    AIChatRequest,
+    AIChatResponse,
+    AIParseRecordRequest,
+    AIParseRecordResponse,
+    AIParseRecordsRequest,
+    AIParseRecordsResponse,
+    ParseRuleTable,
+)
 
 router = APIRouter(prefix="/ai", tags=["ai"])
 
 
-@router.post("/chat", response_model=AIChatResponse)
-def chat(payload: AIChatRequest) -> AIChatResponse:
+_CACHE_DIR = DATA_DIR / "ai_cache"
+
+chat_cache = ResponseCache(
+    settings.ai_cache_max_entries,
+    settings.ai_cache_ttl_seconds,
+    _CACHE_DIR / "chat" if settings.ai_cache_disk else None,
+)
+parse_cache = ResponseCache(
+    settings.ai_cache_max_entries,
+    settings.ai_cache_ttl_seconds,
+    _CACHE_DIR / "parse" if settings.ai_cache_disk else None,
+)
+
+sessions = SessionStore(
+    DATA_DIR / "chat_sessions",
+    max_resident_bytes=settings.ai_session_max_resident_bytes,
+    history_tokens=settings.ai_session_history_tokens,
+    summary_tokens=settings.ai_session_summary_tokens,
+    idle_seconds=settings.ai_session_idle_seconds,
+)
+
+
+
+def _collect_metrics() -> list[metrics.Sample]:
+    samples: list[metrics.Sample] = []
+    for name, cache in (("chat", chat_cache), ("parse", parse_cache)):
+        stats = cache.stats()
+        samples.append(("ai_cache_hit_ratio", {"cache": name}, stats["hit_ratio"]))
+        samples.append(("ai_cache_entries", {"cache": name}, stats["entries"]))
+    session_stats = sessions.stats()
+    samples.append(("ai_session_resident_bytes", {}, session_stats["resident_bytes"]))
+    samples.append(("ai_session_resident_sessions", {}, session_stats["resident_sessions"]))
+    return samples
+
+
+metrics.describe("ai_cache_hit_ratio", "gauge", "Memory+disk hit ratio of the AI response caches.", ("cache",))
+metrics.describe("ai_cache_entries", "gauge", "Entries held in memory by the AI response caches.", ("cache",))
+metrics.describe("ai_session_resident_bytes", "gauge", "Estimated bytes of chat sessions held in memory.")
+metrics.describe("ai_session_resident_sessions", "gauge", "Chat sessions held in memory.")
+metrics.register_collector(_collect_metrics)
+
+_STUB_REPLY = (
+    "[stub] AI gateway received your input. "
+    "Next step: connect provider clients and structured parsers for tasks/assets/knowledge."
+)
+
+
+async def _model_name() -> str:
+    app_settings = await run_in_threadpool(get_settings)
+    return app_settings.model_name
+
+
+def _check_provider(provider: str) -> None:
+    try:
+        ai_gateway.provider_config(provider)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+def _session_key(session_id: str) -> str:
+    # Sessions of all profiles share one store (and its memory budget); ids are only unique per profile.
+    profile = current_profile()
+    return session_id if profile == settings.default_profile else f"{profile}/{session_id}"
+
+
+async def _prepare_chat(payload: AIChatRequest) -> tuple[str, str, list[dict[str, str]], str]:
+    _check_provider(payload.provider)
     session_id = payload.session_id or str(uuid4())
-    reply = (
-        "[stub] AI gateway received your input. "
-        "Next step: connect provider clients and structured parsers for tasks/assets/knowledge."
-    )
+    session = await run_in_threadpool(sessions.get_or_create, _session_key(session_id))
+    messages = sessions.build_messages(session, payload.prompt)
+    model = await _model_name()
+    # The conversation context is part of the key so one prompt in different sessions is not conflated.
+    cache_key = make_key("chat", payload.provider, model, [normalize_prompt(row["content"]) for row in messages])
+    return session_id, model, messages, cache_key
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/chat", response_model=AIChatResponse)
+async def chat(payload: AIChatRequest) -> AIChatResponse:
+    session_id, model, messages, cache_key = await _prepare_chat(payload)
+
+    try:
+        reply = await chat_cache.aget_or_compute(
+            cache_key, lambda: ai_gateway.complete_chat(payload.provider, model, messages)
+        )
+        await run_in_threadpool(sessions.append_turn, _session_key(session_id), payload.prompt, reply)
+    except ai_gateway.ProviderNotConfigured:
+        reply = _STUB_REPLY
+    except ai_gateway.ProviderBusy as exc:
+        raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "1"}) from exc
+    except ai_gateway.ProviderError as exc:
+        raise HTTPException(status_code=502, detail=str(exc)) from exc
+
     return AIChatResponse(provider=payload.provider, session_id=session_id, reply=reply)
 
 
-def _extract_amount(text: str) -> str | None:
-    tokens = text.replace("¥", " ").replace("元", " ").split()
-    for token in tokens:
+@router.post("/chat/stream")
+async def chat_stream(payload: AIChatRequest) -> StreamingResponse:
+    session_id, model, messages, cache_key = await _prepare_chat(payload)
+
+    async def events() -> AsyncIterator[str]:
+        # When the client disconnects Starlette cancels/closes this generator, which exits the
+        # upstream stream context and drops the provider request.
+        yield _sse("session", {"provider": payload.provider, "session_id": session_id})
+        # With the disk tier on, get and put touch files; keep them off the event loop.
+        cached = await run_in_threadpool(chat_cache.get, cache_key)
+        if cached is not None:
+            await run_in_threadpool(sessions.append_turn, _session_key(session_id), payload.prompt, cached)
+            yield _sse("token", {"text": cached})
+            yield _sse("done", {"cached": True})
+            return
+
+        tokens: list[str] = []
         try:
-            amount = float(token)
-            if amount > 0:
-                return f"{amount:.2f}"
-        except (ValueError, InvalidOperation):
-            continue
-    return None
+            async for token in ai_gateway.stream_chat(payload.provider, model, messages):
+                tokens.append(token)
+                yield _sse("token", {"text": token})
+            reply = "".join(tokens)
+            await run_in_threadpool(chat_cache.put, cache_key, reply)
+            await run_in_threadpool(sessions.append_turn, _session_key(session_id), payload.prompt, reply)
+        except ai_gateway.ProviderNotConfigured:
+            yield _sse("token", {"text": _STUB_REPLY})
+        except ai_gateway.ProviderError as exc:
+            yield _sse("error", {"detail": str(exc)})
+            return
+        yield _sse("done", {})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 
 @router.post("/parse-record", response_model=AIParseRecordResponse)
 def parse_record(payload: AIParseRecordRequest) -> AIParseRecordResponse:
-    text = payload.text.strip()
-    lower_text = text.lower()
-
-    detected_type = "feed"
-    suggested_category = "其他"
-    extracted_amount = _extract_amount(text)
-    extracted_time: str | None = None
-
-    if any(keyword in text for keyword in ["买", "花", "支出", "消费", "吃饭"]) or "expense" in lower_text:
-        detected_type = "transaction"
-        suggested_category = "消费记录"
-    elif any(keyword in text for keyword in ["收入", "工资", "到账"]) or "income" in lower_text:
-        detected_type = "transaction"
-        suggested_category = "收入"
-    elif any(keyword in text for keyword in ["任务", "提醒", "明天", "今天", "周", "点"]):
-        detected_type = "task"
-        suggested_category = "任务"
-    elif any(keyword in text for keyword in ["芯片", "知识", "记录", "词条", "博客"]):
-        detected_type = "knowledge"
-        suggested_category = "知识"
-
-    if "明天" in text:
-        extracted_time = "tomorrow"
-    elif "今天" in text:
-        extracted_time = datetime.now().date().isoformat()
-
-    return AIParseRecordResponse(
-        detected_type=detected_type,
-        suggested_category=suggested_category,
-        normalized_text=text,
-        extracted_amount=extracted_amount,
-        extracted_time=extracted_time,
-    )
+    # The date is part of the key because "today" resolves to the current date; each profile has its own rules.
+    cache_key = make_key("parse", current_profile(), payload.text.strip(), date.today())
+    row = parse_cache.get_or_compute(cache_key, lambda: record_parser.parse_record(payload.text).model_dump())
+    return AIParseRecordResponse.model_validate(row)
+
+
+@router.post("/parse-records", response_model=AIParseRecordsResponse)
+def parse_records(payload: AIParseRecordsRequest) -> AIParseRecordsResponse:
+    return AIParseRecordsResponse(results=record_parser.parse_records(payload.texts))
+
+
+@router.get("/parse-rules", response_model=ParseRuleTable)
+def get_parse_rules() -> ParseRuleTable:
+    return record_parser.get_rules()
+
+
+@router.put("/parse-rules", response_model=ParseRuleTable)
+def update_parse_rules(payload: ParseRuleTable) -> ParseRuleTable:
+    table = record_parser.set_rules(payload)
+    parse_cache.clear()
+    return table
+
+
+@router.get("/cache/stats")
+def cache_stats() -> dict[str, dict[str, int | float]]:
+    return {"chat": chat_cache.stats(), "parse": parse_cache.stats()}
+
+
+@router.get("/sessions/stats")
+def session_stats() -> dict[str, int]:
+    return sessions.stats()
+
+
+@router.delete("/cache")
+def clear_cache() -> dict[str, bool]:
+    chat_cache.clear()
+    parse_cache.clear()
+    return {"cleared": True}
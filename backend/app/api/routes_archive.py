@@ -0,0 +1,90 @@
+from collections.abc import Callable
+from datetime import UTC, date, datetime, timedelta
+from typing import Any
+
+from fastapi import APIRouter, HTTPException
+
+from app.api import routes_assets
+from app.api.routes_feed import FeedOut, feed_store
+from app.api.routes_sleep import sleep_store
+from app.api.routes_tasks import task_store
+from app.core import archive, vector_index
+from app.core.config import settings
+from app.core.pagination import time_value
+from app.core.store_io import store_route
+from app.schemas.sleep import SleepLogOut
+from app.schemas.tasks import TaskOut
+
+router = APIRouter(prefix="/archive", tags=["archive"], route_class=store_route("archive"))
+
+_COLLECTIONS = ("tasks", "feed", "sleep", "transactions")
+
+
+def _older_than(days: int) -> float:
+    return (datetime.now(UTC) - timedelta(days=days)).timestamp()
+
+
+def _task_year(cutoff: float) -> Callable[[TaskOut], int | None]:
+    def year_of(task: TaskOut) -> int | None:
+        # Only finished one-off tasks; open and recurring tasks stay hot however old they are.
+        if task.status not in {"done", "skipped"} or task.recurrence is not None:
+            return None
+        finished = task.completed_at or task.actual_end_at or task.planned_end_at or task.planned_start_at
+        if finished is None or time_value(finished) >= cutoff:
+            return None
+        return finished.year
+
+    return year_of
+
+
+def _feed_year(cutoff: float) -> Callable[[FeedOut], int | None]:
+    def year_of(item: FeedOut) -> int | None:
+        return item.created_at.year if time_value(item.created_at) < cutoff else None
+
+    return year_of
+
+
+def _sleep_year(cutoff: float) -> Callable[[SleepLogOut], int | None]:
+    def year_of(log: SleepLogOut) -> int | None:
+        return log.end_at.year if time_value(log.end_at) < cutoff else None
+
+    return year_of
+
+
+def _unindex_feed(items: list[FeedOut]) -> None:
+    # Archived items are no longer searchable, as a rebuild from feed.json would also leave them out.
+    vector_index.remove_documents("feed", (item.id for item in items))
+
+
+def run_archival() -> dict[str, dict[int, int]]:
+    """Move records past their horizon (ARCHIVE_* settings) into year partitions; returns moved counts per year."""
+    return {
+        "tasks": archive.archive_list(task_store, "tasks", _task_year(_older_than(settings.archive_task_days))),
+        "feed": archive.archive_list(
+            feed_store, "feed", _feed_year(_older_than(settings.archive_feed_days)), _unindex_feed
+        ),
+        "sleep": archive.archive_list(sleep_store, "sleep", _sleep_year(_older_than(settings.archive_sleep_days))),
+        "transactions": routes_assets.archive_transactions(date.today().year - settings.archive_transaction_keep_years + 1),
+    }
+
+
+@router.get("/")
+def archive_index() -> dict[str, dict[str, int]]:
+    """Partition sizes in bytes per collection and year."""
+    return archive.stats()
+
+
+@router.post("/run")
+def archive_run() -> dict[str, dict[int, int]]:
+    try:
+        return run_archival()
+    except ValueError as exc:
+        # An archived row with the same id but other content; nothing of the failing collection was removed.
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+
+
+@router.get("/{collection}/{year}")
+def archived_rows(collection: str, year: int) -> list[dict[str, Any]]:
+    if collection not in _COLLECTIONS:
+        raise HTTPException(status_code=404, detail=f"unknown collection; one of: {', '.join(_COLLECTIONS)}")
+    return archive.read_partition(collection, year)
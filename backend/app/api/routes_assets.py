@@ -4,10 +4,17 @@ from decimal import Decimal
 
 from fastapi import APIRouter, HTTPException, Query
 
-from app.core.json_store import read_json, write_json
-from app.schemas.assets import InvestmentLogCreate, InvestmentLogOut, TransactionCreate, TransactionOut
-
-router = APIRouter(prefix="/assets", tags=["assets"])
+from app.core import archive, rollup
+from app.core.repository import Collection
+from app.core.store_io import store_route
+from app.schemas.assets import (
+    InvestmentLogCreate,
+    InvestmentLogOut,
+    InvestmentLogRecord,
+    TransactionCreate,
+    TransactionOut,
+    TransactionRecord,
+)
 
 _ASSETS_FILE = "assets.json"
 _DEFAULT_STATE = {
@@ -18,27 +25,81 @@ _DEFAULT_STATE = {
     ],
     "transactions": [],
     "investment_logs": [],
+    # "YYYY-MM" -> income/expense totals (and per category) of transactions moved to archive partitions.
+    "archived_months": {},
 }
+_ARCHIVE = "transactions"
+
+
+def _parse_state(raw: dict) -> dict:
+    # Rows are kept as compact records and turned into models only in responses (app/core/records.py).
+    return {
+        "accounts": raw["accounts"],
+        "transactions": [TransactionRecord.from_json(item) for item in raw["transactions"]],
+        "investment_logs": [InvestmentLogRecord.from_json(item) for item in raw["investment_logs"]],
+        "archived_months": raw.get("archived_months", {}),
+    }
+
+
+def _dump_state(state: dict) -> dict:
+    return {
+        "accounts": state["accounts"],
+        "transactions": [item.to_json() for item in state["transactions"]],
+        "investment_logs": [item.to_json() for item in state["investment_logs"]],
+        "archived_months": state["archived_months"],
+    }
+
+
+def _copy_state(state: dict) -> dict:
+    # Account rows are edited in place (balances), so they are copied one level deeper than the record lists.
+    return {
+        "accounts": [dict(account) for account in state["accounts"]],
+        "transactions": list(state["transactions"]),
+        "investment_logs": list(state["investment_logs"]),
+        "archived_months": dict(state["archived_months"]),
+    }
+
+
+assets_store: Collection[dict] = Collection(_ASSETS_FILE, _DEFAULT_STATE, parse=_parse_state, dump=_dump_state, copy=_copy_state)
+
+
+def _rollup_rows(item: TransactionRecord) -> list[rollup.Contribution]:
+    if item.type not in rollup.MONEY_COLUMNS:
+        return []
+    return [(item.happened_on, item.type, rollup.cents(item.amount))]
+
+
+rollup.track(
+    "assets",
+    assets_store,
+    ("income", "expense"),
+    _rollup_rows,
+    rows=lambda state: state["transactions"],
+    archive_name=_ARCHIVE,
+    parse_archived=lambda rows: [TransactionRecord.from_json(row) for row in rows],
+)
+
+router = APIRouter(prefix="/assets", tags=["assets"], route_class=store_route("assets", assets_store))
 
 
 def _load_state() -> dict:
-    return read_json(_ASSETS_FILE, _DEFAULT_STATE)
+    return assets_store.get()
 
 
 def _save_state(state: dict) -> None:
-    write_json(_ASSETS_FILE, state)
+    assets_store.save(state)
 
 
 def _account_map(accounts: list[dict]) -> dict[str, dict]:
     return {account["name"]: account for account in accounts}
 
 
-def _load_transactions(state: dict) -> list[TransactionOut]:
-    return [TransactionOut.model_validate(item) for item in state["transactions"]]
+def _load_transactions(state: dict) -> list[TransactionRecord]:
+    return state["transactions"]
 
 
-def _load_investment_logs(state: dict) -> list[InvestmentLogOut]:
-    return [InvestmentLogOut.model_validate(item) for item in state["investment_logs"]]
+def _load_investment_logs(state: dict) -> list[InvestmentLogRecord]:
+    return state["investment_logs"]
 
 
 @router.get("/accounts")
@@ -52,44 +113,118 @@ def list_transactions(
     category: str | None = Query(default=None), month: str | None = Query(default=None)
 ) -> list[TransactionOut]:
     state = _load_state()
-    data = _load_transactions(state)
+    data: list[TransactionRecord | TransactionOut] = _load_transactions(state)
+
+    if month:
+        data = [item for item in data if item.happened_on.strftime("%Y-%m") == month]
+        if month in state["archived_months"]:
+            archived = _archived_transactions(int(month[:4]))
+            data += [item for item in archived if item.happened_on.strftime("%Y-%m") == month]
 
     if category:
         data = [item for item in data if item.category == category]
 
-    if month:
-        data = [item for item in data if item.happened_on.strftime("%Y-%m") == month]
+    data.sort(key=lambda item: item.happened_on, reverse=True)
+    return [item.to_model() if isinstance(item, TransactionRecord) else item for item in data]
 
-    return list(sorted(data, key=lambda item: item.happened_on, reverse=True))
 
+def _archived_transactions(year: int) -> list[TransactionOut]:
+    return [TransactionOut.model_validate(row) for row in archive.read_partition(_ARCHIVE, year)]
 
-@router.post("/transactions", response_model=TransactionOut)
-def create_transaction(payload: TransactionCreate) -> TransactionOut:
+
+def _month_summaries(transactions: list[TransactionOut] | list[TransactionRecord]) -> dict[str, dict]:
+    totals: dict[str, dict[str, Decimal]] = defaultdict(lambda: {"income": Decimal("0"), "expense": Decimal("0")})
+    categories: dict[str, dict[str, dict[str, Decimal]]] = defaultdict(
+        lambda: defaultdict(lambda: {"income": Decimal("0"), "expense": Decimal("0")})
+    )
+    for item in transactions:
+        month = item.happened_on.strftime("%Y-%m")
+        totals[month][item.type] += item.amount
+        categories[month][item.category][item.type] += item.amount
+
+    def formatted(values: dict[str, Decimal]) -> dict[str, str]:
+        return {kind: f"{value:.2f}" for kind, value in values.items()}
+
+    return {
+        month: {**formatted(values), "categories": {name: formatted(row) for name, row in categories[month].items()}}
+        for month, values in totals.items()
+    }
+
+
+def archive_transactions(before_year: int) -> dict[int, int]:
+    """Move transactions dated before ``before_year`` into year partitions; their month totals stay in the hot file.
+
+    Balances are unaffected: accounts keep their running balance, archived rows are history only.
+    """
+    assets_store.rw.acquire_write()
+    try:
+        state = _load_state()
+        moved: dict[int, list[TransactionRecord]] = defaultdict(list)
+        keep: list[TransactionRecord] = []
+        for item in _load_transactions(state):
+            (moved[item.happened_on.year] if item.happened_on.year < before_year else keep).append(item)
+        if not moved:
+            return {}
+        for year, items in moved.items():
+            archive.merge_partition(_ARCHIVE, year, [item.to_json() for item in items])
+            # Summaries are rebuilt from the whole partition, so repeated runs for a year stay exact.
+            state["archived_months"].update(_month_summaries(_archived_transactions(year)))
+        state["transactions"] = keep
+        with archive.moving():
+            _save_state(state)
+        return {year: len(items) for year, items in sorted(moved.items())}
+    finally:
+        assets_store.rw.release_write()
+
+
+def _validate_transaction(payload: TransactionCreate, accounts: dict[str, dict]) -> None:
     if payload.type not in {"income", "expense"}:
         raise HTTPException(status_code=400, detail="type must be income or expense")
 
     if payload.amount <= 0:
         raise HTTPException(status_code=400, detail="amount must be greater than 0")
 
-    state = _load_state()
-    accounts = state["accounts"]
-    account = _account_map(accounts).get(payload.account)
-    if not account:
+    if payload.account not in accounts:
         raise HTTPException(status_code=404, detail="account not found")
 
+
+def _apply_transactions(state: dict, payloads: list[TransactionCreate]) -> list[TransactionOut]:
     transactions = _load_transactions(state)
-    next_id = max([item.id for item in transactions], default=0) + 1
+    next_id = archive.next_id(_ARCHIVE, (item.id for item in transactions))
+    deltas: dict[str, Decimal] = defaultdict(Decimal)
+    created: list[TransactionOut] = []
 
-    transaction = TransactionOut(id=next_id, **payload.model_dump())
-    transactions.append(transaction)
+    for offset, payload in enumerate(payloads):
+        transaction = TransactionOut(id=next_id + offset, **payload.model_dump())
+        created.append(transaction)
+        deltas[payload.account] += payload.amount if payload.type == "income" else -payload.amount
 
-    balance = Decimal(account["balance"])
-    balance = balance + payload.amount if payload.type == "income" else balance - payload.amount
-    account["balance"] = f"{balance:.2f}"
+    accounts = _account_map(state["accounts"])
+    for name, delta in deltas.items():
+        accounts[name]["balance"] = f"{Decimal(accounts[name]['balance']) + delta:.2f}"
 
-    state["transactions"] = [item.model_dump(mode="json") for item in transactions]
+    state["transactions"] = transactions + [TransactionRecord.from_model(item) for item in created]
     _save_state(state)
-    return transaction
+    return created
+
+
+def create_transactions(payloads: list[TransactionCreate]) -> list[TransactionOut]:
+    """Validate every transaction first, then record all of them with one write; balances move once per account."""
+    state = _load_state()
+    accounts = _account_map(state["accounts"])
+    for index, payload in enumerate(payloads):
+        try:
+            _validate_transaction(payload, accounts)
+        except HTTPException as exc:
+            raise HTTPException(status_code=exc.status_code, detail=f"item {index}: {exc.detail}") from exc
+    return _apply_transactions(state, payloads) if payloads else []
+
+
+@router.post("/transactions", response_model=TransactionOut)
+def create_transaction(payload: TransactionCreate) -> TransactionOut:
+    state = _load_state()
+    _validate_transaction(payload, _account_map(state["accounts"]))
+    return _apply_transactions(state, [payload])[0]
 
 
 @router.delete("/transactions/{transaction_id}")
@@ -109,15 +244,18 @@ def delete_transaction(transaction_id: int) -> dict[str, int | bool]:
         account["balance"] = f"{balance:.2f}"
 
     new_transactions = [item for item in transactions if item.id != transaction_id]
-    state["transactions"] = [item.model_dump(mode="json") for item in new_transactions]
+    state["transactions"] = new_transactions
     _save_state(state)
     return {"deleted": True, "id": transaction_id}
 
 
+def cash_balance(state: dict) -> Decimal:
+    return sum([Decimal(account["balance"]) for account in state["accounts"] if account["is_cash"]], Decimal("0"))
+
+
 @router.get("/cash-total")
 def cash_total() -> dict[str, str]:
-    state = _load_state()
-    total = sum([Decimal(account["balance"]) for account in state["accounts"] if account["is_cash"]], Decimal("0"))
+    total = cash_balance(_load_state())
     return {"currency": "CNY", "cash_total": f"{total:.2f}"}
 
 
@@ -132,6 +270,13 @@ def category_summary(month: str | None = Query(default=None)) -> list[dict[str,
             continue
         summary[item.category][item.type] += item.amount
 
+    for month_key, archived in state["archived_months"].items():
+        if month and month_key != month:
+            continue
+        for category, totals in archived["categories"].items():
+            for kind, value in totals.items():
+                summary[category][kind] += Decimal(value)
+
     result: list[dict[str, str]] = []
     for category, values in summary.items():
         result.append(
@@ -155,6 +300,10 @@ def monthly_summary() -> list[dict[str, str]]:
         key = item.happened_on.strftime("%Y-%m")
         monthly[key][item.type] += item.amount
 
+    for month_key, archived in state["archived_months"].items():
+        monthly[month_key]["income"] += Decimal(archived["income"])
+        monthly[month_key]["expense"] += Decimal(archived["expense"])
+
     result: list[dict[str, str]] = []
     for month_key, values in monthly.items():
         result.append(
@@ -172,7 +321,7 @@ def monthly_summary() -> list[dict[str, str]]:
 def list_investment_logs() -> list[InvestmentLogOut]:
     state = _load_state()
     logs = _load_investment_logs(state)
-    return list(sorted(logs, key=lambda row: row.happened_on))
+    return [row.to_model() for row in sorted(logs, key=lambda row: row.happened_on)]
 
 
 @router.post("/investment/logs", response_model=InvestmentLogOut)
@@ -182,9 +331,9 @@ def create_investment_log(payload: InvestmentLogCreate) -> InvestmentLogOut:
     next_id = max([item.id for item in logs], default=0) + 1
 
     log = InvestmentLogOut(id=next_id, **payload.model_dump())
-    logs.append(log)
+    logs.append(InvestmentLogRecord.from_model(log))
 
-    state["investment_logs"] = [item.model_dump(mode="json") for item in logs]
+    state["investment_logs"] = logs
     _save_state(state)
     return log
 
@@ -198,7 +347,7 @@ def delete_investment_log(log_id: int) -> dict[str, int | bool]:
     if len(new_logs) == len(logs):
         raise HTTPException(status_code=404, detail="investment log not found")
 
-    state["investment_logs"] = [item.model_dump(mode="json") for item in new_logs]
+    state["investment_logs"] = new_logs
     _save_state(state)
     return {"deleted": True, "id": log_id}
 
@@ -0,0 +1,26 @@
+from datetime import datetime
+from typing import Any
+
+from fastapi import APIRouter, Query
+
+from app.core.audit_log import audit_log
+from app.core.json_store import current_profile
+from app.core.store_io import store_route
+
+router = APIRouter(prefix="/audit", tags=["audit"], route_class=store_route("audit"))
+
+
+@router.get("/")
+def list_audit_events(
+    tool: str | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    id: str | None = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+) -> list[dict[str, Any]]:
+    return audit_log.query(tool=tool, start=start, end=end, event_id=id, limit=limit, profile=current_profile())
+
+
+@router.get("/stats")
+def audit_stats() -> dict[str, int]:
+    return audit_log.stats()
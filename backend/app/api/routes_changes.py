@@ -0,0 +1,96 @@
+import json
+from collections.abc import AsyncIterator
+from typing import Any
+
+from fastapi import APIRouter, Header, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from app.core import changes
+from app.core.config import settings
+
+router = APIRouter(prefix="/changes", tags=["changes"])
+
+_COLLECTIONS_QUERY = Query(default=None, description="Comma-separated collections (tasks,feed,...); default all")
+
+
+def _topics(collections: str | None) -> set[str]:
+    known = set(changes.topics())
+    if not collections:
+        return known
+    names = {name.strip() for name in collections.split(",") if name.strip()}
+    unknown = names - known
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"unknown collections: {', '.join(sorted(unknown))}")
+    return names
+
+
+def _sse(event: str, data: dict[str, Any], event_id: int | None = None) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.get("/")
+async def list_changes(collections: str | None = _COLLECTIONS_QUERY, since: int | None = Query(default=None)) -> dict[str, Any]:
+    """Buffered changes after ``since`` plus the current version; without ``since``, just the version to start from."""
+    return changes.recent(_topics(collections), since)
+
+
+@router.get("/stream")
+async def stream_changes(
+    collections: str | None = _COLLECTIONS_QUERY,
+    since: int | None = Query(default=None, description="Resume after this version"),
+    last_event_id: str | None = Header(default=None),
+) -> StreamingResponse:
+    topics = _topics(collections)
+    if since is None and last_event_id and last_event_id.isdigit():
+        # EventSource reconnects with the id of the last event it received.
+        since = int(last_event_id)
+    subscription = changes.subscribe(topics, since)
+
+    async def events() -> AsyncIterator[str]:
+        # Starlette cancels this generator when the client disconnects; the finally unregisters it.
+        try:
+            yield _sse("ready", {"version": changes.current_version(), "collections": sorted(topics)})
+            while True:
+                item = await subscription.next(settings.changes_heartbeat_seconds)
+                if item is None:
+                    yield ": ping\n\n"
+                elif item.get("reset"):
+                    yield _sse("reset", item, item["version"])
+                else:
+                    yield _sse("change", item, item["version"])
+        finally:
+            changes.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/ws")
+async def changes_socket(websocket: WebSocket, collections: str | None = None, since: int | None = None) -> None:
+    try:
+        topics = _topics(collections)
+    except HTTPException as exc:
+        await websocket.close(code=1008, reason=str(exc.detail))
+        return
+    await websocket.accept()
+    subscription = changes.subscribe(topics, since)
+    try:
+        await websocket.send_json({"type": "ready", "version": changes.current_version(), "collections": sorted(topics)})
+        while True:
+            item = await subscription.next(settings.changes_heartbeat_seconds)
+            if item is None:
+                # Also how a vanished client is noticed: the send fails.
+                await websocket.send_json({"type": "ping"})
+            else:
+                await websocket.send_json({"type": "reset" if item.get("reset") else "change", **item})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        changes.unsubscribe(subscription)
+
+
+@router.get("/stats")
+async def change_stats() -> dict[str, int]:
+    return changes.stats()
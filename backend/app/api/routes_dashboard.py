@@ -0,0 +1,143 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from time import perf_counter
+from typing import Any
+
+from fastapi import APIRouter, Query
+from pydantic import BaseModel
+
+from app.api.routes_assets import assets_store, cash_balance
+from app.api.routes_feed import FeedOut, feed_store
+from app.api.routes_settings import SettingsPayload, settings_store
+from app.api.routes_sleep import sleep_store
+from app.api.routes_tasks import occurrences_between, task_store
+from app.core import metrics, store_io
+from app.core.recurrence import align
+from app.schemas.sleep import SleepLogOut
+from app.schemas.tasks import TaskOccurrenceOut, TaskOut
+
+router = APIRouter(prefix="/dashboard", tags=["dashboard"])
+
+_OPEN_STATUSES = {"todo", "in_progress"}
+
+
+class MonthSpend(BaseModel):
+    month: str
+    expense: Decimal
+    income: Decimal
+
+
+class LastSleep(SleepLogOut):
+    duration_minutes: int
+
+
+class DashboardOut(BaseModel):
+    today: date
+    cash_total: Decimal
+    month_spend: MonthSpend
+    tasks_today: list[TaskOccurrenceOut]
+    tasks_overdue: list[TaskOut]
+    overdue_count: int
+    latest_feed: list[FeedOut]
+    last_sleep: LastSleep | None
+    settings: SettingsPayload
+    # Wall time per section in milliseconds, including any wait for a store worker.
+    timings_ms: dict[str, float]
+
+
+def _local_date(value: datetime) -> date:
+    return value.astimezone().date() if value.tzinfo is not None else value.date()
+
+
+def _assets_section(today: date) -> dict[str, Any]:
+    state = assets_store.get()
+    month = today.strftime("%Y-%m")
+    totals = {"income": Decimal("0"), "expense": Decimal("0")}
+    for item in state["transactions"]:
+        if item.happened_on.year == today.year and item.happened_on.month == today.month:
+            totals[item.type] += item.amount
+    return {"cash_total": cash_balance(state), "month_spend": MonthSpend(month=month, **totals)}
+
+
+def _tasks_section(today: date, limit: int) -> dict[str, Any]:
+    tasks = task_store.get()
+    day_start = datetime.combine(today, time.min)
+    overdue = [
+        task
+        for task in tasks
+        if task.recurrence is None
+        and task.status in _OPEN_STATUSES
+        and task.planned_start_at is not None
+        and task.planned_start_at < align(day_start, task.planned_start_at)
+    ]
+    overdue.sort(key=lambda task: align(task.planned_start_at, day_start))
+    return {
+        "tasks_today": occurrences_between(tasks, day_start, day_start + timedelta(days=1)),
+        "tasks_overdue": overdue[:limit],
+        "overdue_count": len(overdue),
+    }
+
+
+def _feed_section(limit: int) -> dict[str, Any]:
+    feeds = feed_store.get()
+    return {"latest_feed": sorted(feeds, key=lambda item: item.created_at, reverse=True)[:limit]}
+
+
+def _sleep_section(today: date) -> dict[str, Any]:
+    logs = [log for log in sleep_store.get() if _local_date(log.end_at) == today]
+    if not logs:
+        return {"last_sleep": None}
+    log = max(logs, key=lambda row: row.end_at)
+    minutes = int((log.end_at - log.start_at).total_seconds() // 60)
+    return {"last_sleep": LastSleep(**log.model_dump(), duration_minutes=minutes)}
+
+
+def _settings_section() -> dict[str, Any]:
+    return {"settings": settings_store.get()}
+
+
+async def _timed(section: str, work: Awaitable[dict[str, Any]], timings: dict[str, float]) -> dict[str, Any]:
+    started = perf_counter()
+    try:
+        return await work
+    finally:
+        elapsed = perf_counter() - started
+        timings[section] = round(elapsed * 1000, 3)
+        metrics.observe("dashboard_section_seconds", (section,), elapsed)
+
+
+@router.get("/", response_model=DashboardOut)
+async def dashboard(
+    today: date | None = Query(default=None, description="Client's local date; defaults to the server's"),
+    task_limit: int = Query(default=20, ge=1, le=200),
+    feed_limit: int = Query(default=5, ge=1, le=50),
+) -> DashboardOut:
+    """Home view summary in one request: each collection is read once, all sections run concurrently."""
+    today = today or date.today()
+    # Section name -> work on that collection's store pool (admission control applies per collection).
+    sections: dict[str, tuple[Callable[..., dict[str, Any]], tuple[Any, ...]]] = {
+        "assets": (_assets_section, (today,)),
+        "tasks": (_tasks_section, (today, task_limit)),
+        "feed": (_feed_section, (feed_limit,)),
+        "sleep": (_sleep_section, (today,)),
+        "settings": (_settings_section, ()),
+    }
+    timings: dict[str, float] = {}
+    started = perf_counter()
+    parts = await asyncio.gather(
+        *(
+            _timed(section, store_io.run_store(section, func, *args), timings)
+            for section, (func, args) in sections.items()
+        )
+    )
+    timings["total"] = round((perf_counter() - started) * 1000, 3)
+
+    body: dict[str, Any] = {"today": today, "timings_ms": timings}
+    for part in parts:
+        body.update(part)
+    return DashboardOut(**body)
+
+
+metrics.describe("dashboard_section_seconds", "histogram", "Dashboard section latency.", ("section",))
@@ -3,9 +3,9 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
-from app.core.json_store import read_json, write_json
-
-router = APIRouter(prefix="/feed", tags=["feed"])
+from app.core import archive, rollup
+from app.core.repository import Collection
+from app.core.store_io import store_route
 
 _FEED_FILE = "feed.json"
 
@@ -20,13 +20,29 @@ class FeedOut(FeedCreate):
     created_at: datetime
 
 
+feed_store: Collection[list[FeedOut]] = Collection(
+    _FEED_FILE,
+    [],
+    parse=lambda rows: [FeedOut.model_validate(row) for row in rows],
+    dump=lambda feeds: [item.model_dump(mode="json") for item in feeds],
+)
+
+
+def _rollup_rows(item: FeedOut) -> list[rollup.Contribution]:
+    return [(rollup.local_date(item.created_at), "feed_count", 1)]
+
+
+rollup.track("feed", feed_store, ("feed_count",), _rollup_rows, archive_name="feed")
+
+router = APIRouter(prefix="/feed", tags=["feed"], route_class=store_route("feed", feed_store))
+
+
 def _load_feeds() -> list[FeedOut]:
-    rows = read_json(_FEED_FILE, [])
-    return [FeedOut.model_validate(row) for row in rows]
+    return feed_store.get()
 
 
 def _save_feeds(feeds: list[FeedOut]) -> None:
-    write_json(_FEED_FILE, [item.model_dump(mode="json") for item in feeds])
+    feed_store.save(feeds)
 
 
 @router.get("/", response_model=list[FeedOut])
@@ -35,14 +51,25 @@ def list_feed() -> list[FeedOut]:
     return list(reversed(feeds[-20:]))
 
 
-@router.post("/", response_model=FeedOut)
-def create_feed(payload: FeedCreate) -> FeedOut:
+def create_feeds(payloads: list[FeedCreate]) -> list[FeedOut]:
+    """Append several feed items with one load, one write and one index update."""
     feeds = _load_feeds()
-    next_id = max([item.id for item in feeds], default=0) + 1
-    item = FeedOut(id=next_id, created_at=datetime.utcnow(), **payload.model_dump())
-    feeds.append(item)
+    next_id = archive.next_id("feed", (item.id for item in feeds))
+    created_at = datetime.utcnow()
+    items = [FeedOut(id=next_id + offset, created_at=created_at, **payload.model_dump()) for offset, payload in enumerate(payloads)]
+    if not items:
+        return []
+    feeds.extend(items)
     _save_feeds(feeds)
-    return item
+    from app.core import vector_index  # numpy-backed; imported on first write, not at startup
+
+    vector_index.index_feed_many([item.model_dump(mode="json") for item in items])
+    return items
+
+
+@router.post("/", response_model=FeedOut)
+def create_feed(payload: FeedCreate) -> FeedOut:
+    return create_feeds([payload])[0]
 
 
 @router.delete("/{feed_id}")
@@ -53,4 +80,7 @@ def delete_feed(feed_id: int) -> dict[str, int | bool]:
         raise HTTPException(status_code=404, detail="feed not found")
 
     _save_feeds(new_feeds)
+    from app.core import vector_index
+
+    vector_index.remove_document("feed", feed_id)
     return {"deleted": True, "id": feed_id}
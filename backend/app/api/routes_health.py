@@ -1,8 +1,32 @@
+from typing import Any
+
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from app.core import metrics, store_io, warmup
 
 router = APIRouter(prefix="/health", tags=["health"])
+metrics_router = APIRouter(tags=["health"])
 
 
 @router.get("/")
-def health_check() -> dict[str, str]:
-    return {"status": "ok"}
+async def health_check() -> dict[str, str | bool]:
+    # Async so it never waits for a worker thread, even when store routes are saturated.
+    return {"status": "ok", "ready": warmup.ready()}
+
+
+@router.get("/ready")
+async def readiness() -> JSONResponse:
+    """503 until the startup warm-up has loaded the data files, so a balancer routes traffic to warm processes."""
+    status = warmup.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@router.get("/metrics")
+async def metrics_summary() -> dict[str, Any]:
+    return {"metrics": metrics.summary(), "store_io": store_io.stats()}
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics() -> PlainTextResponse:
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
@@ -3,9 +3,8 @@
 from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 
-from app.core.json_store import read_json, write_json
-
-router = APIRouter(prefix="/knowledge", tags=["knowledge"])
+from app.core.repository import Collection
+from app.core.store_io import store_route
 
 _KNOWLEDGE_FILE = "knowledge.json"
 _DEFAULT_ENTRIES: list[dict] = []
@@ -22,13 +21,22 @@ class EntryOut(EntryCreate):
     updated_at: datetime
 
 
+knowledge_store: Collection[list[EntryOut]] = Collection(
+    _KNOWLEDGE_FILE,
+    _DEFAULT_ENTRIES,
+    parse=lambda rows: [EntryOut.model_validate(row) for row in rows],
+    dump=lambda entries: [item.model_dump(mode="json") for item in entries],
+)
+
+router = APIRouter(prefix="/knowledge", tags=["knowledge"], route_class=store_route("knowledge", knowledge_store))
+
+
 def _load_entries() -> list[EntryOut]:
-    rows = read_json(_KNOWLEDGE_FILE, _DEFAULT_ENTRIES)
-    return [EntryOut.model_validate(row) for row in rows]
+    return knowledge_store.get()
 
 
 def _save_entries(entries: list[EntryOut]) -> None:
-    write_json(_KNOWLEDGE_FILE, [item.model_dump(mode="json") for item in entries])
+    knowledge_store.save(entries)
 
 
 @router.get("/", response_model=list[EntryOut])
@@ -45,14 +53,25 @@ def list_entries(kind: str | None = Query(default=None), q: str | None = Query(d
     return sorted(rows, key=lambda row: row.updated_at, reverse=True)
 
 
-@router.post("/", response_model=EntryOut)
-def create_entry(payload: EntryCreate) -> EntryOut:
+def create_entries(payloads: list[EntryCreate]) -> list[EntryOut]:
+    """Add several entries with one load, one write and one index update."""
     entries = _load_entries()
     next_id = max([row.id for row in entries], default=0) + 1
-    entry = EntryOut(id=next_id, updated_at=datetime.utcnow(), **payload.model_dump())
-    entries.append(entry)
+    updated_at = datetime.utcnow()
+    created = [EntryOut(id=next_id + offset, updated_at=updated_at, **payload.model_dump()) for offset, payload in enumerate(payloads)]
+    if not created:
+        return []
+    entries.extend(created)
     _save_entries(entries)
-    return entry
+    from app.core import vector_index  # numpy-backed; imported on first write, not at startup
+
+    vector_index.index_knowledge_many([entry.model_dump(mode="json") for entry in created])
+    return created
+
+
+@router.post("/", response_model=EntryOut)
+def create_entry(payload: EntryCreate) -> EntryOut:
+    return create_entries([payload])[0]
 
 
 @router.get("/{entry_id}", response_model=EntryOut)
@@ -72,4 +91,7 @@ def delete_entry(entry_id: int) -> dict[str, int | bool]:
         raise HTTPException(status_code=404, detail="entry not found")
 
     _save_entries(new_entries)
+    from app.core import vector_index
+
+    vector_index.remove_document("knowledge", entry_id)
     return {"deleted": True, "id": entry_id}
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Query
+
+from app.core import vector_index
+from app.core.store_io import store_route
+from app.schemas.search import SearchHit
+
+router = APIRouter(prefix="/search", tags=["search"], route_class=store_route("search"))
+
+
+def semantic_search(q: str, k: int = 10, source: str | None = None) -> list[SearchHit]:
+    hits = vector_index.search(q, k, source)
+    return [
+        SearchHit(source=key.split(":", 1)[0], id=int(key.split(":", 1)[1]), label=label, score=round(score, 4))
+        for key, label, score in hits
+    ]
+
+
+@router.get("/", response_model=list[SearchHit])
+def search(
+    q: str = Query(min_length=1),
+    k: int = Query(default=10, ge=1, le=100),
+    source: str | None = Query(default=None, description="knowledge/feed"),
+) -> list[SearchHit]:
+    return semantic_search(q, k, source)
+
+
+@router.post("/rebuild")
+def rebuild_index() -> dict[str, int]:
+    return {"documents": vector_index.current().rebuild(vector_index.iter_documents())}
+
+
+@router.get("/stats")
+def index_stats() -> dict[str, int | str | bool]:
+    return vector_index.current().stats()
@@ -1,9 +1,8 @@
 ﻿from fastapi import APIRouter
 from pydantic import BaseModel
 
-from app.core.json_store import read_json, write_json
-
-router = APIRouter(prefix="/settings", tags=["settings"])
+from app.core.repository import Collection
+from app.core.store_io import store_route
 
 _SETTINGS_FILE = "settings.json"
 
@@ -23,13 +22,23 @@ _DEFAULT_SETTINGS = SettingsPayload(
 )
 
 
+settings_store: Collection[SettingsPayload] = Collection(
+    _SETTINGS_FILE,
+    _DEFAULT_SETTINGS.model_dump(mode="json"),
+    parse=SettingsPayload.model_validate,
+    dump=lambda payload: payload.model_dump(mode="json"),
+    copy=lambda payload: payload,
+)
+
+router = APIRouter(prefix="/settings", tags=["settings"], route_class=store_route("settings", settings_store))
+
+
 @router.get("/", response_model=SettingsPayload)
 def get_settings() -> SettingsPayload:
-    row = read_json(_SETTINGS_FILE, _DEFAULT_SETTINGS.model_dump(mode="json"))
-    return SettingsPayload.model_validate(row)
+    return settings_store.get()
 
 
 @router.put("/", response_model=SettingsPayload)
 def update_settings(payload: SettingsPayload) -> SettingsPayload:
-    write_json(_SETTINGS_FILE, payload.model_dump(mode="json"))
+    settings_store.save(payload)
     return payload
@@ -1,21 +1,38 @@
 from fastapi import APIRouter, HTTPException
 
-from app.core.json_store import read_json, write_json
+from app.core import archive, rollup
+from app.core.repository import Collection
+from app.core.store_io import store_route
 from app.schemas.sleep import SleepLogCreate, SleepLogOut
 
-router = APIRouter(prefix="/sleep", tags=["sleep"])
-
 _SLEEP_FILE = "sleep.json"
 _DEFAULT_LOGS: list[dict] = []
 
 
+sleep_store: Collection[list[SleepLogOut]] = Collection(
+    _SLEEP_FILE,
+    _DEFAULT_LOGS,
+    parse=lambda rows: [SleepLogOut.model_validate(row) for row in rows],
+    dump=lambda logs: [item.model_dump(mode="json") for item in logs],
+)
+
+
+def _rollup_rows(log: SleepLogOut) -> list[rollup.Contribution]:
+    # A night counts for the day it ends on, the day it was slept for.
+    return [(rollup.local_date(log.end_at), "sleep_minutes", int((log.end_at - log.start_at).total_seconds()) // 60)]
+
+
+rollup.track("sleep", sleep_store, ("sleep_minutes",), _rollup_rows, archive_name="sleep")
+
+router = APIRouter(prefix="/sleep", tags=["sleep"], route_class=store_route("sleep", sleep_store))
+
+
 def _load_logs() -> list[SleepLogOut]:
-    rows = read_json(_SLEEP_FILE, _DEFAULT_LOGS)
-    return [SleepLogOut.model_validate(row) for row in rows]
+    return sleep_store.get()
 
 
 def _save_logs(logs: list[SleepLogOut]) -> None:
-    write_json(_SLEEP_FILE, [item.model_dump(mode="json") for item in logs])
+    sleep_store.save(logs)
 
 
 @router.get("/logs", response_model=list[SleepLogOut])
@@ -30,7 +47,7 @@ def create_sleep_log(payload: SleepLogCreate) -> SleepLogOut:
         raise HTTPException(status_code=400, detail="end_at must be later than start_at")
 
     logs = _load_logs()
-    next_id = max([item.id for item in logs], default=0) + 1
+    next_id = archive.next_id("sleep", (item.id for item in logs))
     log = SleepLogOut(id=next_id, **payload.model_dump())
     logs.append(log)
     _save_logs(logs)
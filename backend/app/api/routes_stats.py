@@ -0,0 +1,166 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import combinations
+from math import sqrt
+from typing import Any
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app.core import rollup
+from app.core.store_io import store_route
+
+router = APIRouter(prefix="/stats", tags=["stats"], route_class=store_route("stats"))
+
+_MAX_SPAN = timedelta(days=3660)
+_SLEEP = "sleep_minutes"
+_FIELD_QUERY = Query(description=f"One of: {', '.join(rollup.COLUMNS)}")
+
+
+def _range(start: date | None, end: date | None, default_days: int) -> tuple[date, date]:
+    end = end or date.today()
+    start = start or end - timedelta(days=default_days - 1)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if end - start >= _MAX_SPAN:
+        raise HTTPException(status_code=400, detail=f"range is limited to {_MAX_SPAN.days} days")
+    return start, end
+
+
+def _field(name: str) -> int:
+    if name not in rollup.COLUMNS:
+        raise HTTPException(status_code=400, detail=f"unknown field; one of: {', '.join(rollup.COLUMNS)}")
+    return rollup.COLUMNS.index(name)
+
+
+def _days(start: date, end: date) -> list[tuple[date, list[int]]]:
+    """Every day of the range with its rollup row; days without activity are all zeros."""
+    days = rollup.current()
+    empty = [0] * len(rollup.COLUMNS)
+    return [
+        (day, days.get(day.isoformat(), empty))
+        for day in (start + timedelta(days=offset) for offset in range((end - start).days + 1))
+    ]
+
+
+def _known(row: list[int], index: int) -> bool:
+    # Sleep is only known for logged nights; zero tasks, money or feed items is a real zero.
+    return rollup.COLUMNS[index] != _SLEEP or row[index] > 0
+
+
+def _number(index: int, value: float) -> float:
+    return value / 100 if rollup.COLUMNS[index] in rollup.MONEY_COLUMNS else value
+
+
+def _format(index: int, value: float) -> str | float | int:
+    if rollup.COLUMNS[index] in rollup.MONEY_COLUMNS:
+        return f"{value / 100:.2f}"
+    return value if isinstance(value, int) else round(value, 2)
+
+
+def _row_body(day: date, row: list[int]) -> dict[str, Any]:
+    return {"day": day.isoformat(), **{name: _format(index, row[index]) for index, name in enumerate(rollup.COLUMNS)}}
+
+
+def _group(rows: list[list[int]]) -> dict[str, Any]:
+    totals: dict[str, Any] = {}
+    averages: dict[str, Any] = {}
+    for index, name in enumerate(rollup.COLUMNS):
+        values = [row[index] for row in rows if _known(row, index)]
+        totals[name] = _format(index, sum(values))
+        averages[name] = _format(index, sum(values) / len(values)) if values else None
+    return {"days": len(rows), "totals": totals, "averages": averages}
+
+
+@router.get("/daily")
+def daily_stats(start: date | None = None, end: date | None = None) -> list[dict[str, Any]]:
+    """One row per day of the range (default: the last 30 days), oldest first; money as strings."""
+    return [_row_body(day, row) for day, row in _days(*_range(start, end, 30))]
+
+
+@router.get("/compare")
+def compare_days(
+    field: str = _FIELD_QUERY,
+    min: Decimal | None = Query(default=None, description="Inclusive lower bound (currency units for money)"),
+    max: Decimal | None = Query(default=None, description="Inclusive upper bound"),
+    start: date | None = None,
+    end: date | None = None,
+) -> dict[str, Any]:
+    """Totals and per-day averages for days whose ``field`` is within [min, max] versus all other days.
+
+    "Days I slept under 6 hours": ``field=sleep_minutes&max=359``. Days without a sleep log take part in
+    neither group when filtering on sleep, and never count towards sleep averages.
+    """
+    index = _field(field)
+    scale = 100 if field in rollup.MONEY_COLUMNS else 1
+    matching: list[list[int]] = []
+    other: list[list[int]] = []
+    for _, row in _days(*_range(start, end, 365)):
+        if not _known(row, index):
+            continue
+        inside = (min is None or row[index] >= min * scale) and (max is None or row[index] <= max * scale)
+        (matching if inside else other).append(row)
+    return {"field": field, "min": min, "max": max, "matching": _group(matching), "other": _group(other)}
+
+
+def _pearson(pairs: list[tuple[float, float]]) -> float | None:
+    n = len(pairs)
+    if n < 3:
+        return None
+    mean_x = sum(x for x, _ in pairs) / n
+    mean_y = sum(y for _, y in pairs) / n
+    cov = sum((x - mean_x) * (y - mean_y) for x, y in pairs)
+    var_x = sum((x - mean_x) ** 2 for x, _ in pairs)
+    var_y = sum((y - mean_y) ** 2 for _, y in pairs)
+    if var_x == 0 or var_y == 0:
+        return None
+    return round(cov / sqrt(var_x * var_y), 4)
+
+
+@router.get("/correlations")
+def correlations(
+    fields: str | None = Query(default=None, description="Comma-separated fields; default all"),
+    start: date | None = None,
+    end: date | None = None,
+) -> dict[str, Any]:
+    """Pearson correlation per pair of fields over the days of the range (default: the last 365 days).
+
+    ``r`` is null with fewer than 3 days or when a field never varies. Pairs with sleep only use logged nights.
+    """
+    names = [name.strip() for name in fields.split(",") if name.strip()] if fields else list(rollup.COLUMNS)
+    indexes = [_field(name) for name in names]
+    range_start, range_end = _range(start, end, 365)
+    rows = [row for _, row in _days(range_start, range_end)]
+    result = []
+    for x, y in combinations(indexes, 2):
+        pairs = [(_number(x, row[x]), _number(y, row[y])) for row in rows if _known(row, x) and _known(row, y)]
+        result.append({"x": rollup.COLUMNS[x], "y": rollup.COLUMNS[y], "days": len(pairs), "r": _pearson(pairs)})
+    return {"start": range_start, "end": range_end, "pairs": result}
+
+
+@router.get("/heatmap")
+def heatmap(field: str = _FIELD_QUERY, year: int | None = Query(default=None, ge=1970, le=9999)) -> dict[str, Any]:
+    """Calendar heatmap of one field for a year (default: this year): non-zero days with a 1-4 intensity level.
+
+    Levels split the year's non-zero values into quartiles; the cut points are returned as ``levels``.
+    """
+    index = _field(field)
+    year = year or date.today().year
+    values = [(day, row[index]) for day, row in _days(date(year, 1, 1), date(year, 12, 31)) if row[index]]
+    ordered = sorted(value for _, value in values)
+    cuts = [ordered[len(ordered) * quarter // 4] for quarter in (1, 2, 3)] if ordered else []
+    return {
+        "field": field,
+        "year": year,
+        "max": _format(index, ordered[-1]) if ordered else None,
+        "levels": [_format(index, cut) for cut in cuts],
+        "days": [
+            {"day": day.isoformat(), "value": _format(index, value), "level": 1 + sum(value > cut for cut in cuts)}
+            for day, value in values
+        ],
+    }
+
+
+@router.post("/rebuild")
+def rebuild_rollup() -> dict[str, int]:
+    """Recompute the rollup from every source's records and archive partitions; active days per source."""
+    return rollup.rebuild()
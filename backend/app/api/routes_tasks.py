@@ -1,14 +1,28 @@
-from datetime import UTC, datetime
-
-from fastapi import APIRouter, HTTPException
-
-from app.core.json_store import read_json, write_json
-from app.schemas.tasks import TaskCreate, TaskOut, TaskUpdate
-
-router = APIRouter(prefix="/tasks", tags=["tasks"])
+from datetime import UTC, date, datetime, timedelta
+
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import ValidationError
+
+from app.core import archive, rollup
+from app.core.recurrence import align, iter_occurrences, occurs_on, validate_rule
+from app.core.repository import Collection
+from app.core.store_io import store_route
+from app.schemas.tasks import (
+    RecurrenceRule,
+    TaskBatchOperation,
+    TaskBatchRequest,
+    TaskBatchResponse,
+    TaskBatchResult,
+    TaskCreate,
+    TaskOccurrenceOut,
+    TaskOccurrencePatch,
+    TaskOut,
+    TaskUpdate,
+)
 
 _TASKS_FILE = "tasks.json"
 _DEFAULT_TASKS: list[dict] = []
+_MAX_WINDOW = timedelta(days=366)
 
 
 def _normalize_status(value: str | None) -> str:
@@ -28,6 +42,17 @@ def _validate_time_range(start_at: datetime | None, end_at: datetime | None, lab
         raise HTTPException(status_code=400, detail=f"{label} end_at must be later than start_at")
 
 
+def _validate_recurrence(recurrence: RecurrenceRule | dict | None, planned_start_at: datetime | None) -> None:
+    if recurrence is None:
+        return
+    if planned_start_at is None:
+        raise HTTPException(status_code=400, detail="recurring task requires planned_start_at")
+    try:
+        validate_rule(RecurrenceRule.model_validate(recurrence))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
 def _normalize_task_row(row: dict) -> TaskOut:
     # Backward-compatible migration from legacy task schema.
     planned_start_at = row.get("planned_start_at")
@@ -54,17 +79,46 @@ def _normalize_task_row(row: dict) -> TaskOut:
         "actual_end_at": row.get("actual_end_at"),
         "completed_at": row.get("completed_at"),
         "note": row.get("note"),
+        "recurrence": row.get("recurrence"),
+        "exceptions": row.get("exceptions") or {},
     }
     return TaskOut.model_validate(normalized)
 
 
+task_store: Collection[list[TaskOut]] = Collection(
+    _TASKS_FILE,
+    _DEFAULT_TASKS,
+    parse=lambda rows: [_normalize_task_row(row) for row in rows],
+    dump=lambda tasks: [task.model_dump(mode="json", by_alias=True) for task in tasks],
+)
+_ROLLUP_COLUMNS = {"done": "tasks_done", "skipped": "tasks_skipped"}
+
+
+def _rollup_rows(task: TaskOut) -> list[rollup.Contribution]:
+    """Finished work per day: a one-off task on the day it was finished, a recurring one per finished occurrence."""
+    if task.recurrence is None:
+        column = _ROLLUP_COLUMNS.get(task.status)
+        finished = task.completed_at or task.actual_end_at or task.planned_end_at or task.planned_start_at
+        return [(rollup.local_date(finished), column, 1)] if column and finished else []
+    rows = []
+    for key, patch in task.exceptions.items():
+        if column := _ROLLUP_COLUMNS.get(patch.status or ""):
+            day = rollup.local_date(patch.completed_at) if patch.completed_at else date.fromisoformat(key)
+            rows.append((day, column, 1))
+    return rows
+
+
+rollup.track("tasks", task_store, tuple(_ROLLUP_COLUMNS.values()), _rollup_rows, archive_name="tasks")
+
+router = APIRouter(prefix="/tasks", tags=["tasks"], route_class=store_route("tasks", task_store))
+
+
 def _load_tasks() -> list[TaskOut]:
-    rows = read_json(_TASKS_FILE, _DEFAULT_TASKS)
-    return [_normalize_task_row(row) for row in rows]
+    return task_store.get()
 
 
 def _save_tasks(tasks: list[TaskOut]) -> None:
-    write_json(_TASKS_FILE, [task.model_dump(mode="json", by_alias=True) for task in tasks])
+    task_store.save(tasks)
 
 
 @router.get("/", response_model=list[TaskOut])
@@ -73,13 +127,84 @@ def list_tasks() -> list[TaskOut]:
     return list(sorted(tasks, key=lambda item: item.planned_start_at or datetime.max))
 
 
-@router.post("/", response_model=TaskOut)
-def create_task(payload: TaskCreate) -> TaskOut:
+def _occurrence_row(task: TaskOut, start: datetime, patch: TaskOccurrencePatch | None) -> TaskOccurrenceOut:
+    duration = task.planned_end_at - task.planned_start_at if task.planned_start_at and task.planned_end_at else None
+    body = task.model_dump(by_alias=True, exclude={"id", "exceptions"})
+    body.update(
+        {
+            "status": "todo",
+            "planned_start_at": start,
+            "planned_end_at": start + duration if duration else None,
+            "actual_start_at": None,
+            "actual_end_at": None,
+            "completed_at": None,
+        }
+    )
+    if patch:
+        overrides = patch.model_dump(exclude_none=True)
+        if "planned_start_at" in overrides and "planned_end_at" not in overrides and duration:
+            overrides["planned_end_at"] = overrides["planned_start_at"] + duration
+        body.update(overrides)
+    body["status"] = _normalize_status(body["status"])
+    return TaskOccurrenceOut(id=task.id, occurrence_date=start.date(), **body)
+
+
+def _expand_series(task: TaskOut, start: datetime, end: datetime) -> list[TaskOccurrenceOut]:
+    anchor = task.planned_start_at
+    window_start, window_end = align(start, anchor), align(end, anchor)
+    rows: list[TaskOccurrenceOut] = []
+    emitted: set[str] = set()
+
+    for occurrence in iter_occurrences(task.recurrence, anchor, start, end):
+        key = occurrence.date().isoformat()
+        emitted.add(key)
+        row = _occurrence_row(task, occurrence, task.exceptions.get(key))
+        if window_start <= align(row.planned_start_at, anchor) < window_end:
+            rows.append(row)
+
+    # Occurrences rescheduled into the window from outside it; exceptions are sparse, so this scan is cheap.
+    for key, patch in task.exceptions.items():
+        if key in emitted or patch.planned_start_at is None:
+            continue
+        if not window_start <= align(patch.planned_start_at, anchor) < window_end:
+            continue
+        occurrence = occurs_on(task.recurrence, anchor, date.fromisoformat(key))
+        if occurrence is not None:
+            rows.append(_occurrence_row(task, occurrence, patch))
+
+    return rows
+
+
+def occurrences_between(tasks: list[TaskOut], start: datetime, end: datetime) -> list[TaskOccurrenceOut]:
+    """Scheduled tasks and expanded recurring occurrences starting in [start, end), earliest first."""
+    rows: list[TaskOccurrenceOut] = []
+    for task in tasks:
+        if task.planned_start_at is None:
+            continue
+        if task.recurrence is not None:
+            rows.extend(_expand_series(task, start, end))
+        elif align(start, task.planned_start_at) <= task.planned_start_at < align(end, task.planned_start_at):
+            rows.append(TaskOccurrenceOut(**task.model_dump(by_alias=True, exclude={"exceptions"})))
+
+    return sorted(rows, key=lambda item: item.planned_start_at.timestamp())
+
+
+@router.get("/occurrences", response_model=list[TaskOccurrenceOut])
+def list_task_occurrences(start: datetime = Query(), end: datetime = Query()) -> list[TaskOccurrenceOut]:
+    end = align(end, start)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be later than start")
+    if end - start > _MAX_WINDOW:
+        raise HTTPException(status_code=400, detail="occurrence window must not exceed 366 days")
+    return occurrences_between(_load_tasks(), start, end)
+
+
+def _apply_create(tasks: list[TaskOut], payload: TaskCreate) -> TaskOut:
     _validate_time_range(payload.planned_start_at, payload.planned_end_at, "planned")
     _validate_time_range(payload.actual_start_at, payload.actual_end_at, "actual")
+    _validate_recurrence(payload.recurrence, payload.planned_start_at)
 
-    tasks = _load_tasks()
-    next_id = max([task.id for task in tasks], default=0) + 1
+    next_id = archive.next_id("tasks", (task.id for task in tasks))
 
     status = _normalize_status(payload.status)
     completed_at = payload.completed_at
@@ -94,18 +219,17 @@ def create_task(payload: TaskCreate) -> TaskOut:
     body["completed_at"] = completed_at
     task = TaskOut(id=next_id, **body)
     tasks.append(task)
-    _save_tasks(tasks)
     return task
 
 
-@router.put("/{task_id}", response_model=TaskOut)
-def update_task(task_id: int, payload: TaskUpdate) -> TaskOut:
-    tasks = _load_tasks()
+def _apply_update(tasks: list[TaskOut], task_id: int, payload: TaskUpdate) -> TaskOut:
+    # List semantics, not a dict by id: a hand-edited file may repeat an id, and every row must survive a save.
     task_index = next((idx for idx, task in enumerate(tasks) if task.id == task_id), None)
     if task_index is None:
         raise HTTPException(status_code=404, detail="task not found")
 
     current = tasks[task_index]
+
     patch = payload.model_dump(exclude_unset=True, by_alias=True)
     if "status" in patch:
         patch["status"] = _normalize_status(patch["status"])
@@ -124,9 +248,68 @@ def update_task(task_id: int, payload: TaskUpdate) -> TaskOut:
 
     _validate_time_range(merged.get("planned_start_at"), merged.get("planned_end_at"), "planned")
     _validate_time_range(merged.get("actual_start_at"), merged.get("actual_end_at"), "actual")
+    _validate_recurrence(merged.get("recurrence"), merged.get("planned_start_at"))
 
     updated = TaskOut.model_validate(merged)
     tasks[task_index] = updated
+    return updated
+
+
+def _apply_delete(tasks: list[TaskOut], task_id: int) -> None:
+    remaining = [task for task in tasks if task.id != task_id]
+    if len(remaining) == len(tasks):
+        raise HTTPException(status_code=404, detail="task not found")
+    tasks[:] = remaining
+
+
+def apply_task_batch(operations: list[TaskBatchOperation]) -> list[TaskBatchResult]:
+    """Apply create/update/delete operations with one load and one write; any failure aborts the whole batch."""
+    tasks = _load_tasks()
+    results: list[TaskBatchResult] = []
+
+    for index, operation in enumerate(operations):
+        try:
+            if operation.op == "create":
+                task = _apply_create(tasks, TaskCreate.model_validate(operation.data or {}))
+                results.append(TaskBatchResult(index=index, op=operation.op, id=task.id, task=task))
+            elif operation.op in {"update", "delete"}:
+                if operation.id is None:
+                    raise HTTPException(status_code=400, detail=f"{operation.op} requires id")
+                if operation.op == "update":
+                    task = _apply_update(tasks, operation.id, TaskUpdate.model_validate(operation.data or {}))
+                    results.append(TaskBatchResult(index=index, op=operation.op, id=task.id, task=task))
+                else:
+                    _apply_delete(tasks, operation.id)
+                    results.append(TaskBatchResult(index=index, op=operation.op, id=operation.id, deleted=True))
+            else:
+                raise HTTPException(status_code=400, detail="op must be create, update or delete")
+        except ValidationError as exc:
+            raise HTTPException(status_code=400, detail=f"operation {index}: {exc}") from exc
+        except HTTPException as exc:
+            raise HTTPException(status_code=exc.status_code, detail=f"operation {index}: {exc.detail}") from exc
+
+    if operations:
+        _save_tasks(tasks)
+    return results
+
+
+@router.post("/", response_model=TaskOut)
+def create_task(payload: TaskCreate) -> TaskOut:
+    tasks = _load_tasks()
+    task = _apply_create(tasks, payload)
+    _save_tasks(tasks)
+    return task
+
+
+@router.post("/batch", response_model=TaskBatchResponse)
+def batch_tasks(payload: TaskBatchRequest) -> TaskBatchResponse:
+    return TaskBatchResponse(results=apply_task_batch(payload.operations))
+
+
+@router.put("/{task_id}", response_model=TaskOut)
+def update_task(task_id: int, payload: TaskUpdate) -> TaskOut:
+    tasks = _load_tasks()
+    updated = _apply_update(tasks, task_id, payload)
     _save_tasks(tasks)
     return updated
 
@@ -134,9 +317,66 @@ def update_task(task_id: int, payload: TaskUpdate) -> TaskOut:
 @router.delete("/{task_id}")
 def delete_task(task_id: int) -> dict[str, int | bool]:
     tasks = _load_tasks()
-    new_tasks = [task for task in tasks if task.id != task_id]
-    if len(new_tasks) == len(tasks):
+    _apply_delete(tasks, task_id)
+    _save_tasks(tasks)
+    return {"deleted": True, "id": task_id}
+
+
+def _find_occurrence(task: TaskOut, occurrence_date: date) -> datetime:
+    if task.recurrence is None or task.planned_start_at is None:
+        raise HTTPException(status_code=400, detail="task is not recurring")
+    occurrence = occurs_on(task.recurrence, task.planned_start_at, occurrence_date)
+    if occurrence is None:
+        raise HTTPException(status_code=404, detail="occurrence not found")
+    return occurrence
+
+
+@router.put("/{task_id}/occurrences/{occurrence_date}", response_model=TaskOccurrenceOut)
+def update_task_occurrence(task_id: int, occurrence_date: date, payload: TaskOccurrencePatch) -> TaskOccurrenceOut:
+    tasks = _load_tasks()
+    task_index = next((idx for idx, task in enumerate(tasks) if task.id == task_id), None)
+    if task_index is None:
         raise HTTPException(status_code=404, detail="task not found")
 
-    _save_tasks(new_tasks)
-    return {"deleted": True, "id": task_id}
+    task = tasks[task_index]
+    occurrence = _find_occurrence(task, occurrence_date)
+    key = occurrence_date.isoformat()
+
+    current = task.exceptions.get(key)
+    patch = current.model_dump(exclude_none=True) if current else {}
+    patch.update(payload.model_dump(exclude_unset=True))
+    if patch.get("status") is not None:
+        patch["status"] = _normalize_status(patch["status"])
+        if patch["status"] == "done":
+            patch["completed_at"] = patch.get("completed_at") or datetime.now(UTC)
+        else:
+            patch["completed_at"] = None
+    override = TaskOccurrencePatch.model_validate({name: value for name, value in patch.items() if value is not None})
+
+    row = _occurrence_row(task, occurrence, override)
+    _validate_time_range(row.planned_start_at, row.planned_end_at, "planned")
+    _validate_time_range(row.actual_start_at, row.actual_end_at, "actual")
+
+    exceptions = dict(task.exceptions)
+    exceptions[key] = override
+    tasks[task_index] = task.model_copy(update={"exceptions": exceptions})
+    _save_tasks(tasks)
+    return row
+
+
+@router.delete("/{task_id}/occurrences/{occurrence_date}")
+def reset_task_occurrence(task_id: int, occurrence_date: date) -> dict[str, int | bool | str]:
+    tasks = _load_tasks()
+    task_index = next((idx for idx, task in enumerate(tasks) if task.id == task_id), None)
+    if task_index is None:
+        raise HTTPException(status_code=404, detail="task not found")
+
+    task = tasks[task_index]
+    key = occurrence_date.isoformat()
+    if key not in task.exceptions:
+        raise HTTPException(status_code=404, detail="occurrence override not found")
+
+    exceptions = {name: value for name, value in task.exceptions.items() if name != key}
+    tasks[task_index] = task.model_copy(update={"exceptions": exceptions})
+    _save_tasks(tasks)
+    return {"deleted": True, "id": task_id, "occurrence_date": key}
@@ -0,0 +1,141 @@
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+
+import httpx
+
+from app.core.config import settings
+
+
+class ProviderError(Exception):
+    """Upstream provider failed or returned an error response."""
+
+
+class ProviderNotConfigured(ProviderError):
+    """Provider is known but has no base URL configured."""
+
+
+class ProviderBusy(ProviderError):
+    """Provider concurrency limit was not released within the request timeout."""
+
+
+@dataclass(frozen=True)
+class ProviderConfig:
+    name: str
+    protocol: str
+    base_url: str | None
+    api_key: str | None
+
+
+def provider_config(name: str) -> ProviderConfig:
+    if name == "codex":
+        return ProviderConfig(name, "openai", settings.ai_codex_base_url, settings.ai_codex_api_key)
+    if name == "openai-compatible":
+        return ProviderConfig(name, "openai", settings.ai_openai_base_url, settings.ai_openai_api_key)
+    if name == "ollama":
+        return ProviderConfig(name, "ollama", settings.ai_ollama_base_url, None)
+    raise ValueError("provider must be codex, openai-compatible or ollama")
+
+
+_client: httpx.AsyncClient | None = None
+_transport: httpx.AsyncBaseTransport | None = None
+_semaphores: dict[str, asyncio.Semaphore] = {}
+
+
+def use_transport(transport: httpx.AsyncBaseTransport | None) -> None:
+    """Route provider traffic through a custom transport, e.g. a local stand-in server in tests."""
+    global _client, _transport
+    _transport = transport
+    _client = None
+
+
+def get_client() -> httpx.AsyncClient:
+    # One pooled keep-alive client shared by every request and provider.
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            transport=_transport,
+            timeout=httpx.Timeout(settings.ai_request_timeout_seconds, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=settings.ai_max_concurrency * 4,
+                max_keepalive_connections=settings.ai_max_concurrency * 2,
+            ),
+        )
+    return _client
+
+
+async def aclose() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _semaphore(provider: str) -> asyncio.Semaphore:
+    semaphore = _semaphores.get(provider)
+    if semaphore is None:
+        semaphore = _semaphores[provider] = asyncio.Semaphore(settings.ai_max_concurrency)
+    return semaphore
+
+
+def _request(config: ProviderConfig, model: str, messages: list[dict[str, str]]) -> tuple[str, dict, dict]:
+    base_url = (config.base_url or "").rstrip("/")
+    headers = {"Authorization": f"Bearer {config.api_key}"} if config.api_key else {}
+    body = {"model": model, "messages": messages, "stream": True}
+    if config.protocol == "ollama":
+        return f"{base_url}/api/chat", body, headers
+    return f"{base_url}/chat/completions", body, headers
+
+
+def _parse_line(protocol: str, line: str) -> tuple[str, bool]:
+    """Return (token, finished) for one streamed line."""
+    if protocol == "ollama":
+        chunk = json.loads(line)
+        return chunk.get("message", {}).get("content", ""), bool(chunk.get("done"))
+
+    if not line.startswith("data:"):
+        return "", False
+    data = line[5:].strip()
+    if data == "[DONE]":
+        return "", True
+    choices = json.loads(data).get("choices") or [{}]
+    return choices[0].get("delta", {}).get("content") or "", False
+
+
+async def stream_chat(provider: str, model: str, messages: list[dict[str, str]]) -> AsyncIterator[str]:
+    """Yield reply tokens from the provider; closing the iterator aborts the upstream request."""
+    config = provider_config(provider)
+    if not config.base_url:
+        raise ProviderNotConfigured(f"provider {provider} is not configured")
+
+    semaphore = _semaphore(provider)
+    try:
+        await asyncio.wait_for(semaphore.acquire(), timeout=settings.ai_request_timeout_seconds)
+    except TimeoutError as exc:
+        raise ProviderBusy(f"provider {provider} is busy") from exc
+
+    try:
+        url, body, headers = _request(config, model, messages)
+        async with get_client().stream("POST", url, json=body, headers=headers) as response:
+            if response.status_code >= 400:
+                detail = (await response.aread()).decode("utf-8", errors="replace")[:200]
+                raise ProviderError(f"provider {provider} returned {response.status_code}: {detail}")
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                token, finished = _parse_line(config.protocol, line)
+                if token:
+                    yield token
+                if finished:
+                    return
+    except httpx.HTTPError as exc:
+        raise ProviderError(f"provider {provider} request failed: {exc}") from exc
+    except json.JSONDecodeError as exc:
+        raise ProviderError(f"provider {provider} sent malformed data") from exc
+    finally:
+        semaphore.release()
+
+
+async def complete_chat(provider: str, model: str, messages: list[dict[str, str]]) -> str:
+    return "".join([token async for token in stream_chat(provider, model, messages)])
@@ -0,0 +1,171 @@
+import gzip
+import json
+import os
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, TypeVar
+
+from app.core import json_store
+from app.core.repository import Collection
+
+T = TypeVar("T")
+
+# Set while archival shrinks a hot file: the rows it drops were moved to a partition, not deleted.
+_moving: ContextVar[bool] = ContextVar("archive_moving", default=False)
+
+
+@contextmanager
+def moving() -> Iterator[None]:
+    token = _moving.set(True)
+    try:
+        yield
+    finally:
+        _moving.reset(token)
+
+
+def is_moving() -> bool:
+    """True inside ``moving``; save hooks use it to tell archived rows from deleted ones (rollup stats)."""
+    return _moving.get()
+
+
+def archive_dir(collection: str) -> Path:
+    return json_store.profile_dir() / "archive" / collection
+
+
+def partition_path(collection: str, year: int) -> Path:
+    return archive_dir(collection) / f"{year}.json.gz"
+
+
+def partitions(collection: str) -> list[int]:
+    directory = archive_dir(collection)
+    if not directory.exists():
+        return []
+    return sorted(int(path.name.split(".", 1)[0]) for path in directory.glob("*.json.gz"))
+
+
+@lru_cache(maxsize=32)
+def _read_cached(path: str, mtime_ns: int) -> tuple[dict[str, Any], ...]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return tuple(json.load(f))
+
+
+def read_partition(collection: str, year: int) -> list[dict[str, Any]]:
+    """Archived rows of one year in their on-disk JSON form; empty when nothing was archived for it."""
+    path = partition_path(collection, year)
+    try:
+        mtime_ns = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return []
+    return list(_read_cached(str(path), mtime_ns))
+
+
+def _max_id_path(collection: str) -> Path:
+    return archive_dir(collection) / "max_id.json"
+
+
+def _write_max_id(collection: str, value: int) -> None:
+    path = _max_id_path(collection)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(value), encoding="utf-8")
+    tmp_path.replace(path)
+
+
+def max_archived_id(collection: str) -> int:
+    """Highest id ever moved to ``collection``'s partitions (0 when none), kept in ``max_id.json``."""
+    try:
+        return int(json.loads(_max_id_path(collection).read_text(encoding="utf-8")))
+    except FileNotFoundError:
+        pass
+    # Partitions written before the mark was kept: scan them once and remember the result.
+    highest = max((row["id"] for year in partitions(collection) for row in read_partition(collection, year)), default=0)
+    if highest:
+        _write_max_id(collection, highest)
+    return highest
+
+
+def next_id(collection: str, ids: Iterable[int]) -> int:
+    """Id for a new row: above every hot id and every archived one.
+
+    Taking only the hot maximum would hand out ids of archived rows again once archival has removed the
+    newest ones, and the next archive pass would then meet two different rows with the same id.
+    """
+    return max(max(ids, default=0), max_archived_id(collection)) + 1
+
+
+def merge_partition(collection: str, year: int, rows: list[dict[str, Any]]) -> int:
+    """Add rows to a year partition; returns the partition size.
+
+    Merging by id makes a re-run after an interrupted archive pass harmless: rows that reached the
+    partition but were not yet removed from the hot file are written once, not twice. A different row
+    under an id already archived is refused with ``ValueError`` instead of overwriting the archived one.
+    """
+    merged = {row["id"]: row for row in read_partition(collection, year)}
+    conflicts = sorted(row["id"] for row in rows if row["id"] in merged and merged[row["id"]] != row)
+    if conflicts:
+        raise ValueError(
+            f"{collection}/{year}: archived rows with ids {conflicts[:10]} differ from the rows being archived; "
+            "not overwriting them"
+        )
+    merged.update((row["id"], row) for row in rows)
+    ordered = sorted(merged.values(), key=lambda row: row["id"])
+    path = partition_path(collection, year)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump(ordered, f, ensure_ascii=False)
+    tmp_path.replace(path)
+    if ordered[-1]["id"] > max_archived_id(collection):
+        _write_max_id(collection, ordered[-1]["id"])
+    return len(ordered)
+
+
+def archive_list(
+    store: Collection[list[T]],
+    collection: str,
+    year_of: Callable[[T], int | None],
+    moved_out: Callable[[list[T]], None] | None = None,
+) -> dict[int, int]:
+    """Move rows for which ``year_of`` returns a year out of a list collection into year partitions.
+
+    Partitions are written before the hot file shrinks, so a crash in between leaves rows in both
+    places (cleaned up by the next run) and never in neither. ``moved_out`` is called with the moved
+    rows once the hot file no longer has them (to drop derived state such as search documents).
+    Returns moved row counts per year.
+    """
+    store.rw.acquire_write()
+    try:
+        rows = store.get()
+        moved: dict[int, list[T]] = defaultdict(list)
+        keep: list[T] = []
+        for row in rows:
+            year = year_of(row)
+            (keep if year is None else moved[year]).append(row)
+        if not moved:
+            return {}
+        for year, items in moved.items():
+            merge_partition(collection, year, store.dump(items))
+        with moving():
+            store.save(keep)
+        if moved_out is not None:
+            moved_out([row for items in moved.values() for row in items])
+        return {year: len(items) for year, items in sorted(moved.items())}
+    finally:
+        store.rw.release_write()
+
+
+def stats() -> dict[str, dict[str, int]]:
+    root = json_store.profile_dir() / "archive"
+    if not root.exists():
+        return {}
+    return {
+        directory.name: {
+            str(year): partition_path(directory.name, year).stat().st_size for year in partitions(directory.name)
+        }
+        for directory in sorted(root.iterdir())
+        if directory.is_dir()
+    }
@@ -0,0 +1,339 @@
+import atexit
+import gzip
+import itertools
+import json
+import os
+import queue
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from pathlib import Path
+from threading import Lock, Thread
+from typing import IO, Any
+
+from app.core.config import settings
+from app.core.json_store import DATA_DIR, current_profile
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore[assignment]
+    import msvcrt
+
+_STOP = object()
+
+
+@contextmanager
+def _process_lock(path: Path) -> Iterator[None]:
+    """Exclusive lock on ``path`` across processes: the API and the MCP server write the same audit directory."""
+    with path.open("a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _stat_key(path: Path) -> tuple[int, int, int] | None:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def _parse_line(line: str) -> dict[str, Any] | None:
+    # A reader in another process may see the writer's last line half-written.
+    try:
+        return json.loads(line) if line.strip() else None
+    except json.JSONDecodeError:
+        return None
+
+
+def _event_time(event_id: str) -> float | None:
+    # Ids start with the hex nanosecond timestamp, so an id lookup only needs the segment covering it.
+    try:
+        return int(event_id.split("-", 1)[0], 16) / 1e9
+    except ValueError:
+        return None
+
+
+class AuditLog:
+    """JSON Lines audit trail written by a background thread.
+
+    Events go through a bounded queue and are appended in batches to ``current.jsonl``. The current
+    segment is rotated by size or age into ``segments/*.jsonl.gz`` and recorded in ``index.json``
+    with its time range and tool names, so queries open only the segments that can match.
+
+    Other processes append to and rotate the same files, so appends, rotation and index updates hold
+    ``audit.lock`` (an OS file lock). The summary of ``current.jsonl`` is kept up to date by reading only
+    the bytes appended since it was last read, whoever appended them.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        max_segment_bytes: int,
+        max_segment_seconds: float,
+        queue_size: int,
+        flush_interval: float,
+    ) -> None:
+        self.root = root
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_seconds = max_segment_seconds
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread: Thread | None = None
+        self._start_lock = Lock()
+        self._counter = itertools.count()
+        # Summary of current.jsonl: (file inode, index.json stat, bytes read, segment).
+        self._scanned: tuple[int | None, tuple[int, int, int] | None, int, dict[str, Any] | None] = (None, None, 0, None)
+        self._scan_lock = Lock()
+        self.dropped = 0
+        self.written = 0
+
+    @property
+    def current_path(self) -> Path:
+        return self.root / "current.jsonl"
+
+    @property
+    def index_path(self) -> Path:
+        return self.root / "index.json"
+
+    def _locked(self) -> Any:
+        self.root.mkdir(parents=True, exist_ok=True)
+        return _process_lock(self.root / "audit.lock")
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = Thread(target=self._run, name="audit-log-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def append(self, tool: str, payload: dict[str, Any]) -> str:
+        now_ns = time.time_ns()
+        event_id = f"{now_ns:x}-{os.getpid():x}-{next(self._counter)}"
+        event = {
+            "id": event_id,
+            "time": datetime.fromtimestamp(now_ns / 1e9, UTC).isoformat(),
+            "ts": now_ns / 1e9,
+            "tool": tool,
+            "profile": current_profile(),
+            "payload": payload,
+        }
+        self._ensure_started()
+        try:
+            # Brief back-pressure, then drop rather than stall tool calls on a wedged disk.
+            self._queue.put(event, timeout=0.5)
+        except queue.Full:
+            self.dropped += 1
+        return event_id
+
+    def flush(self) -> None:
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout=5)
+        self._thread = None
+
+    def _read_index(self) -> list[dict[str, Any]]:
+        if not self.index_path.exists():
+            return []
+        return json.loads(self.index_path.read_text(encoding="utf-8"))
+
+    def _scan_current(self) -> dict[str, Any] | None:
+        """Summary of ``current.jsonl`` (None when empty), reading only what was appended since the last call.
+
+        Call with the process lock held. A rotation always rewrites ``index.json``, so a changed index (or
+        inode) means the file was replaced and is read from the start.
+        """
+        with self._scan_lock:
+            try:
+                stat = self.current_path.stat()
+            except FileNotFoundError:
+                self._scanned = (None, None, 0, None)
+                return None
+            inode, index_key, offset, segment = self._scanned
+            if inode != stat.st_ino or index_key != _stat_key(self.index_path) or stat.st_size < offset:
+                offset, segment = 0, None
+            if stat.st_size > offset:
+                with self.current_path.open("rb") as f:
+                    f.seek(offset)
+                    data = f.read(stat.st_size - offset)
+                # Stop after the last complete line; the rest is read once its writer finishes it.
+                complete = data.rfind(b"\n") + 1
+                for line in data[:complete].decode("utf-8").splitlines():
+                    event = _parse_line(line)
+                    if event is not None:
+                        segment = self._track(segment, event)
+                offset += complete
+            self._scanned = (stat.st_ino, _stat_key(self.index_path), offset, segment)
+            return None if segment is None else {**segment, "tools": list(segment["tools"])}
+
+    @staticmethod
+    def _track(segment: dict[str, Any] | None, event: dict[str, Any]) -> dict[str, Any]:
+        if segment is None:
+            segment = {"start": event["ts"], "end": event["ts"], "count": 0, "tools": []}
+        segment["end"] = max(segment["end"], event["ts"])
+        segment["count"] += 1
+        if event["tool"] not in segment["tools"]:
+            segment["tools"].append(event["tool"])
+        return segment
+
+    def _rotate(self, segment: dict[str, Any]) -> None:
+        # Called with the process lock held, so no other process appends or rotates meanwhile.
+        segments_dir = self.root / "segments"
+        segments_dir.mkdir(parents=True, exist_ok=True)
+        name = f"{int(segment['start'] * 1000)}-{int(segment['end'] * 1000)}.jsonl.gz"
+        with self.current_path.open("rb") as src, gzip.open(segments_dir / name, "wb") as dst:
+            dst.write(src.read())
+        self.current_path.unlink()
+
+        index = self._read_index()
+        index.append({**segment, "file": f"segments/{name}"})
+        tmp_path = self.index_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(index, ensure_ascii=False), encoding="utf-8")
+        tmp_path.replace(self.index_path)
+        with self._scan_lock:
+            self._scanned = (None, None, 0, None)
+
+    def _write_batch(self, events: list[dict[str, Any]]) -> None:
+        lines = "".join(json.dumps(event, ensure_ascii=False) + "\n" for event in events)
+        with self._locked():
+            with self.current_path.open("a", encoding="utf-8") as f:
+                f.write(lines)
+                size = f.tell()
+            self.written += len(events)
+            segment = self._scan_current()
+            if segment is None:
+                return
+            if size >= self.max_segment_bytes or time.time() - segment["start"] >= self.max_segment_seconds:
+                self._rotate(segment)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = [first]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = any(event is _STOP for event in batch)
+            events = [event for event in batch if event is not _STOP]
+            try:
+                if events:
+                    self._write_batch(events)
+            except OSError:
+                self.dropped += len(events)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def query(
+        self,
+        tool: str | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        event_id: str | None = None,
+        limit: int = 100,
+        profile: str | None = None,
+    ) -> list[dict[str, Any]]:
+        """Return matching events newest first, reading only segments whose range and tools can match.
+
+        The log is shared by all profiles; ``profile`` limits results to one (events written before
+        profiles existed belong to the default profile).
+        """
+        self.flush()
+        start_ts = start.timestamp() if start else float("-inf")
+        end_ts = end.timestamp() if end else float("inf")
+        if event_id is not None:
+            id_ts = _event_time(event_id)
+            if id_ts is None:
+                return []
+            # Ids carry the writer's timestamp; allow for rounding in the stored float seconds.
+            start_ts, end_ts = max(start_ts, id_ts - 1), min(end_ts, id_ts + 1)
+
+        def candidate(segment: dict[str, Any]) -> bool:
+            if segment["end"] < start_ts or segment["start"] > end_ts:
+                return False
+            return tool is None or tool in segment["tools"]
+
+        sources: list[tuple[float, Path | IO[str]]] = []
+        with self._locked():
+            current = self._scan_current()
+            if current is not None and candidate(current):
+                # Opened under the lock: a rotation by another process after this point unlinks the path
+                # but leaves the open file readable, and its events are not yet in the index read below.
+                sources.append((current["end"], self.current_path.open("r", encoding="utf-8")))
+            index = self._read_index()
+        for segment in index:
+            if candidate(segment):
+                sources.append((segment["end"], self.root / segment["file"]))
+
+        rows: list[dict[str, Any]] = []
+        try:
+            for _, source in sorted(sources, key=lambda item: item[0], reverse=True):
+                matched: list[dict[str, Any]] = []
+                f = gzip.open(source, "rt", encoding="utf-8") if isinstance(source, Path) else source
+                with f:
+                    for line in f:
+                        event = _parse_line(line)
+                        if event is None:
+                            continue
+                        if not start_ts <= event["ts"] <= end_ts:
+                            continue
+                        if tool is not None and event["tool"] != tool:
+                            continue
+                        if event_id is not None and event["id"] != event_id:
+                            continue
+                        if profile is not None and event.get("profile", settings.default_profile) != profile:
+                            continue
+                        matched.append(event)
+                rows.extend(reversed(matched))
+                if len(rows) >= limit:
+                    break
+        finally:
+            for _, source in sources:
+                if not isinstance(source, Path):
+                    source.close()
+        return rows[:limit]
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "segments": len(self._read_index()),
+        }
+
+
+audit_log = AuditLog(
+    DATA_DIR / "audit",
+    max_segment_bytes=settings.audit_max_segment_bytes,
+    max_segment_seconds=settings.audit_max_segment_seconds,
+    queue_size=settings.audit_queue_size,
+    flush_interval=settings.audit_flush_interval_seconds,
+)
@@ -0,0 +1,361 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import time
+import zlib
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from threading import Lock
+from typing import Any
+
+from app.core import json_store
+from app.core.config import settings
+from app.core.pagination import time_value
+
+try:
+    import zstandard
+except ImportError:  # optional; gzip is always available
+    zstandard = None
+
+# Chunks younger than this are never garbage-collected, so a backup running in another process can
+# still reference a chunk it has just written (or re-used) but not yet recorded in its manifest.
+_GC_GRACE_SECONDS = 3600
+_CODEC_SUFFIX = {"zstd": ".zst", "gzip": ".gz"}
+
+_lock = Lock()
+
+
+def backup_root() -> Path:
+    return Path(settings.backup_dir) if settings.backup_dir else json_store.BASE_DIR.parent / "backup"
+
+
+def _codec() -> str:
+    if settings.backup_codec == "zstd" and zstandard is None:
+        raise ValueError("BACKUP_CODEC=zstd requires the zstandard package")
+    if settings.backup_codec in _CODEC_SUFFIX:
+        return settings.backup_codec
+    return "zstd" if zstandard is not None else "gzip"
+
+
+def split_chunks(data: bytes, target: int) -> list[tuple[int, int]]:
+    """Content-defined (start, end) chunk ranges, cut only at line ends.
+
+    A line ends a chunk when its CRC falls below a threshold proportional to its length, so chunks
+    average ``target`` bytes whatever the line length. Boundaries depend only on nearby content:
+    an edit early in a pretty-printed JSON file moves the cuts around it, not every cut after it.
+    """
+    min_size, max_size = target // 4, target * 4
+    scale = (1 << 32) / max(target - min_size, 1)
+    view = memoryview(data)
+    ranges: list[tuple[int, int]] = []
+    start, size = 0, len(data)
+    while start < size:
+        limit = min(start + max_size, size)
+        cut = None
+        pos = data.find(b"\n", min(start + min_size, size), limit)
+        while pos != -1:
+            line_start = data.rfind(b"\n", start, pos) + 1
+            if zlib.crc32(view[line_start : pos + 1]) < (pos + 1 - line_start) * scale:
+                cut = pos + 1
+                break
+            pos = data.find(b"\n", pos + 1, limit)
+        if cut is None:
+            # No content boundary within max_size: break at the last line end, or hard at the limit.
+            last = data.rfind(b"\n", start, limit)
+            cut = size if limit == size else (last + 1 if last >= start + min_size else limit)
+        ranges.append((start, cut))
+        start = cut
+    return ranges
+
+
+def _chunk_path(root: Path, digest: str, codec: str) -> Path:
+    return root / "chunks" / digest[:2] / f"{digest}{_CODEC_SUFFIX[codec]}"
+
+
+def _find_chunk(root: Path, digest: str) -> Path | None:
+    for codec in _CODEC_SUFFIX:
+        path = _chunk_path(root, digest, codec)
+        if path.exists():
+            return path
+    return None
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=settings.backup_zstd_level).compress(data)
+    return gzip.compress(data, compresslevel=settings.backup_gzip_level, mtime=0)
+
+
+def _decompress(path: Path) -> bytes:
+    raw = path.read_bytes()
+    if path.suffix == ".zst":
+        if zstandard is None:
+            raise ValueError(f"chunk {path.name} is zstd-compressed; install zstandard to restore it")
+        return zstandard.ZstdDecompressor().decompress(raw)
+    return gzip.decompress(raw)
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(data)
+    tmp_path.replace(path)
+
+
+def _store_file(rel: str) -> tuple[str, str] | None:
+    # Collection files (top level, or top level of a profile directory) are rewritten in place by
+    # json_store, so they are copied under its lock. Returns (profile, file name).
+    parts = rel.split("/")
+    if not parts[-1].endswith(".json"):
+        return None
+    if len(parts) == 1:
+        return settings.default_profile, parts[0]
+    if len(parts) == 3 and parts[0] == json_store.PROFILES_DIR.name:
+        return parts[1], parts[2]
+    return None
+
+
+@contextmanager
+def _locked_store_file(profile: str, name: str) -> Iterator[Path]:
+    with json_store.use_profile(profile), json_store.locked(name) as path:
+        yield path
+
+
+def _read_file(data_dir: Path, rel: str) -> tuple[bytes, os.stat_result]:
+    store_file = _store_file(rel)
+    if store_file is not None and data_dir == json_store.DATA_DIR:
+        with _locked_store_file(*store_file) as path:
+            return path.read_bytes(), path.stat()
+    path = data_dir / rel
+    return path.read_bytes(), path.stat()
+
+
+def _data_files(data_dir: Path) -> list[str]:
+    return sorted(
+        path.relative_to(data_dir).as_posix()
+        for path in data_dir.rglob("*")
+        if path.is_file() and not path.name.endswith(".tmp")
+    )
+
+
+def _manifests(root: Path) -> list[Path]:
+    snapshots = root / "snapshots"
+    return sorted(snapshots.glob("*.json")) if snapshots.exists() else []
+
+
+def _load_manifest(path: Path) -> dict[str, Any]:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def create_snapshot(full: bool = False) -> dict[str, Any]:
+    """Back up DATA_DIR as a new snapshot; returns its summary.
+
+    Files whose size and mtime match the previous snapshot reuse its chunk list without being read,
+    and chunks already in the store are not written again, so a backup costs time and space in
+    proportion to what changed. ``full`` re-reads every file (chunks still deduplicate).
+    """
+    with _lock:
+        started = time.perf_counter()
+        root = backup_root()
+        data_dir = json_store.DATA_DIR
+        codec = _codec()
+        manifests = _manifests(root)
+        previous = _load_manifest(manifests[-1])["files"] if manifests and not full else {}
+
+        files: dict[str, dict[str, Any]] = {}
+        stats = {"files": 0, "changed_files": 0, "bytes_scanned": 0, "new_chunks": 0, "bytes_stored": 0}
+        for rel in _data_files(data_dir):
+            stat = (data_dir / rel).stat()
+            prior = previous.get(rel)
+            if prior and prior["size"] == stat.st_size and prior["mtime_ns"] == stat.st_mtime_ns:
+                if all(_find_chunk(root, digest) for digest in prior["chunks"]):
+                    files[rel] = prior
+                    continue
+
+            data, stat = _read_file(data_dir, rel)
+            chunks: list[str] = []
+            for start, end in split_chunks(data, settings.backup_chunk_bytes):
+                piece = data[start:end]
+                digest = hashlib.sha256(piece).hexdigest()
+                chunks.append(digest)
+                existing = _find_chunk(root, digest)
+                if existing is not None:
+                    # Refresh the mtime so a concurrent prune treats the re-used chunk as live.
+                    os.utime(existing)
+                    continue
+                stored = _compress(piece, codec)
+                _write_atomic(_chunk_path(root, digest, codec), stored)
+                stats["new_chunks"] += 1
+                stats["bytes_stored"] += len(stored)
+            files[rel] = {
+                "size": len(data),
+                "mtime_ns": stat.st_mtime_ns,
+                "sha256": hashlib.sha256(data).hexdigest(),
+                "chunks": chunks,
+            }
+            stats["changed_files"] += 1
+            stats["bytes_scanned"] += len(data)
+
+        now = datetime.now(UTC)
+        snapshot_id = now.strftime("%Y%m%dT%H%M%S%fZ")
+        stats["files"] = len(files)
+        stats["chunks"] = sum(len(entry["chunks"]) for entry in files.values())
+        stats["seconds"] = round(time.perf_counter() - started, 3)
+        manifest = {"id": snapshot_id, "created_at": now.isoformat(), "codec": codec, "stats": stats, "files": files}
+        _write_atomic(root / "snapshots" / f"{snapshot_id}.json", json.dumps(manifest, ensure_ascii=False).encode("utf-8"))
+        return _summary(manifest)
+
+
+def _summary(manifest: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "id": manifest["id"],
+        "created_at": manifest["created_at"],
+        "size": sum(entry["size"] for entry in manifest["files"].values()),
+        **manifest["stats"],
+    }
+
+
+def list_snapshots() -> list[dict[str, Any]]:
+    """Snapshot summaries, newest first."""
+    return [_summary(_load_manifest(path)) for path in reversed(_manifests(backup_root()))]
+
+
+def _resolve(snapshot_id: str | None, at: datetime | None) -> dict[str, Any]:
+    manifests = _manifests(backup_root())
+    if snapshot_id is not None:
+        path = next((path for path in manifests if path.stem == snapshot_id), None)
+        if path is None:
+            raise LookupError(f"snapshot {snapshot_id} not found")
+        return _load_manifest(path)
+    for path in reversed(manifests):
+        manifest = _load_manifest(path)
+        if at is None or time_value(datetime.fromisoformat(manifest["created_at"])) <= time_value(at):
+            return manifest
+    raise LookupError("no snapshot at or before the requested time" if at else "no snapshots yet")
+
+
+def _assemble(root: Path, rel: str, entry: dict[str, Any]) -> bytes:
+    parts: list[bytes] = []
+    for digest in entry["chunks"]:
+        path = _find_chunk(root, digest)
+        if path is None:
+            raise ValueError(f"{rel}: chunk {digest} is missing from the backup store")
+        parts.append(_decompress(path))
+    data = b"".join(parts)
+    if hashlib.sha256(data).hexdigest() != entry["sha256"]:
+        raise ValueError(f"{rel}: restored content does not match the snapshot checksum")
+    return data
+
+
+def restore_snapshot(
+    snapshot_id: str | None = None,
+    at: datetime | None = None,
+    target: Path | None = None,
+    files: list[str] | None = None,
+) -> dict[str, Any]:
+    """Restore a snapshot (by id, or the latest at/before ``at``) into ``target`` (default: DATA_DIR).
+
+    Every file is rebuilt and checksummed before anything is written. Files present now but absent
+    from the snapshot are left alone. Restoring into DATA_DIR replaces collection files under their
+    store locks; cached collections reload on their next read.
+    """
+    with _lock:
+        root = backup_root()
+        manifest = _resolve(snapshot_id, at)
+        selected = files if files else list(manifest["files"])
+        unknown = [rel for rel in selected if rel not in manifest["files"]]
+        if unknown:
+            raise LookupError(f"not in snapshot {manifest['id']}: {', '.join(unknown)}")
+
+        contents = {rel: _assemble(root, rel, manifest["files"][rel]) for rel in selected}
+        data_dir = target or json_store.DATA_DIR
+        for rel, data in contents.items():
+            store_file = _store_file(rel)
+            if store_file is not None and data_dir == json_store.DATA_DIR:
+                with _locked_store_file(*store_file) as path:
+                    _write_atomic(path, data)
+            else:
+                _write_atomic(data_dir / rel, data)
+        return {"snapshot": manifest["id"], "target": str(data_dir), "files": len(contents), "bytes": sum(map(len, contents.values()))}
+
+
+def prune_snapshots(keep_last: int | None = None, keep_daily: int | None = None) -> dict[str, Any]:
+    """Drop snapshots outside the retention policy, then delete chunks no remaining snapshot uses.
+
+    Kept: the newest ``keep_last`` snapshots, plus the newest snapshot of each of the last
+    ``keep_daily`` days.
+    """
+    keep_last = settings.backup_keep_last if keep_last is None else keep_last
+    keep_daily = settings.backup_keep_daily if keep_daily is None else keep_daily
+    with _lock:
+        root = backup_root()
+        manifests = list(reversed(_manifests(root)))
+        keep = {path.stem for path in manifests[: max(keep_last, 0)]}
+        cutoff = (datetime.now(UTC) - timedelta(days=keep_daily)).strftime("%Y%m%d")
+        seen_days: set[str] = set()
+        for path in manifests:
+            day = path.stem[:8]
+            if day >= cutoff and day not in seen_days:
+                seen_days.add(day)
+                keep.add(path.stem)
+
+        removed = [path.stem for path in manifests if path.stem not in keep]
+        for path in manifests:
+            if path.stem not in keep:
+                path.unlink()
+
+        live: set[str] = set()
+        for path in _manifests(root):
+            for entry in _load_manifest(path)["files"].values():
+                live.update(entry["chunks"])
+        chunks_removed = bytes_freed = 0
+        grace = time.time() - _GC_GRACE_SECONDS
+        chunk_dir = root / "chunks"
+        for path in chunk_dir.rglob("*") if chunk_dir.exists() else ():
+            if not path.is_file() or path.name.split(".", 1)[0] in live:
+                continue
+            stat = path.stat()
+            if stat.st_mtime > grace:
+                continue
+            path.unlink()
+            chunks_removed += 1
+            bytes_freed += stat.st_size
+        return {"kept": len(keep), "removed": removed, "chunks_removed": chunks_removed, "bytes_freed": bytes_freed}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Incremental, deduplicated backups of the data directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    create = commands.add_parser("create", help="take a snapshot")
+    create.add_argument("--full", action="store_true", help="re-read every file instead of trusting size/mtime")
+    commands.add_parser("list", help="list snapshots, newest first")
+    restore = commands.add_parser("restore", help="restore a snapshot")
+    restore.add_argument("snapshot", nargs="?", help="snapshot id (default: latest, or latest before --at)")
+    restore.add_argument("--at", type=datetime.fromisoformat, help="point in time (ISO 8601, naive = UTC)")
+    restore.add_argument("--target", type=Path, help="directory to restore into (default: the live data directory)")
+    restore.add_argument("--file", action="append", dest="files", help="restore only this file (repeatable)")
+    prune = commands.add_parser("prune", help="apply retention and delete unreferenced chunks")
+    prune.add_argument("--keep-last", type=int, default=None)
+    prune.add_argument("--keep-daily", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.command == "create":
+        result: Any = create_snapshot(full=args.full)
+    elif args.command == "list":
+        result = list_snapshots()
+    elif args.command == "restore":
+        try:
+            result = restore_snapshot(args.snapshot, args.at, args.target, args.files)
+        except (LookupError, ValueError) as exc:
+            parser.exit(1, f"restore failed: {exc}\n")
+    else:
+        result = prune_snapshots(args.keep_last, args.keep_daily)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+import asyncio
+import time
+from collections import deque
+from collections.abc import Iterable
+from threading import Lock
+from typing import Any
+
+from pydantic import BaseModel
+
+from app.core import json_store, metrics
+from app.core.config import settings
+
+# (op, id, kind): op is create/update/delete; id None means the whole collection (or ``kind`` part) changed.
+Change = tuple[str, int | None, str | None]
+
+_lock = Lock()
+_buffer: deque[dict[str, Any]] = deque(maxlen=max(1, settings.changes_buffer_size))
+# Versions start at wall-clock microseconds, so they keep increasing across restarts and a resume token
+# from before a restart is recognized as out of range instead of silently matching new events.
+_version = time.time_ns() // 1000
+# Newest version that fell out of the replay buffer; resuming from before it needs a full reload.
+_evicted_through = _version
+_subscribers: set["Subscription"] = set()
+_enabled = False
+_collections: dict[str, Any] = {}
+
+
+def enable() -> None:
+    """Start publishing; only the API process does, the MCP server's writes are seen by ``poll``."""
+    global _enabled
+    _enabled = True
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def register(topic: str, store: Any) -> None:
+    _collections[topic] = store
+
+
+def topics() -> list[str]:
+    return sorted(_collections)
+
+
+def current_version() -> int:
+    return _version
+
+
+def _row_changes(old: list[Any], new: list[Any], kind: str | None) -> list[Change]:
+    if not all(hasattr(row, "id") for row in (*old, *new)):
+        return [] if old == new else [("update", None, kind)]
+    before = {row.id: row for row in old}
+    changes: list[Change] = []
+    for row in new:
+        previous = before.pop(row.id, None)
+        if previous is None:
+            changes.append(("create", row.id, kind))
+        elif previous is not row and previous != row:
+            changes.append(("update", row.id, kind))
+    changes.extend(("delete", row_id, kind) for row_id in before)
+    return changes
+
+
+def diff(old: Any, new: Any) -> list[Change]:
+    """Row-level changes between two values of a collection (a list of records, a dict of lists, or a model)."""
+    if old is None:
+        return [("update", None, None)]
+    if isinstance(old, list) and isinstance(new, list):
+        return _row_changes(old, new, None)
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes: list[Change] = []
+        for key in sorted(old.keys() | new.keys()):
+            before, after = old.get(key), new.get(key)
+            if isinstance(before, list) and isinstance(after, list):
+                changes.extend(_row_changes(before, after, key))
+            elif before != after:
+                changes.append(("update", None, key))
+        return changes
+    if isinstance(old, BaseModel) and old == new:
+        return []
+    return [] if old is new else [("update", None, None)]
+
+
+def publish(topic: str, changes: Iterable[Change]) -> None:
+    """Record changes of ``topic`` in the current profile and wake matching subscribers (any thread)."""
+    global _version, _evicted_through
+    if not _enabled:
+        return
+    profile = json_store.current_profile()
+    with _lock:
+        events = []
+        for op, row_id, kind in changes:
+            _version += 1
+            event = {"version": _version, "collection": topic, "op": op, "id": row_id}
+            if kind is not None:
+                event["kind"] = kind
+            if len(_buffer) == _buffer.maxlen:
+                _evicted_through = _buffer[0]["event"]["version"]
+            _buffer.append({"profile": profile, "event": event})
+            events.append(event)
+        subscribers = [sub for sub in _subscribers if sub.profile == profile and topic in sub.topics]
+    if not events:
+        return
+    metrics.inc("change_events_total", (topic,), len(events))
+    for subscriber in subscribers:
+        subscriber.deliver(events)
+
+
+class Subscription:
+    """One client's change stream: a bounded queue fed from any thread, drained on the event loop.
+
+    ``reset`` means events were missed (resume token out of range or a slow consumer overflowed the
+    queue); the client should refetch the collections and continue from the version it is given.
+    """
+
+    def __init__(self, profile: str, topics: set[str], loop: asyncio.AbstractEventLoop) -> None:
+        self.profile = profile
+        self.topics = topics
+        self._loop = loop
+        self._queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize=max(1, settings.changes_queue_size))
+        self.reset = False
+
+    def deliver(self, events: list[dict[str, Any]]) -> None:
+        self._loop.call_soon_threadsafe(self._put, events)
+
+    def _put(self, events: list[dict[str, Any]]) -> None:
+        for event in events:
+            if self.reset:
+                return
+            try:
+                self._queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self.reset = True
+
+    async def next(self, timeout: float) -> dict[str, Any] | None:
+        """Next event, a reset marker, or None after ``timeout`` seconds without one (send a heartbeat)."""
+        if self.reset:
+            self.reset = False
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            metrics.inc("change_resets_total", ())
+            return {"reset": True, "version": _version}
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except TimeoutError:
+            return None
+
+
+def subscribe(topics: set[str], since: int | None) -> Subscription:
+    """Register a subscriber for the current profile, first queueing buffered events after ``since``."""
+    profile = json_store.current_profile()
+    subscription = Subscription(profile, topics, asyncio.get_running_loop())
+    with _lock:
+        if since is not None:
+            if since < _evicted_through or since > _version:
+                subscription.reset = True
+            else:
+                subscription._put(
+                    [
+                        row["event"]
+                        for row in _buffer
+                        if row["event"]["version"] > since and row["profile"] == profile and row["event"]["collection"] in topics
+                    ]
+                )
+        _subscribers.add(subscription)
+    return subscription
+
+
+def unsubscribe(subscription: Subscription) -> None:
+    with _lock:
+        _subscribers.discard(subscription)
+
+
+def recent(topics: set[str], since: int | None) -> dict[str, Any]:
+    """Buffered events after ``since`` for the current profile, for clients that poll this instead of a list."""
+    profile = json_store.current_profile()
+    with _lock:
+        reset = since is not None and (since < _evicted_through or since > _version)
+        events = [
+            row["event"]
+            for row in _buffer
+            if not reset
+            and since is not None
+            and row["event"]["version"] > since
+            and row["profile"] == profile
+            and row["event"]["collection"] in topics
+        ]
+        return {"version": _version, "reset": reset, "events": events}
+
+
+def watched() -> dict[str, set[str]]:
+    """Profile -> collections that at least one live subscriber listens to."""
+    with _lock:
+        result: dict[str, set[str]] = {}
+        for subscription in _subscribers:
+            result.setdefault(subscription.profile, set()).update(subscription.topics)
+        return result
+
+
+def _refresh(profile: str, topic: str) -> None:
+    with json_store.use_profile(profile):
+        _collections[topic].refresh()
+
+
+async def poll_forever() -> None:
+    """Re-stat the files subscribers listen to, so writes by other processes (the MCP server) are published.
+
+    A changed file is reloaded and diffed against the warm value by ``Collection.refresh``; in-process
+    writes are published directly by ``Collection.save`` and never wait for this loop.
+    """
+    while True:
+        await asyncio.sleep(settings.changes_poll_seconds)
+        for profile, names in watched().items():
+            for topic in names & _collections.keys():
+                try:
+                    await asyncio.to_thread(_refresh, profile, topic)
+                except Exception:  # noqa: BLE001 - a corrupt file must not stop the watcher
+                    metrics.inc("change_poll_errors_total", (topic,))
+
+
+def stats() -> dict[str, Any]:
+    with _lock:
+        return {
+            "version": _version,
+            "buffered": len(_buffer),
+            "buffer_size": _buffer.maxlen,
+            "oldest_resumable": _evicted_through,
+            "subscribers": len(_subscribers),
+        }
+
+
+metrics.describe("change_events_total", "counter", "Change events published.", ("collection",))
+metrics.describe("change_resets_total", "counter", "Change streams told to reload after missing events.")
+metrics.describe("change_poll_errors_total", "counter", "Failed re-reads of watched collection files.", ("collection",))
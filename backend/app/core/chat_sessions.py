@@ -0,0 +1,233 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from threading import Lock
+
+# Rough per-turn bookkeeping cost on top of the text itself (dict, strings, list slot).
+_TURN_OVERHEAD_BYTES = 200
+_SESSION_OVERHEAD_BYTES = 400
+
+
+def estimate_tokens(text: str) -> int:
+    # ~3 UTF-8 bytes per token covers both CJK (1 char/token) and ASCII (3-4 chars/token) well enough.
+    return len(text.encode("utf-8")) // 3 + 1
+
+
+@dataclass
+class ChatSession:
+    session_id: str
+    summary: str = ""
+    turns: list[dict[str, str]] = field(default_factory=list)
+    last_used: float = field(default_factory=time.time)
+
+    def footprint(self) -> int:
+        text_bytes = len(self.summary.encode("utf-8")) + sum(len(turn["content"].encode("utf-8")) for turn in self.turns)
+        return _SESSION_OVERHEAD_BYTES + text_bytes + _TURN_OVERHEAD_BYTES * len(self.turns)
+
+    def to_row(self) -> dict:
+        return {"session_id": self.session_id, "summary": self.summary, "turns": self.turns, "last_used": self.last_used}
+
+
+class SessionStore:
+    """Chat histories kept under a global byte budget.
+
+    Each session keeps its most recent turns within a token budget; older turns are folded into a
+    short rolling summary. Least recently used sessions are spilled to disk when the resident total
+    exceeds the budget or when they sit idle, and are loaded back transparently on the next lookup.
+    """
+
+    def __init__(
+        self,
+        spill_dir: Path,
+        max_resident_bytes: int,
+        history_tokens: int,
+        summary_tokens: int,
+        idle_seconds: float,
+    ) -> None:
+        self.spill_dir = spill_dir
+        self.max_resident_bytes = max_resident_bytes
+        self.history_tokens = history_tokens
+        self.summary_tokens = summary_tokens
+        self.idle_seconds = idle_seconds
+        self._resident: OrderedDict[str, ChatSession] = OrderedDict()
+        self._sizes: dict[str, int] = {}
+        self._spilled: set[str] | None = None
+        self._spilling: dict[str, ChatSession] = {}
+        self._resident_bytes = 0
+        self._lock = Lock()
+        # Held across spill writes and disk loads (taken before _lock), so they never interleave.
+        self._spill_lock = Lock()
+        self.spills = 0
+        self.loads = 0
+
+    def _file(self, session_id: str) -> Path:
+        return self.spill_dir / f"{hashlib.sha256(session_id.encode('utf-8')).hexdigest()[:32]}.json"
+
+    def _spilled_names(self) -> set[str]:
+        # Filenames of spilled sessions, scanned once so later lookups are a set probe, not a stat.
+        if self._spilled is None:
+            self._spilled = {path.name for path in self.spill_dir.glob("*.json")} if self.spill_dir.exists() else set()
+        return self._spilled
+
+    def _track(self, session: ChatSession) -> None:
+        size = session.footprint()
+        self._resident_bytes += size - self._sizes.get(session.session_id, 0)
+        self._sizes[session.session_id] = size
+        self._resident[session.session_id] = session
+        self._resident.move_to_end(session.session_id)
+
+    def _untrack(self, session_id: str) -> ChatSession:
+        session = self._resident.pop(session_id)
+        self._resident_bytes -= self._sizes.pop(session_id)
+        return session
+
+    def _collect_victims(self) -> list[ChatSession]:
+        victims: list[ChatSession] = []
+        idle_before = time.time() - self.idle_seconds
+        # The most recently used session is the one being served; it stays even if it alone is over budget.
+        while len(self._resident) > 1:
+            oldest_id, oldest = next(iter(self._resident.items()))
+            if self._resident_bytes <= self.max_resident_bytes and oldest.last_used >= idle_before:
+                break
+            victims.append(self._untrack(oldest_id))
+        for session in victims:
+            self._spilling[session.session_id] = session
+        return victims
+
+    def _spill(self, victims: list[ChatSession]) -> None:
+        if not victims:
+            return
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        with self._spill_lock:
+            for session in victims:
+                path = self._file(session.session_id)
+                with self._lock:
+                    if self._spilling.get(session.session_id) is not session:
+                        continue  # picked up again before its write; it is resident
+                    # Snapshot under the lock; turns may be appended once it is picked up again.
+                    row = {**session.to_row(), "turns": list(session.turns)}
+                path.write_text(json.dumps(row, ensure_ascii=False), encoding="utf-8")
+                with self._lock:
+                    if self._spilling.get(session.session_id) is session and session.to_row() == row:
+                        del self._spilling[session.session_id]
+                        self._spilled_names().add(path.name)
+                        self.spills += 1
+                    elif session.session_id not in self._spilling:
+                        # Picked up while being written: resident again, and the file may already be stale.
+                        path.unlink(missing_ok=True)
+                    # Otherwise picked up, changed and picked as a victim again: that later spill writes it.
+
+    def _resume_locked(self, session_id: str) -> ChatSession | None:
+        session = self._resident.get(session_id)
+        if session is not None:
+            self._resident.move_to_end(session_id)
+            return session
+        session = self._spilling.pop(session_id, None)
+        if session is not None:
+            # Picked up again while its spill write is still pending; the spill then leaves it alone.
+            self._track(session)
+        return session
+
+    def get(self, session_id: str) -> ChatSession | None:
+        path = self._file(session_id)
+        with self._lock:
+            session = self._resume_locked(session_id)
+            if session is not None or path.name not in self._spilled_names():
+                return session
+
+        # No spill writes while the lock is held, so a file still marked spilled is the session's latest state.
+        with self._spill_lock:
+            with self._lock:
+                session = self._resume_locked(session_id)
+                if session is not None or path.name not in self._spilled_names():
+                    return session
+            try:
+                row = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                return None
+            with self._lock:
+                session = ChatSession(**row)
+                self._track(session)
+                self._spilled_names().discard(path.name)
+                path.unlink(missing_ok=True)
+                self.loads += 1
+                victims = self._collect_victims()
+        self._spill(victims)
+        return session
+
+    def get_or_create(self, session_id: str) -> ChatSession:
+        session = self.get(session_id)
+        if session is not None:
+            return session
+        with self._lock:
+            session = self._resident.get(session_id)
+            if session is None:
+                session = ChatSession(session_id=session_id)
+                self._track(session)
+            return session
+
+    def build_messages(self, session: ChatSession, prompt: str) -> list[dict[str, str]]:
+        with self._lock:
+            messages = [{"role": "system", "content": f"Conversation so far: {session.summary}"}] if session.summary else []
+            messages.extend(dict(turn) for turn in session.turns)
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
+    def _trim(self, session: ChatSession) -> None:
+        used = sum(estimate_tokens(turn["content"]) for turn in session.turns)
+        dropped: list[dict[str, str]] = []
+        while len(session.turns) > 2 and used > self.history_tokens:
+            turn = session.turns.pop(0)
+            used -= estimate_tokens(turn["content"])
+            dropped.append(turn)
+        if not dropped:
+            return
+
+        # Extractive rolling summary: first line of each dropped turn, capped to the summary budget.
+        notes = [f"{turn['role']}: {turn['content'].strip().splitlines()[0][:120]}" for turn in dropped if turn["content"].strip()]
+        summary = "; ".join([session.summary, *notes]) if session.summary else "; ".join(notes)
+        max_bytes = self.summary_tokens * 3
+        encoded = summary.encode("utf-8")
+        if len(encoded) > max_bytes:
+            summary = "..." + encoded[-max_bytes:].decode("utf-8", errors="ignore")
+        session.summary = summary
+
+    def append_turn(self, session_id: str, prompt: str, reply: str) -> ChatSession:
+        while True:
+            session = self.get_or_create(session_id)
+            with self._lock:
+                if self._spilling.get(session_id) is session:
+                    # Taken as a spill victim since get_or_create: keep it resident; the spill leaves it alone.
+                    del self._spilling[session_id]
+                elif self._resident.get(session_id) is not session:
+                    continue  # spilled (and maybe loaded back as another object) meanwhile: look it up again
+                session.turns.append({"role": "user", "content": prompt})
+                session.turns.append({"role": "assistant", "content": reply})
+                session.last_used = time.time()
+                self._trim(session)
+                self._track(session)
+                victims = self._collect_victims()
+                break
+        self._spill(victims)
+        return session
+
+    def spill_all(self) -> None:
+        with self._lock:
+            victims = [self._untrack(session_id) for session_id in list(self._resident)]
+            for session in victims:
+                self._spilling[session.session_id] = session
+        self._spill(victims)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "resident_sessions": len(self._resident),
+                "resident_bytes": self._resident_bytes,
+                "max_resident_bytes": self.max_resident_bytes,
+                "spilled_sessions": len(self._spilled_names()),
+                "spills": self.spills,
+                "loads": self.loads,
+            }
@@ -12,6 +12,90 @@ class Settings(BaseSettings):
     ai_default_provider: str = "codex"
     ai_codex_base_url: str | None = None
     ai_codex_api_key: str | None = None
+    ai_openai_base_url: str | None = None
+    ai_openai_api_key: str | None = None
+    ai_ollama_base_url: str | None = None
+    ai_request_timeout_seconds: float = 60.0
+    ai_max_concurrency: int = 4
+    ai_cache_max_entries: int = 512
+    ai_cache_ttl_seconds: float = 3600.0
+    ai_cache_disk: bool = False
+    ai_session_history_tokens: int = 2000
+    ai_session_summary_tokens: int = 300
+    ai_session_max_resident_bytes: int = 64 * 1024 * 1024
+    ai_session_idle_seconds: float = 900.0
+
+    # Local semantic search: hashed n-gram vectors, or a sentence-transformers model name if installed.
+    search_dim: int = 512
+    search_model: str | None = None
+
+    # Store I/O for HTTP routes: dedicated worker pool and per-collection admission limit.
+    store_io_workers: int = 16
+    store_max_in_flight: int = 32
+    store_retry_after_seconds: int = 1
+
+    # Sampling profiler middleware; not installed at all unless enabled.
+    profiling_enabled: bool = False
+    profile_sample_rate: float = 0.0
+    profile_interval_ms: float = 5.0
+    profile_max_stacks: int = 2000
+
+    # Response encoding: serialize trusted store results in the worker, compress large bodies (br needs `brotli`).
+    response_fast_path: bool = True
+    response_compress_min_bytes: int = 1024
+    response_gzip_level: int = 6
+    response_brotli_quality: int = 4
+
+    # Snapshots of the data directory: content-defined chunks, deduplicated and compressed (zstd needs `zstandard`).
+    backup_dir: str | None = None
+    backup_codec: str = "auto"
+    backup_chunk_bytes: int = 64 * 1024
+    backup_gzip_level: int = 6
+    backup_zstd_level: int = 6
+    backup_keep_last: int = 7
+    backup_keep_daily: int = 30
+
+    # Cold-tier archival horizons: finished tasks, feed items and sleep logs older than N days; transactions
+    # outside the current N calendar years. Archived rows move to data/archive/<collection>/<year>.json.gz.
+    archive_task_days: int = 90
+    archive_feed_days: int = 365
+    archive_sleep_days: int = 365
+    archive_transaction_keep_years: int = 1
+
+    # Startup: warm these collections in the background (readiness at /health/ready); import rarely used
+    # routers (ai, search, audit, archive, admin) on first use instead of at import time.
+    warmup_enabled: bool = True
+    warmup_collections: str = "settings,tasks,feed,sleep,assets,knowledge"
+    lazy_routers: bool = True
+
+    # Profiles: one notebook per profile, selected by the X-Data-Profile header (HTTP) or per MCP session. The
+    # default profile lives in data/, the others in data/profiles/<name>/. Warm collections of idle profiles
+    # are evicted least recently used first once their files add up to more than the budget (0 = no limit).
+    default_profile: str = "default"
+    profile_cache_budget_bytes: int = 256 * 1024 * 1024
+
+    # Change feed (/changes): replay buffer for resuming streams, per-client queue, and how often files that
+    # subscribers watch are re-checked for writes by other processes (the MCP server).
+    changes_buffer_size: int = 10000
+    changes_queue_size: int = 1000
+    changes_poll_seconds: float = 0.5
+    changes_heartbeat_seconds: float = 15.0
+
+    mcp_transport: str = "stdio"
+    mcp_host: str = "127.0.0.1"
+    mcp_port: int = 8001
+    mcp_max_concurrency: int = 8
+    # Profile for MCP sessions that have not picked one with the profile_use tool (None = default profile).
+    mcp_profile: str | None = None
+
+    audit_max_segment_bytes: int = 8 * 1024 * 1024
+    audit_max_segment_seconds: float = 86400.0
+    audit_queue_size: int = 10000
+    audit_flush_interval_seconds: float = 1.0
+
+    # Batch parse requests at or above this many lines fan out to a process pool (0 workers = CPU count).
+    ai_parse_pool_threshold: int = 20000
+    ai_parse_pool_workers: int = 0
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
@@ -1,27 +1,92 @@
 ﻿import json
+import re
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
 from threading import Lock
 from typing import Any
 
+from app.core import metrics
+from app.core.config import settings
+
 BASE_DIR = Path(__file__).resolve().parents[2]
 DATA_DIR = BASE_DIR / "data"
 DATA_DIR.mkdir(parents=True, exist_ok=True)
+# Every profile other than the default one keeps its files in DATA_DIR/profiles/<profile>/.
+PROFILES_DIR = DATA_DIR / "profiles"
+
+_PROFILE_NAME = re.compile(r"[A-Za-z0-9][A-Za-z0-9_.-]{0,63}")
+_profile: ContextVar[str | None] = ContextVar("profile", default=None)
+_created_dirs: set[Path] = {DATA_DIR}
+
+_LOCKS_GUARD = Lock()
+_FILE_LOCKS: dict[Path, Lock] = {}
+
+
+def valid_profile(name: str) -> bool:
+    return _PROFILE_NAME.fullmatch(name) is not None
+
+
+def current_profile() -> str:
+    return _profile.get() or settings.default_profile
+
+
+@contextmanager
+def use_profile(profile: str | None) -> Iterator[str]:
+    """Route store access in this context (and store workers started from it) to ``profile``."""
+    if profile and not valid_profile(profile):
+        raise ValueError(f"invalid profile name: {profile!r}")
+    token = _profile.set(profile or None)
+    try:
+        yield current_profile()
+    finally:
+        _profile.reset(token)
 
-_STORE_LOCK = Lock()
+
+def profile_dir(profile: str | None = None) -> Path:
+    profile = profile or current_profile()
+    directory = DATA_DIR if profile == settings.default_profile else PROFILES_DIR / profile
+    if directory not in _created_dirs:
+        directory.mkdir(parents=True, exist_ok=True)
+        _created_dirs.add(directory)
+    return directory
 
 
 def _path(name: str) -> Path:
-    return DATA_DIR / name
+    return profile_dir() / name
+
+
+def _file_lock(path: Path) -> Lock:
+    # One lock per file, so a slow write to one collection (or profile) never blocks reads of another.
+    lock = _FILE_LOCKS.get(path)
+    if lock is None:
+        with _LOCKS_GUARD:
+            lock = _FILE_LOCKS.setdefault(path, Lock())
+    return lock
+
+
+def _acquire(name: str) -> Lock:
+    lock = _file_lock(_path(name))
+    started = time.perf_counter()
+    lock.acquire()
+    metrics.observe("store_lock_wait_seconds", (Path(name).stem,), time.perf_counter() - started)
+    return lock
 
 
 def read_json(name: str, default: Any) -> Any:
     file_path = _path(name)
-    with _STORE_LOCK:
+    collection = (Path(name).stem,)
+    lock = _acquire(name)
+    started = time.perf_counter()
+    try:
         if not file_path.exists():
             file_path.write_text(json.dumps(default, ensure_ascii=False, indent=2), encoding="utf-8")
             return default
 
         raw_bytes = file_path.read_bytes()
+        metrics.inc("store_read_bytes_total", collection, len(raw_bytes))
         had_bom = raw_bytes.startswith(b"\xef\xbb\xbf")
         raw = raw_bytes.decode("utf-8-sig")
 
@@ -36,9 +101,40 @@ def read_json(name: str, default: Any) -> Any:
             file_path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
 
         return data
+    finally:
+        lock.release()
+        metrics.observe("store_read_seconds", collection, time.perf_counter() - started)
 
 
 def write_json(name: str, data: Any) -> None:
     file_path = _path(name)
-    with _STORE_LOCK:
-        file_path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    collection = (Path(name).stem,)
+    # Serialize before taking the lock; only the file write itself needs to be exclusive.
+    encoded = json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+    lock = _acquire(name)
+    started = time.perf_counter()
+    try:
+        file_path.write_bytes(encoded)
+    finally:
+        lock.release()
+        metrics.observe("store_write_seconds", collection, time.perf_counter() - started)
+    metrics.inc("store_write_bytes_total", collection, len(encoded))
+
+
+def file_signature(name: str) -> tuple[int, int, int] | None:
+    """(inode, size, mtime_ns) of a data file, or None when missing; changes whenever the file is rewritten."""
+    try:
+        stat = _path(name).stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+@contextmanager
+def locked(name: str) -> Iterator[Path]:
+    """Hold a data file's lock while copying or replacing it outside read_json/write_json (backups)."""
+    lock = _acquire(name)
+    try:
+        yield _path(name)
+    finally:
+        lock.release()
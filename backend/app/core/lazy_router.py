@@ -0,0 +1,73 @@
+import asyncio
+import importlib
+from threading import Lock
+from typing import Any
+
+from fastapi import APIRouter, FastAPI
+from starlette.routing import BaseRoute, Match, NoMatchFound
+from starlette.types import Receive, Scope, Send
+
+
+class LazyRouter(BaseRoute):
+    """Placeholder route for a router module that is imported on first use.
+
+    Matches every path under ``prefix``. The first request (or ``load_async()`` from the warm-up task)
+    imports ``module`` in a worker thread, then, back on the event loop, includes its ``router`` into the
+    app and removes the placeholder; the request is then dispatched again so it reaches the real route.
+    Until loaded, the routes are missing from OpenAPI.
+    """
+
+    def __init__(self, app: FastAPI, prefix: str, module: str) -> None:
+        self.app = app
+        self.prefix = prefix
+        self.module = module
+        self.loaded = False
+        self._lock = Lock()
+
+    def matches(self, scope: Scope) -> tuple[Match, Scope]:
+        if scope["type"] in ("http", "websocket"):
+            path = scope["path"]
+            if path == self.prefix or path.startswith(self.prefix + "/"):
+                return Match.FULL, {}
+        return Match.NONE, {}
+
+    def url_path_for(self, name: str, /, **path_params: Any) -> Any:
+        raise NoMatchFound(name, path_params)
+
+    def _import(self) -> APIRouter:
+        with self._lock:
+            return importlib.import_module(self.module).router
+
+    def _install(self, router: APIRouter) -> None:
+        # Only on the thread that dispatches requests (or before serving), so matching never sees a half swap.
+        if self.loaded:
+            return
+        self.app.include_router(router)
+        self.app.router.routes = [route for route in self.app.router.routes if route is not self]
+        self.app.openapi_schema = None
+        self.loaded = True
+
+    def load(self) -> None:
+        """Import and install in the calling thread; for startup, before requests are served."""
+        self._install(self._import())
+
+    async def load_async(self) -> None:
+        if not self.loaded:
+            # Importing runs module-level code (schemas, numpy); keep it off the event loop.
+            router = await asyncio.to_thread(self._import)
+            self._install(router)
+
+    def wait(self) -> None:
+        """Block until a load running in another thread has finished (or failed)."""
+        with self._lock:
+            pass
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.load_async()
+        await self.app.router(scope, receive, send)
+
+
+def include_lazy(app: FastAPI, prefix: str, module: str) -> LazyRouter:
+    placeholder = LazyRouter(app, prefix, module)
+    app.router.routes.append(placeholder)
+    return placeholder
@@ -0,0 +1,231 @@
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+from typing import Any
+
+# Upper bounds in seconds; the final implicit bucket is +Inf.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = tuple[str, ...]
+Sample = tuple[str, dict[str, str], float]
+
+
+class _Shard:
+    """Counters and histograms written by one thread only, so updates need no lock."""
+
+    __slots__ = ("counters", "histograms")
+
+    def __init__(self) -> None:
+        self.counters: dict[tuple[str, Labels], float] = {}
+        # Per key: one count per bucket (+Inf last), followed by the running sum.
+        self.histograms: dict[tuple[str, Labels], list[float]] = {}
+
+
+_families: dict[str, tuple[str, str, tuple[str, ...]]] = {}
+_collectors: list[Callable[[], Iterable[Sample]]] = []
+_local = threading.local()
+_shards: list[_Shard] = []
+_shards_lock = threading.Lock()
+
+
+def describe(name: str, kind: str, help_text: str, label_names: tuple[str, ...] = ()) -> None:
+    _families[name] = (kind, help_text, label_names)
+
+
+def register_collector(collect: Callable[[], Iterable[Sample]]) -> None:
+    """Add a callback producing (name, labels, value) gauge samples at scrape time, e.g. cache stats."""
+    _collectors.append(collect)
+
+
+def _shard() -> _Shard:
+    shard = getattr(_local, "shard", None)
+    if shard is None:
+        shard = _local.shard = _Shard()
+        with _shards_lock:
+            _shards.append(shard)
+    return shard
+
+
+def inc(name: str, labels: Labels = (), value: float = 1.0) -> None:
+    counters = _shard().counters
+    key = (name, labels)
+    counters[key] = counters.get(key, 0.0) + value
+
+
+def observe(name: str, labels: Labels, value: float) -> None:
+    histograms = _shard().histograms
+    key = (name, labels)
+    row = histograms.get(key)
+    if row is None:
+        row = histograms[key] = [0.0] * (len(LATENCY_BUCKETS) + 2)
+    row[bisect_left(LATENCY_BUCKETS, value)] += 1
+    row[-1] += value
+
+
+class timer:
+    """``with timer("name", labels): ...`` observes the block's wall time."""
+
+    __slots__ = ("name", "labels", "started")
+
+    def __init__(self, name: str, labels: Labels = ()) -> None:
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self) -> "timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        observe(self.name, self.labels, time.perf_counter() - self.started)
+
+
+def _merged() -> tuple[dict[tuple[str, Labels], float], dict[tuple[str, Labels], list[float]]]:
+    with _shards_lock:
+        shards = list(_shards)
+    counters: dict[tuple[str, Labels], float] = {}
+    histograms: dict[tuple[str, Labels], list[float]] = {}
+    for shard in shards:
+        # dict.copy() is atomic under the GIL, so the owning thread may keep writing meanwhile.
+        for key, value in shard.counters.copy().items():
+            counters[key] = counters.get(key, 0.0) + value
+        for key, row in shard.histograms.copy().items():
+            total = histograms.setdefault(key, [0.0] * len(row))
+            for index, value in enumerate(row):
+                total[index] += value
+    return counters, histograms
+
+
+def _collected() -> list[Sample]:
+    samples: list[Sample] = []
+    for collect in _collectors:
+        samples.extend(collect())
+    return samples
+
+
+def _label_text(names: tuple[str, ...], values: Labels, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=False)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render_prometheus() -> str:
+    """Prometheus text exposition format (version 0.0.4)."""
+    counters, histograms = _merged()
+    by_family: dict[str, list[str]] = {}
+
+    for (name, labels), value in sorted(counters.items()):
+        names = _families.get(name, ("counter", "", ()))[2]
+        by_family.setdefault(name, []).append(f"{name}{_label_text(names, labels)} {_format_value(value)}")
+
+    for (name, labels), row in sorted(histograms.items()):
+        names = _families.get(name, ("histogram", "", ()))[2]
+        lines = by_family.setdefault(name, [])
+        cumulative = 0.0
+        for bound, count in zip((*LATENCY_BUCKETS, float("inf")), row[:-1], strict=True):
+            cumulative += count
+            le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+            lines.append(f"{name}_bucket{_label_text(names, labels, le)} {_format_value(cumulative)}")
+        lines.append(f"{name}_sum{_label_text(names, labels)} {_format_value(row[-1])}")
+        lines.append(f"{name}_count{_label_text(names, labels)} {_format_value(cumulative)}")
+
+    for name, labels, value in _collected():
+        label_text = "{" + ",".join(f'{key}="{_escape(item)}"' for key, item in labels.items()) + "}" if labels else ""
+        by_family.setdefault(name, []).append(f"{name}{label_text} {_format_value(value)}")
+
+    out: list[str] = []
+    for name in sorted(by_family):
+        kind, help_text, _ = _families.get(name, ("untyped", "", ()))
+        if help_text:
+            out.append(f"# HELP {name} {help_text}")
+        out.append(f"# TYPE {name} {kind}")
+        out.extend(by_family[name])
+    return "\n".join(out) + "\n"
+
+
+def _quantile(row: list[float], count: float, q: float) -> float | None:
+    # Bucket upper bound containing the q-th observation; +Inf reports the largest finite bound.
+    if not count:
+        return None
+    rank = q * count
+    cumulative = 0.0
+    for bound, bucket in zip(LATENCY_BUCKETS, row, strict=False):
+        cumulative += bucket
+        if cumulative >= rank:
+            return bound
+    return LATENCY_BUCKETS[-1]
+
+
+def summary() -> dict[str, Any]:
+    """Compact JSON view: counter totals and histogram count/avg/p50/p95/p99 per label set."""
+    counters, histograms = _merged()
+    result: dict[str, Any] = {}
+    for (name, labels), value in sorted(counters.items()):
+        names = _families.get(name, ("counter", "", ()))[2]
+        result.setdefault(name, []).append({**dict(zip(names, labels, strict=False)), "value": value})
+    for (name, labels), row in sorted(histograms.items()):
+        names = _families.get(name, ("histogram", "", ()))[2]
+        count = sum(row[:-1])
+        result.setdefault(name, []).append(
+            {
+                **dict(zip(names, labels, strict=False)),
+                "count": int(count),
+                "avg": round(row[-1] / count, 6) if count else None,
+                "p50": _quantile(row, count, 0.5),
+                "p95": _quantile(row, count, 0.95),
+                "p99": _quantile(row, count, 0.99),
+            }
+        )
+    for name, labels, value in _collected():
+        result.setdefault(name, []).append({**labels, "value": value})
+    return result
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request latency by route template, method and status.
+
+    Works on the raw ASGI channel so streaming responses pass through untouched and are timed to completion.
+    """
+
+    def __init__(self, app: Callable) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message: dict) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            # Route templates keep label cardinality bounded; unmatched paths share one label.
+            path = getattr(route, "path", "unmatched")
+            observe("http_request_duration_seconds", (scope["method"], path, str(status)), time.perf_counter() - started)
+
+
+describe("http_request_duration_seconds", "histogram", "HTTP request latency.", ("method", "route", "status"))
+describe("store_read_seconds", "histogram", "JSON store read duration per collection.", ("collection",))
+describe("store_write_seconds", "histogram", "JSON store write duration per collection.", ("collection",))
+describe("store_lock_wait_seconds", "histogram", "Time spent waiting for a store file lock.", ("collection",))
+describe("store_read_bytes_total", "counter", "Bytes read from the JSON store.", ("collection",))
+describe("store_write_bytes_total", "counter", "Bytes written to the JSON store.", ("collection",))
+describe("mcp_tool_duration_seconds", "histogram", "MCP tool call latency including queueing.", ("tool", "outcome"))
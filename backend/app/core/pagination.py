@@ -0,0 +1,102 @@
+import base64
+import binascii
+import json
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+from datetime import UTC, datetime
+from typing import Any, Generic, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar("T")
+SortKey = tuple[float, int]
+# (value, id, n): n counts earlier rows with the same value and id, so each row has its own key even when a
+# hand-edited file repeats an id. Cursors carry it, and a page boundary between such rows skips neither.
+RowKey = tuple[float, int, int]
+
+
+def time_value(value: datetime) -> float:
+    # Stored timestamps mix naive (UTC) and aware values; compare them all as UTC epoch seconds.
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=UTC)
+    return value.timestamp()
+
+
+class SortedIndex(Generic[T]):
+    """Rows sorted ascending by a unique (value, id, n) key, so a page boundary or lower bound is one bisect away."""
+
+    def __init__(self, name: str, rows: Iterable[T], key: Callable[[T], SortKey | None]) -> None:
+        self.name = name
+        seen: dict[SortKey, int] = {}
+        keyed: list[tuple[RowKey, T]] = []
+        for row in rows:
+            sort_key = key(row)
+            if sort_key is not None:
+                # Numbered in stored order, which a rebuild after an unrelated change keeps.
+                n = seen[sort_key] = seen.get(sort_key, -1) + 1
+                keyed.append(((*sort_key, n), row))
+        keyed.sort(key=lambda pair: pair[0])
+        self.keys: list[RowKey] = [row_key for row_key, _ in keyed]
+        self.rows: list[T] = [row for _, row in keyed]
+
+    def page_desc(
+        self,
+        limit: int,
+        after: RowKey | None = None,
+        since: float | None = None,
+        predicate: Callable[[T], bool] | None = None,
+    ) -> tuple[list[T], RowKey | None]:
+        """Newest-first page strictly below ``after`` and at or above ``since``; returns (rows, next cursor key)."""
+        hi = bisect_left(self.keys, after) if after is not None else len(self.keys)
+        lo = bisect_left(self.keys, (since, float("-inf"))) if since is not None else 0
+        rows: list[T] = []
+        position = hi - 1
+        last = None
+        while position >= lo and len(rows) < limit:
+            row = self.rows[position]
+            if predicate is None or predicate(row):
+                rows.append(row)
+                last = position
+            position -= 1
+
+        # Report a next page only when another matching row exists, so the final page returns no cursor.
+        while position >= lo and predicate is not None and not predicate(self.rows[position]):
+            position -= 1
+        if last is None or position < lo:
+            return rows, None
+        return rows, self.keys[last]
+
+
+def encode_cursor(index_name: str, key: RowKey) -> str:
+    raw = json.dumps([index_name, *key], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, index_name: str) -> RowKey:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        # Cursors issued before rows were numbered have no n; they meant the first row of that value and id.
+        name, value, row_id, *rest = json.loads(raw)
+        n = int(rest[0]) if rest else 0
+    except (binascii.Error, ValueError, TypeError, IndexError) as exc:
+        raise ValueError("invalid cursor") from exc
+    if name != index_name:
+        raise ValueError("cursor belongs to a different listing; start again without it")
+    return float(value), int(row_id), n
+
+
+def parse_fields(fields: str | None, model: type[BaseModel]) -> set[str] | None:
+    """Map a comma-separated list of output field names (aliases allowed) to model field names."""
+    if not fields:
+        return None
+    names = {info.alias or name: name for name, info in model.model_fields.items()}
+    names.update({name: name for name in model.model_fields})
+    requested = [item.strip() for item in fields.split(",") if item.strip()]
+    unknown = [item for item in requested if item not in names]
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)}; available: {', '.join(sorted(names))}")
+    return {names[item] for item in requested}
+
+
+def project(row: BaseModel, include: set[str] | None) -> dict[str, Any]:
+    return row.model_dump(mode="json", by_alias=True, include=include)
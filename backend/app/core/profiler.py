@@ -0,0 +1,171 @@
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from types import FrameType
+from typing import Any
+from urllib.parse import parse_qs
+
+from app.core.config import settings
+
+_MAX_DEPTH = 128
+# Frames the event loop sits in while idle; samples ending here are waiting, not work.
+_IDLE_FRAMES = ("select (selectors.py", "_run_once (base_events.py", "poll (selectors.py")
+
+
+class _Session:
+    """Stacks sampled from the threads serving one profiled request."""
+
+    def __init__(self) -> None:
+        self.threads: Counter[int] = Counter()
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+
+
+_current: ContextVar[_Session | None] = ContextVar("profile_session", default=None)
+_sessions: set[_Session] = set()
+_lock = threading.Lock()
+_sampler: threading.Thread | None = None
+_profiles: dict[str, Counter[str]] = {}
+_requests: Counter[str] = Counter()
+
+
+def current() -> _Session | None:
+    return _current.get()
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _collapse(frame: FrameType | None) -> str | None:
+    labels: list[str] = []
+    while frame is not None and len(labels) < _MAX_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    if not labels or labels[0].startswith(_IDLE_FRAMES):
+        return None
+    return ";".join(reversed(labels))
+
+
+def _sample_loop() -> None:
+    global _sampler
+    interval = max(settings.profile_interval_ms, 0.5) / 1000
+    while True:
+        with _lock:
+            sessions = list(_sessions)
+            if not sessions:
+                _sampler = None
+                return
+        frames = sys._current_frames()
+        for session in sessions:
+            for ident in list(session.threads):
+                stack = _collapse(frames.get(ident))
+                if stack is not None:
+                    session.stacks[stack] += 1
+                    session.samples += 1
+        del frames
+        time.sleep(interval)
+
+
+def _start(session: _Session) -> None:
+    global _sampler
+    with _lock:
+        _sessions.add(session)
+        if _sampler is None:
+            _sampler = threading.Thread(target=_sample_loop, name="profile-sampler", daemon=True)
+            _sampler.start()
+
+
+def _finish(session: _Session, route: str) -> None:
+    with _lock:
+        _sessions.discard(session)
+        profile = _profiles.setdefault(route, Counter())
+        profile.update(session.stacks)
+        _requests[route] += 1
+        # Keep memory bounded: drop the rarest stacks once a route has too many distinct ones.
+        if len(profile) > settings.profile_max_stacks:
+            _profiles[route] = Counter(dict(profile.most_common(settings.profile_max_stacks)))
+
+
+@contextmanager
+def attached(session: _Session) -> Iterator[None]:
+    """Include the calling thread in the session's samples (used by store worker threads)."""
+    ident = threading.get_ident()
+    session.threads[ident] += 1
+    try:
+        yield
+    finally:
+        session.threads[ident] -= 1
+        if session.threads[ident] <= 0:
+            del session.threads[ident]
+
+
+def run_attached(session: _Session, func: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Any:
+    with attached(session):
+        return func(*args, **kwargs)
+
+
+def _wants_profile(scope: dict) -> bool:
+    for name, value in scope.get("headers", ()):
+        if name == b"x-profile":
+            return value not in (b"0", b"false")
+    query = scope.get("query_string", b"")
+    # Substring check first, so requests without the parameter skip parsing.
+    if b"profile=" in query and "1" in parse_qs(query.decode("latin-1")).get("profile", ()):
+        return True
+    return settings.profile_sample_rate > 0 and random.random() < settings.profile_sample_rate
+
+
+class ProfilingMiddleware:
+    """Sample stacks for requests opted in via ``X-Profile: 1`` / ``?profile=1`` or the sample rate.
+
+    Only installed when profiling is enabled, so the normal request path is untouched otherwise.
+    """
+
+    def __init__(self, app: Callable) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or not _wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        session = _Session()
+        token = _current.set(session)
+        # The event loop thread runs async handlers; store workers attach themselves via run_store.
+        session.threads[threading.get_ident()] += 1
+        _start(session)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current.reset(token)
+            _finish(session, getattr(scope.get("route"), "path", "unmatched"))
+
+
+def summary() -> list[dict[str, Any]]:
+    with _lock:
+        return [
+            {"route": route, "requests": _requests[route], "samples": sum(stacks.values()), "stacks": len(stacks)}
+            for route, stacks in sorted(_profiles.items())
+        ]
+
+
+def collapsed(route: str | None = None) -> str:
+    """Collapsed stack lines ("frame;frame;frame count"), as read by flamegraph.pl and speedscope."""
+    with _lock:
+        selected = [(name, stacks) for name, stacks in _profiles.items() if route is None or name == route]
+        lines = [f"{stack} {count}" for _, stacks in selected for stack, count in stacks.most_common()]
+    return "\n".join(lines) + ("\n" if lines else "")
+
+
+def clear() -> None:
+    with _lock:
+        _profiles.clear()
+        _requests.clear()
@@ -0,0 +1,155 @@
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from threading import Lock
+from typing import Any
+
+from app.core import json_store, metrics
+from app.core.config import settings
+
+HEADER = "x-data-profile"
+# Once over budget, evict down to this fraction of it so the scan does not repeat on every request.
+_LOW_WATERMARK = 0.9
+
+_lock = Lock()
+# profile -> {cache owner -> resident bytes}, least recently used first.
+_resident: OrderedDict[str, dict[str, int]] = OrderedDict()
+_active: dict[str, int] = {}
+_evict_hooks: list[Callable[[str], bool]] = []
+_total = 0
+_evictions = 0
+
+
+def on_evict(hook: Callable[[str], bool]) -> Callable[[str], bool]:
+    """Register ``hook(profile)``, called to drop a profile's warm state; it returns False if it is busy."""
+    _evict_hooks.append(hook)
+    return hook
+
+
+def account(profile: str, owner: str, size: int | None) -> None:
+    """Record how many bytes ``owner`` keeps warm for ``profile`` (None once it has dropped them)."""
+    global _total
+    with _lock:
+        owners = _resident.setdefault(profile, {})
+        _total -= owners.pop(owner, 0)
+        if size is not None:
+            owners[owner] = size
+            _total += size
+
+
+def _touch_locked(profile: str) -> None:
+    _resident.setdefault(profile, {})
+    _resident.move_to_end(profile)
+
+
+@contextmanager
+def active(profile: str | None = None) -> Iterator[str]:
+    """Serve one request or tool call as ``profile``; active profiles are never evicted."""
+    with json_store.use_profile(profile) as name:
+        with _lock:
+            _active[name] = _active.get(name, 0) + 1
+            _touch_locked(name)
+        try:
+            yield name
+        finally:
+            with _lock:
+                _active[name] -= 1
+                if not _active[name]:
+                    del _active[name]
+            enforce_budget()
+
+
+def evict(profile: str) -> bool:
+    """Drop a profile's warm state from every registered cache; False if some cache was busy."""
+    global _evictions
+    # Hooks take their own locks, so they run outside ours.
+    done = all([hook(profile) for hook in _evict_hooks])
+    with _lock:
+        owners = _resident.get(profile)
+        if owners is not None and not owners and profile not in _active:
+            del _resident[profile]
+        if done:
+            _evictions += 1
+    if done:
+        metrics.inc("profile_evictions_total", ())
+    return done
+
+
+def enforce_budget() -> None:
+    budget = settings.profile_cache_budget_bytes
+    # Runs after every request, so the common case is a single comparison.
+    if budget <= 0 or _total <= budget:
+        return
+    with _lock:
+        sizes = {profile: sum(owners.values()) for profile, owners in _resident.items()}
+        total = _total
+        idle = [profile for profile in _resident if profile not in _active and sizes[profile]]
+    target = budget * _LOW_WATERMARK
+    for profile in idle:
+        if total <= target:
+            break
+        if evict(profile):
+            total -= sizes[profile]
+
+
+def stats() -> dict[str, Any]:
+    with _lock:
+        sizes = {profile: sum(owners.values()) for profile, owners in _resident.items()}
+        return {
+            "budget_bytes": settings.profile_cache_budget_bytes,
+            "resident_bytes": _total,
+            "resident_profiles": sum(1 for size in sizes.values() if size),
+            "active": dict(_active),
+            "evictions": _evictions,
+            # Most recently used first.
+            "profiles": [{"profile": profile, "bytes": size} for profile, size in reversed(sizes.items()) if size][:50],
+        }
+
+
+async def _reject(send: Callable, detail: str) -> None:
+    body = f'{{"detail":"{detail}"}}'.encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 400,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+class ProfileMiddleware:
+    """Pure ASGI middleware serving each request from the profile named by its ``X-Data-Profile`` header."""
+
+    def __init__(self, app: Callable) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        profile = None
+        for name, value in scope.get("headers", ()):
+            if name == HEADER.encode():
+                profile = value.decode("latin-1").strip() or None
+                break
+        if profile is not None and not json_store.valid_profile(profile):
+            if scope["type"] == "http":
+                await _reject(send, "invalid X-Data-Profile header")
+            else:
+                await send({"type": "websocket.close", "code": 1008})
+            return
+        with active(profile):
+            await self.app(scope, receive, send)
+
+
+def _collect_metrics() -> list[metrics.Sample]:
+    with _lock:
+        resident = sum(1 for owners in _resident.values() if owners)
+        return [("profile_resident_bytes", {}, _total), ("profile_resident_profiles", {}, resident)]
+
+
+metrics.describe("profile_evictions_total", "counter", "Idle profiles whose warm collections were evicted.", ())
+metrics.describe("profile_resident_bytes", "gauge", "On-disk size of the collections held warm, all profiles.")
+metrics.describe("profile_resident_profiles", "gauge", "Profiles with at least one warm collection.")
+metrics.register_collector(_collect_metrics)
@@ -0,0 +1,172 @@
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from threading import Lock
+
+from app.core.config import settings
+from app.core import profiles
+from app.core.json_store import current_profile, read_json, write_json
+from app.schemas.ai import AIParseRecordResponse, ParseRuleTable
+
+_RULES_FILE = "parse_rules.json"
+_DEFAULT_RULES = ParseRuleTable.model_validate(
+    {
+        "classifiers": [
+            {
+                "detected_type": "transaction",
+                "suggested_category": "消费记录",
+                "keywords": ["买", "花", "支出", "消费", "吃饭", "expense"],
+            },
+            {"detected_type": "transaction", "suggested_category": "收入", "keywords": ["收入", "工资", "到账", "income"]},
+            {"detected_type": "task", "suggested_category": "任务", "keywords": ["任务", "提醒", "明天", "今天", "周", "点"]},
+            {"detected_type": "knowledge", "suggested_category": "知识", "keywords": ["芯片", "知识", "记录", "词条", "博客"]},
+        ],
+        "time_keywords": [{"keyword": "明天", "value": "tomorrow"}, {"keyword": "今天", "value": "today"}],
+    }
+)
+
+# Amounts are whitespace-delimited numbers; currency marks count as whitespace.
+_AMOUNT_PATTERN = r"(?<![^\s¥元])\+?(?P<amount>\d+(?:\.\d*)?|\.\d+)(?![^\s¥元])"
+
+
+class RecordMatcher:
+    """Rule table compiled into one regex that finds keywords, amounts and time words in a single scan."""
+
+    def __init__(self, table: ParseRuleTable) -> None:
+        self.table = table
+        no_rule, no_time = len(table.classifiers), len(table.time_keywords)
+
+        hits: dict[str, list[int]] = {}
+        for index, rule in enumerate(table.classifiers):
+            for keyword in rule.keywords:
+                if keyword:
+                    slot = hits.setdefault(keyword.lower(), [no_rule, no_time])
+                    slot[0] = min(slot[0], index)
+        for index, item in enumerate(table.time_keywords):
+            if item.keyword:
+                slot = hits.setdefault(item.keyword.lower(), [no_rule, no_time])
+                slot[1] = min(slot[1], index)
+
+        # The regex reports only the longest keyword starting at a position, so each keyword
+        # also carries the hits of every shorter keyword that is its prefix.
+        self._keywords: dict[str, tuple[int, int]] = {}
+        for keyword in hits:
+            prefixes = [hits[other] for other in hits if keyword.startswith(other)]
+            self._keywords[keyword] = (min(row[0] for row in prefixes), min(row[1] for row in prefixes))
+
+        # Keywords are matched as zero-width lookaheads so overlapping hits are all reported; the
+        # leading character classes let the engine reject most positions without trying alternatives.
+        alternatives = "|".join(re.escape(keyword) for keyword in sorted(self._keywords, key=len, reverse=True))
+        first_chars = "".join(sorted({re.escape(keyword[0]) for keyword in self._keywords}))
+        keyword_pattern = f"(?=[{first_chars}])(?=(?P<kw>{alternatives}))" if alternatives else "(?!)"
+        self._pattern = re.compile(f"{keyword_pattern}|(?=[+\\d.]){_AMOUNT_PATTERN}")
+
+    def parse(self, text: str) -> dict[str, str | None]:
+        text = text.strip()
+        best_rule, best_time = len(self.table.classifiers), len(self.table.time_keywords)
+        amount: str | None = None
+
+        for keyword, number in self._pattern.findall(text.lower()):
+            if keyword:
+                rule_index, time_index = self._keywords[keyword]
+                best_rule = min(best_rule, rule_index)
+                best_time = min(best_time, time_index)
+            elif amount is None:
+                value = float(number)
+                if value > 0:
+                    amount = f"{value:.2f}"
+
+        if best_rule < len(self.table.classifiers):
+            rule = self.table.classifiers[best_rule]
+            detected_type, suggested_category = rule.detected_type, rule.suggested_category
+        else:
+            detected_type, suggested_category = self.table.fallback_type, self.table.fallback_category
+
+        extracted_time: str | None = None
+        if best_time < len(self.table.time_keywords):
+            extracted_time = self.table.time_keywords[best_time].value
+            if extracted_time == "today":
+                extracted_time = datetime.now().date().isoformat()
+
+        return {
+            "detected_type": detected_type,
+            "suggested_category": suggested_category,
+            "normalized_text": text,
+            "extracted_amount": amount,
+            "extracted_time": extracted_time,
+        }
+
+
+_MATCHER_LOCK = Lock()
+# Compiled rule table per profile; dropped with the profile's other warm state.
+_matchers: dict[str, RecordMatcher] = {}
+_pool: ProcessPoolExecutor | None = None
+_pool_workers = settings.ai_parse_pool_workers or os.cpu_count() or 1
+
+
+def get_rules() -> ParseRuleTable:
+    return get_matcher().table
+
+
+def get_matcher() -> RecordMatcher:
+    profile = current_profile()
+    with _MATCHER_LOCK:
+        matcher = _matchers.get(profile)
+        if matcher is None:
+            row = read_json(_RULES_FILE, _DEFAULT_RULES.model_dump(mode="json"))
+            matcher = _matchers[profile] = RecordMatcher(ParseRuleTable.model_validate(row))
+        return matcher
+
+
+def set_rules(table: ParseRuleTable) -> ParseRuleTable:
+    matcher = RecordMatcher(table)
+    with _MATCHER_LOCK:
+        write_json(_RULES_FILE, table.model_dump(mode="json"))
+        _matchers[current_profile()] = matcher
+    return table
+
+
+@profiles.on_evict
+def _evict(profile: str) -> bool:
+    with _MATCHER_LOCK:
+        _matchers.pop(profile, None)
+    return True
+
+
+def parse_record(text: str) -> AIParseRecordResponse:
+    return AIParseRecordResponse.model_validate(get_matcher().parse(text))
+
+
+# Worker processes compile the rule table once per distinct table they are sent.
+_worker_matchers: dict[str, RecordMatcher] = {}
+
+
+def _parse_chunk(table_json: str, texts: list[str]) -> list[dict[str, str | None]]:
+    matcher = _worker_matchers.get(table_json)
+    if matcher is None:
+        _worker_matchers.clear()
+        matcher = _worker_matchers[table_json] = RecordMatcher(ParseRuleTable.model_validate_json(table_json))
+    return [matcher.parse(text) for text in texts]
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _MATCHER_LOCK:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=_pool_workers)
+        return _pool
+
+
+def parse_records(texts: list[str]) -> list[AIParseRecordResponse]:
+    matcher = get_matcher()
+    if len(texts) < settings.ai_parse_pool_threshold or _pool_workers < 2:
+        return [AIParseRecordResponse.model_validate(matcher.parse(text)) for text in texts]
+
+    pool = _get_pool()
+    table_json = json.dumps(matcher.table.model_dump(mode="json"), ensure_ascii=False)
+    chunk_size = max(1, len(texts) // (_pool_workers * 4))
+    chunks = [texts[start : start + chunk_size] for start in range(0, len(texts), chunk_size)]
+    rows = pool.map(_parse_chunk, [table_json] * len(chunks), chunks)
+    return [AIParseRecordResponse.model_validate(row) for chunk in rows for row in chunk]
@@ -0,0 +1,87 @@
+"""Compact in-memory rows for collections that grow large (transactions).
+
+A pydantic model row carries a ``__dict__``, a fields-set and its own copies of repeated strings and dates,
+several hundred bytes before any data. A record keeps the same attributes in ``__slots__``, shares repeated
+strings and dates between rows, and holds two-decimal amounts as integer cents. Routes read records like the
+models they replace; models are built from them (``to_model``) only when a response is returned.
+"""
+
+import sys
+from abc import ABC, abstractmethod
+from datetime import date
+from decimal import Decimal
+from typing import Any, ClassVar
+
+from pydantic import BaseModel
+
+_dates: dict[date, date] = {}
+
+
+def shared_str(value: str) -> str:
+    # Interned: every row with the same account/category/type points at one string.
+    return sys.intern(value)
+
+
+def shared_date(value: date | str) -> date:
+    """One object per distinct day; a notebook has a few thousand days, not one per row."""
+    if isinstance(value, str):
+        value = date.fromisoformat(value)
+    return _dates.setdefault(value, value)
+
+
+def pack_amount(value: Decimal) -> int | Decimal:
+    """Integer cents for amounts with exactly two decimals (what clients send); anything else stays a Decimal.
+
+    Keeping other precisions as they are means ``unpack_amount`` returns an equal Decimal with the same
+    exponent, so files and responses are byte-for-byte what the model produced.
+    """
+    _, _, exponent = value.as_tuple()
+    if exponent != -2 or (value.is_zero() and value.is_signed()):
+        return value
+    return int(value.scaleb(2))
+
+
+def unpack_amount(value: int | Decimal) -> Decimal:
+    return Decimal(value).scaleb(-2) if isinstance(value, int) else value
+
+
+def amount_json(value: int | Decimal) -> str:
+    """``str(unpack_amount(value))`` without building the Decimal; saves format every row."""
+    if not isinstance(value, int):
+        return str(value)
+    units, cents = divmod(abs(value), 100)
+    return f"{'-' if value < 0 else ''}{units}.{cents:02d}"
+
+
+class Record(ABC):
+    """Base for slotted rows: value equality over the slots and conversion to ``model`` at the API boundary.
+
+    Subclasses define ``__slots__``, ``fields`` (model field values) and ``to_json`` (the model's JSON dump,
+    built directly so saving a large collection does not construct a model per row).
+    """
+
+    __slots__ = ()
+    model: ClassVar[type[BaseModel]]
+
+    @abstractmethod
+    def fields(self) -> dict[str, Any]: ...
+
+    @abstractmethod
+    def to_json(self) -> dict[str, Any]: ...
+
+    def to_model(self) -> Any:
+        # Records are only built from validated models or our own files, so there is nothing to revalidate.
+        return self.model.model_construct(**self.fields())
+
+    def _values(self) -> tuple[Any, ...]:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self._values() == other._values()  # type: ignore[attr-defined]
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({', '.join(f'{name}={value!r}' for name, value in self.fields().items())})"
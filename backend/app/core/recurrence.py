@@ -0,0 +1,98 @@
+from calendar import monthrange
+from collections.abc import Iterator
+from datetime import date, datetime, time, timedelta
+
+from app.schemas.tasks import RecurrenceRule
+
+FREQUENCIES = {"daily", "weekly", "monthly"}
+
+
+def validate_rule(rule: RecurrenceRule) -> None:
+    if rule.freq not in FREQUENCIES:
+        raise ValueError("recurrence freq must be daily, weekly or monthly")
+    if rule.interval < 1:
+        raise ValueError("recurrence interval must be at least 1")
+    if rule.count is not None and rule.count < 1:
+        raise ValueError("recurrence count must be at least 1")
+    if rule.by_weekday is not None:
+        if rule.freq != "weekly":
+            raise ValueError("recurrence by_weekday is only valid for weekly rules")
+        if not rule.by_weekday or any(day < 0 or day > 6 for day in rule.by_weekday):
+            raise ValueError("recurrence by_weekday values must be between 0 (Mon) and 6 (Sun)")
+
+
+def align(value: datetime, reference: datetime) -> datetime:
+    # Compare naive and aware datetimes on the reference's terms.
+    if reference.tzinfo is not None and value.tzinfo is None:
+        return value.replace(tzinfo=reference.tzinfo)
+    if reference.tzinfo is None and value.tzinfo is not None:
+        return value.astimezone(reference.tzinfo).replace(tzinfo=None)
+    return value
+
+
+def _iter_daily(rule: RecurrenceRule, anchor: datetime, start: datetime) -> Iterator[tuple[int, datetime]]:
+    step = timedelta(days=rule.interval)
+    index = 0 if start <= anchor else -((anchor - start) // step)
+    while True:
+        yield index, anchor + index * step
+        index += 1
+
+
+def _iter_weekly(rule: RecurrenceRule, anchor: datetime, start: datetime) -> Iterator[tuple[int, datetime]]:
+    weekdays = sorted(set(rule.by_weekday or [anchor.weekday()]))
+    week_zero = datetime.combine(anchor.date() - timedelta(days=anchor.weekday()), anchor.timetz())
+    step = timedelta(weeks=rule.interval)
+    leading = sum(1 for day in weekdays if day < anchor.weekday())
+
+    block = 0 if start <= week_zero else (start - week_zero) // step
+    while True:
+        week_start = week_zero + block * step
+        for position, day in enumerate(weekdays):
+            index = block * len(weekdays) + position - leading
+            if index < 0:
+                continue
+            yield index, week_start + timedelta(days=day)
+        block += 1
+
+
+def _iter_monthly(rule: RecurrenceRule, anchor: datetime, start: datetime) -> Iterator[tuple[int, datetime]]:
+    offset = 0
+    if rule.count is None and start > anchor:
+        # Without a count limit the occurrence index is irrelevant, so jump straight to the window.
+        months = (start.year - anchor.year) * 12 + start.month - anchor.month
+        offset = max(0, months - months % rule.interval - rule.interval)
+
+    index = 0
+    while True:
+        month_index = anchor.month - 1 + offset
+        year, month = anchor.year + month_index // 12, month_index % 12 + 1
+        if anchor.day <= monthrange(year, month)[1]:
+            yield index, anchor.replace(year=year, month=month)
+            index += 1
+        offset += rule.interval
+
+
+_ITERATORS = {"daily": _iter_daily, "weekly": _iter_weekly, "monthly": _iter_monthly}
+
+
+def iter_occurrences(
+    rule: RecurrenceRule, anchor: datetime, window_start: datetime, window_end: datetime
+) -> Iterator[datetime]:
+    """Yield occurrence start times in [window_start, window_end), expanding only that range."""
+    window_start = align(window_start, anchor)
+    window_end = align(window_end, anchor)
+
+    for index, occurrence in _ITERATORS[rule.freq](rule, anchor, window_start):
+        if occurrence >= window_end:
+            return
+        if rule.count is not None and index >= rule.count:
+            return
+        if rule.until is not None and occurrence.date() > rule.until:
+            return
+        if occurrence >= window_start:
+            yield occurrence
+
+
+def occurs_on(rule: RecurrenceRule, anchor: datetime, day: date) -> datetime | None:
+    day_start = datetime.combine(day, time.min, tzinfo=anchor.tzinfo)
+    return next(iter_occurrences(rule, anchor, day_start, day_start + timedelta(days=1)), None)
@@ -0,0 +1,199 @@
+from collections.abc import Callable
+from pathlib import Path
+from threading import Condition, Lock
+from typing import Any, Generic, TypeVar
+
+from app.core import changes, profiles
+from app.core.json_store import current_profile, file_signature, read_json, write_json
+
+T = TypeVar("T")
+Signature = tuple[int, int, int]
+SaveHook = Callable[[Any, Any, Signature | None, Signature | None], None]
+
+
+class RWLock:
+    """Many concurrent readers or one writer; waiting writers block new readers so writes are not starved."""
+
+    def __init__(self) -> None:
+        self._cond = Condition(Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    def acquire_read(self) -> None:
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self) -> None:
+        with self._cond:
+            self._readers -= 1
+            if self._readers == 0:
+                self._cond.notify_all()
+
+    def acquire_write(self) -> None:
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+
+    def release_write(self) -> None:
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+    def idle(self) -> bool:
+        with self._cond:
+            return not (self._readers or self._writer or self._writers_waiting)
+
+
+class _ProfileState(Generic[T]):
+    def __init__(self) -> None:
+        self.value: T | None = None
+        self.signature: tuple[int, int, int] | None = None
+        self.derived: dict[str, Any] = {}
+        self.lock = Lock()
+        self.rw = RWLock()
+
+
+class Collection(Generic[T]):
+    """A JSON data file kept parsed and validated in memory.
+
+    ``get`` serves the warm value and only re-reads the file when its stat signature changes (another
+    process or an editor wrote it). ``save`` writes through to disk and keeps the saved value warm.
+    Callers receive a ``copy`` of the container so an aborted edit never leaks into the cache; the
+    records themselves are treated as immutable.
+
+    Each profile has its own warm value and locks, resolved from the current profile context; idle
+    profiles are dropped by ``profiles.enforce_budget`` and reloaded from disk on their next request.
+    Saves, and reloads that find the file changed by someone else, publish row changes to ``changes``;
+    ``on_save`` hooks see every save with the value and file signature before and after it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        default: Any,
+        parse: Callable[[Any], T],
+        dump: Callable[[T], Any],
+        copy: Callable[[T], T] = list,
+    ) -> None:
+        self.name = name
+        self.topic = Path(name).stem
+        self.default = default
+        self._parse = parse
+        self._dump = dump
+        self._copy = copy
+        self._states: dict[str, _ProfileState[T]] = {}
+        self._states_lock = Lock()
+        self.loads = 0
+        self._save_hooks: list[SaveHook] = []
+        profiles.on_evict(self._evict)
+        changes.register(self.topic, self)
+
+    def _state(self) -> _ProfileState[T]:
+        profile = current_profile()
+        state = self._states.get(profile)
+        if state is None:
+            with self._states_lock:
+                state = self._states.setdefault(profile, _ProfileState())
+        return state
+
+    @property
+    def rw(self) -> RWLock:
+        """Held across a whole read-modify-write by callers that run concurrently (see mcp_server)."""
+        return self._state().rw
+
+    def _refresh_locked(self, state: _ProfileState[T], signature: tuple[int, int, int] | None) -> T:
+        if state.value is None or signature is None or signature != state.signature:
+            previous = state.value
+            # Stat before reading: a write racing the read changes the signature again and forces a reload.
+            state.value = self._parse(read_json(self.name, self.default))
+            state.signature = signature if signature is not None else file_signature(self.name)
+            state.derived = {}
+            self.loads += 1
+            self._account(state)
+            if previous is not None and changes.enabled():
+                # Changed behind our back: another process (the MCP server) or an editor wrote the file.
+                changes.publish(self.topic, changes.diff(previous, state.value))
+        return state.value
+
+    def _account(self, state: _ProfileState[T]) -> None:
+        # The file size stands in for the parsed size, which is a roughly constant multiple of it.
+        profiles.account(current_profile(), self.name, state.signature[1] if state.signature else 0)
+
+    def get(self) -> T:
+        signature = file_signature(self.name)
+        state = self._state()
+        with state.lock:
+            return self._copy(self._refresh_locked(state, signature))
+
+    def refresh(self) -> None:
+        """Reload now if the file changed on disk; a stat and nothing else when it did not."""
+        signature = file_signature(self.name)
+        state = self._state()
+        with state.lock:
+            self._refresh_locked(state, signature)
+
+    def derived(self, name: str, build: Callable[[T], Any]) -> Any:
+        """Return ``build(value)`` for the current value, rebuilt only after a load or save (e.g. sorted indexes)."""
+        signature = file_signature(self.name)
+        state = self._state()
+        with state.lock:
+            value = self._refresh_locked(state, signature)
+            if name not in state.derived:
+                state.derived[name] = build(value)
+            return state.derived[name]
+
+    def parse(self, raw: Any) -> T:
+        return self._parse(raw)
+
+    def dump(self, value: T) -> Any:
+        """The JSON form written to disk; archive partitions store list rows in the same form."""
+        return self._dump(value)
+
+    def on_save(self, hook: SaveHook) -> None:
+        """Call ``hook(previous, value, signature_before, signature_after)`` after each save, under this
+        collection's lock; ``previous`` is None when nothing was loaded before the save."""
+        self._save_hooks.append(hook)
+
+    def save(self, value: T) -> None:
+        state = self._state()
+        with state.lock:
+            previous = state.value
+            before = state.signature
+            write_json(self.name, self._dump(value))
+            state.value = self._copy(value)
+            state.signature = file_signature(self.name)
+            state.derived = {}
+            self._account(state)
+            if changes.enabled():
+                changes.publish(self.topic, changes.diff(previous, value))
+            for hook in self._save_hooks:
+                hook(previous, value, before, state.signature)
+
+    def invalidate(self) -> None:
+        state = self._state()
+        with state.lock:
+            state.value = None
+            state.derived = {}
+
+    def _evict(self, profile: str) -> bool:
+        state = self._states.get(profile)
+        if state is None:
+            return True
+        # Never wait here: a held lock means the profile is in use after all, so it stays warm.
+        if not state.lock.acquire(blocking=False):
+            return False
+        try:
+            if not state.rw.idle():
+                return False
+            with self._states_lock:
+                self._states.pop(profile, None)
+        finally:
+            state.lock.release()
+        profiles.account(profile, self.name, None)
+        return True
@@ -0,0 +1,272 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from threading import Event, Lock
+from typing import Any
+
+_MISSING = object()
+# Expired disk entries are removed by a sweep on write, at most this often.
+_SWEEP_SECONDS = 60.0
+
+
+def normalize_prompt(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def make_key(*parts: Any) -> str:
+    raw = json.dumps(parts, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class _Pending:
+    def __init__(self) -> None:
+        self.event = Event()
+        self.value: Any = None
+        self.error: BaseException | None = None
+
+
+class ResponseCache:
+    """Bounded LRU cache with per-entry TTL, an optional JSON-on-disk tier and request coalescing.
+
+    Values must be JSON-serializable when the disk tier is enabled. The disk tier is bounded by
+    ``max_entries`` as well, least recently used first, and expired files are swept on write.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, disk_dir: Path | None = None) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._pending: dict[str, _Pending] = {}
+        self._pending_async: dict[str, asyncio.Future] = {}
+        self._lock = Lock()
+        # Disk entries (key -> wall-clock expiry), least recently used first; listed from disk on first use.
+        self._disk: OrderedDict[str, float] | None = None
+        self._disk_lock = Lock()
+        self._next_sweep = 0.0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _get_locked(self, key: str) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            return _MISSING
+        self._entries.move_to_end(key)
+        return value
+
+    def _put_locked(self, key: str, value: Any, expires_at: float) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.json"
+
+    def _disk_keys(self) -> OrderedDict[str, float]:
+        # Call with _disk_lock held. Files from earlier runs expire ttl_seconds after they were written.
+        if self._disk is None:
+            for path in self.disk_dir.glob("*/*.tmp"):
+                path.unlink(missing_ok=True)
+            found: list[tuple[float, str]] = []
+            for path in self.disk_dir.glob("*/*.json"):
+                try:
+                    found.append((path.stat().st_mtime, path.stem))
+                except FileNotFoundError:
+                    continue
+            self._disk = OrderedDict((key, mtime + self.ttl_seconds) for mtime, key in sorted(found))
+        return self._disk
+
+    def _forget_disk(self, key: str) -> None:
+        with self._disk_lock:
+            self._disk_keys().pop(key, None)
+            self._disk_path(key).unlink(missing_ok=True)
+
+    def _trim_disk_locked(self) -> None:
+        keys = self._disk_keys()
+        now = time.time()
+        if now >= self._next_sweep:
+            self._next_sweep = now + _SWEEP_SECONDS
+            for key in [key for key, expires_at in keys.items() if expires_at <= now]:
+                del keys[key]
+                self._disk_path(key).unlink(missing_ok=True)
+        while len(keys) > self.max_entries:
+            key, _ = keys.popitem(last=False)
+            self._disk_path(key).unlink(missing_ok=True)
+
+    def _read_disk(self, key: str) -> Any:
+        if self.disk_dir is None:
+            return _MISSING
+        path = self._disk_path(key)
+        try:
+            row = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return _MISSING
+        remaining = row["expires_at"] - time.time()
+        if remaining <= 0:
+            self._forget_disk(key)
+            return _MISSING
+        with self._disk_lock:
+            keys = self._disk_keys()
+            keys[key] = row["expires_at"]
+            keys.move_to_end(key)
+        with self._lock:
+            self.disk_hits += 1
+            self._put_locked(key, row["value"], time.monotonic() + remaining)
+        return row["value"]
+
+    def _write_disk(self, key: str, value: Any) -> None:
+        if self.disk_dir is None:
+            return
+        path = self._disk_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        row = {"expires_at": time.time() + self.ttl_seconds, "value": value}
+        # Written aside and renamed, so a concurrent reader sees the old file or the new one, never half of one.
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(json.dumps(row, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, path)
+        with self._disk_lock:
+            keys = self._disk_keys()
+            keys[key] = row["expires_at"]
+            keys.move_to_end(key)
+            self._trim_disk_locked()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            value = self._get_locked(key)
+            if value is not _MISSING:
+                self.hits += 1
+                return value
+        value = self._read_disk(key)
+        if value is _MISSING:
+            with self._lock:
+                self.misses += 1
+            return None
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._put_locked(key, value, time.monotonic() + self.ttl_seconds)
+        self._write_disk(key, value)
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Return the cached value or compute it once, even when called from many threads at once."""
+        with self._lock:
+            value = self._get_locked(key)
+            if value is not _MISSING:
+                self.hits += 1
+                return value
+            pending = self._pending.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._pending[key] = _Pending()
+            else:
+                self.coalesced += 1
+
+        if not owner:
+            pending.event.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.value
+
+        try:
+            value = self._read_disk(key)
+            if value is _MISSING:
+                with self._lock:
+                    self.misses += 1
+                value = compute()
+                self.put(key, value)
+            pending.value = value
+            return value
+        except BaseException as exc:
+            pending.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+            pending.event.set()
+
+    async def aget_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Async variant of get_or_compute; concurrent callers await one upstream call."""
+        with self._lock:
+            value = self._get_locked(key)
+            if value is not _MISSING:
+                self.hits += 1
+                return value
+            future = self._pending_async.get(key)
+            if future is not None:
+                self.coalesced += 1
+        if future is not None:
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The owning request was cancelled (client went away); take over the computation.
+                return await self.aget_or_compute(key, compute)
+
+        future = self._pending_async[key] = asyncio.get_running_loop().create_future()
+        try:
+            value = await asyncio.to_thread(self._read_disk, key) if self.disk_dir else _MISSING
+            if value is _MISSING:
+                with self._lock:
+                    self.misses += 1
+                value = await compute()
+                with self._lock:
+                    self._put_locked(key, value, time.monotonic() + self.ttl_seconds)
+                if self.disk_dir:
+                    await asyncio.to_thread(self._write_disk, key, value)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Mark the exception retrieved when nobody else was waiting on it.
+            future.exception()
+            raise
+        finally:
+            self._pending_async.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        if self.disk_dir is not None:
+            with self._disk_lock:
+                for path in self.disk_dir.glob("*/*.json"):
+                    path.unlink(missing_ok=True)
+                self._disk = OrderedDict()
+
+    def stats(self) -> dict[str, int | float]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,152 @@
+import asyncio
+import typing
+import zlib
+from collections.abc import Callable
+from functools import lru_cache
+from typing import Any
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+# Compression below this size is done inline; larger bodies go to a thread so the event loop keeps serving.
+_INLINE_COMPRESS_BYTES = 64 * 1024
+_COMPRESSIBLE_TYPES = (b"application/json", b"text/", b"application/javascript")
+
+
+@lru_cache(maxsize=256)
+def _adapter(response_model: Any) -> TypeAdapter:
+    return TypeAdapter(response_model)
+
+
+def _model_item(response_model: Any) -> type[BaseModel] | None:
+    # Model type whose instances the endpoint must return for the result to count as trusted.
+    if isinstance(response_model, type) and issubclass(response_model, BaseModel):
+        return response_model
+    if typing.get_origin(response_model) is list:
+        (item,) = typing.get_args(response_model) or (None,)
+        if isinstance(item, type) and issubclass(item, BaseModel):
+            return item
+    return None
+
+
+def encode_trusted(result: Any, response_model: Any, by_alias: bool = True) -> bytes | None:
+    """JSON for ``result`` as FastAPI would send it for ``response_model``, or None to leave it to FastAPI.
+
+    Called from the store worker, so neither validation nor dumping runs on the event loop. Rows that are
+    already instances of the declared model are trusted and dumped directly instead of being revalidated.
+    """
+    if response_model is None:
+        return None
+    adapter = _adapter(response_model)
+    model = _model_item(response_model)
+    if model is not None:
+        expects_list = model is not response_model
+        rows = result if expects_list and isinstance(result, list) else [result]
+        if isinstance(result, list) is expects_list and all(isinstance(row, model) for row in rows):
+            return adapter.dump_json(result, by_alias=by_alias, warnings=False)
+    try:
+        value = adapter.validate_python(result, from_attributes=True)
+    except ValidationError:
+        # Let FastAPI report the mismatch as a ResponseValidationError, as before.
+        return None
+    return adapter.dump_json(value, by_alias=by_alias)
+
+
+def _accepted_encoding(scope: dict) -> str | None:
+    for name, value in scope.get("headers", ()):
+        if name != b"accept-encoding":
+            continue
+        offered: dict[str, float] = {}
+        for part in value.decode("latin-1").split(","):
+            token, _, params = part.strip().partition(";")
+            quality = 1.0
+            if params.strip().startswith("q="):
+                try:
+                    quality = float(params.strip()[2:])
+                except ValueError:
+                    quality = 0.0
+            offered[token.strip().lower()] = quality
+        if brotli is not None and offered.get("br", 0) > 0:
+            return "br"
+        if offered.get("gzip", 0) > 0:
+            return "gzip"
+        return None
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.response_brotli_quality)
+    # wbits=31 writes a gzip container; compressobj avoids gzip.compress's per-call file object.
+    compressor = zlib.compressobj(settings.response_gzip_level, zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware compressing complete JSON/text bodies with br (if installed) or gzip.
+
+    Only single-message bodies at or above ``RESPONSE_COMPRESS_MIN_BYTES`` are compressed; streamed
+    responses such as Server-Sent Events pass through untouched so tokens are not held back.
+    """
+
+    def __init__(self, app: Callable) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        encoding = _accepted_encoding(scope) if scope["type"] == "http" else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: dict | None = None
+
+        async def send_wrapper(message: dict) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            held, start = start, None
+            body = message.get("body", b"")
+            headers = held.get("headers", [])
+            if message.get("more_body", False) or not self._eligible(headers, len(body)):
+                await send(held)
+                await send(message)
+                return
+
+            if len(body) >= _INLINE_COMPRESS_BYTES:
+                body = await asyncio.to_thread(compress, body, encoding)
+            else:
+                body = compress(body, encoding)
+            vary = [value for name, value in headers if name == b"vary"]
+            headers = [(name, value) for name, value in headers if name not in (b"content-length", b"vary")]
+            headers += [
+                (b"content-encoding", encoding.encode("ascii")),
+                (b"content-length", str(len(body)).encode("ascii")),
+                (b"vary", b", ".join([*vary, b"Accept-Encoding"])),
+            ]
+            await send({**held, "headers": headers})
+            await send({**message, "body": body})
+
+        await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    def _eligible(headers: list[tuple[bytes, bytes]], size: int) -> bool:
+        if size < settings.response_compress_min_bytes:
+            return False
+        content_type = b""
+        for name, value in headers:
+            if name == b"content-encoding":
+                return False
+            if name == b"content-type":
+                content_type = value
+        return content_type.startswith(_COMPRESSIBLE_TYPES) and not content_type.startswith(b"text/event-stream")
@@ -0,0 +1,230 @@
+"""Per-day rollup of sleep, tasks, money and feed activity, for statistics that would otherwise join raw records.
+
+One row per day with the ``COLUMNS`` counters is kept in ``rollup.json`` (per profile). Source collections
+register with ``track`` and say which columns each of their rows adds to which day. Every save of a source
+applies the difference between the old and new rows to the days they touch, so a write costs only the rows
+it changed. Rows that archival moves to partitions still count.
+
+The rollup also records, per source, the file signature its columns were computed from. A source file can
+change without a save in this process: a hand edit, a backup restore, or the MCP server process racing this
+one on ``rollup.json``. The signatures then differ, and ``current`` rebuilds that source's columns from its
+hot file and archive partitions. ``rebuild`` does the same on demand.
+"""
+
+from collections.abc import Callable, Iterable
+from datetime import date, datetime
+from decimal import ROUND_HALF_UP, Decimal
+from threading import Lock
+from typing import Any
+
+from app.core import archive, metrics
+from app.core.json_store import file_signature
+from app.core.repository import Collection, Signature
+
+COLUMNS = ("sleep_minutes", "tasks_done", "tasks_skipped", "income", "expense", "feed_count")
+# Stored as integer cents.
+MONEY_COLUMNS = frozenset({"income", "expense"})
+_INDEX = {name: index for index, name in enumerate(COLUMNS)}
+
+# (day, column, amount) added by one source row.
+Contribution = tuple[date, str, int]
+
+_lock = Lock()
+
+
+def _parse(raw: dict[str, Any]) -> dict[str, Any]:
+    if raw.get("columns") != list(COLUMNS):
+        # Written with other columns: start empty; every source is then stale and rebuilt on first use.
+        return {"days": {}, "sources": {}}
+    return {"days": raw["days"], "sources": raw["sources"]}
+
+
+def _dump(state: dict[str, Any]) -> dict[str, Any]:
+    return {"columns": list(COLUMNS), "days": state["days"], "sources": state["sources"]}
+
+
+def _copy(state: dict[str, Any]) -> dict[str, Any]:
+    # Day rows are replaced, never edited in place, so a shallow copy of each mapping is enough.
+    return {"days": dict(state["days"]), "sources": dict(state["sources"])}
+
+
+rollup_store: Collection[dict[str, Any]] = Collection(
+    "rollup.json", {"columns": list(COLUMNS), "days": {}, "sources": {}}, parse=_parse, dump=_dump, copy=_copy
+)
+
+
+def local_date(value: datetime) -> date:
+    return value.astimezone().date() if value.tzinfo is not None else value.date()
+
+
+def cents(amount: Decimal) -> int:
+    return int((amount * 100).to_integral_value(ROUND_HALF_UP))
+
+
+class _Source:
+    def __init__(
+        self,
+        name: str,
+        store: Collection[Any],
+        columns: tuple[str, ...],
+        contribute: Callable[[Any], Iterable[Contribution]],
+        rows: Callable[[Any], list[Any]],
+        archive_name: str | None,
+        parse_archived: Callable[[list[dict[str, Any]]], list[Any]],
+    ) -> None:
+        self.name = name
+        self.store = store
+        self.columns = columns
+        self.contribute = contribute
+        self.rows = rows
+        self.archive_name = archive_name
+        self.parse_archived = parse_archived
+
+    def signature(self) -> list[int] | None:
+        signature = file_signature(self.store.name)
+        return list(signature) if signature is not None else None
+
+
+_sources: dict[str, _Source] = {}
+
+
+def track(
+    name: str,
+    store: Collection[Any],
+    columns: tuple[str, ...],
+    contribute: Callable[[Any], Iterable[Contribution]],
+    rows: Callable[[Any], list[Any]] = lambda value: value,
+    archive_name: str | None = None,
+    parse_archived: Callable[[list[dict[str, Any]]], list[Any]] | None = None,
+) -> None:
+    """Maintain ``columns`` from ``store``: ``contribute(row)`` lists what one row adds to which day.
+
+    ``rows`` picks the list of rows out of the collection value. ``archive_name`` names the archive
+    partitions whose rows still count, parsed with ``parse_archived`` (default: the store's own parser).
+    """
+    source = _Source(name, store, columns, contribute, rows, archive_name, parse_archived or store.parse)
+    _sources[name] = source
+
+    def hook(previous: Any, value: Any, before: Signature | None, after: Signature | None) -> None:
+        _on_save(source, previous, value, before, after)
+
+    store.on_save(hook)
+
+
+def _add(totals: dict[str, list[int]], contributions: Iterable[Contribution], sign: int) -> None:
+    for day, column, amount in contributions:
+        row = totals.get(key := day.isoformat())
+        if row is None:
+            row = totals[key] = [0] * len(COLUMNS)
+        row[_INDEX[column]] += sign * amount
+
+
+def _deltas(source: _Source, old_rows: list[Any], new_rows: list[Any]) -> dict[str, list[int]]:
+    """Per-day change between two versions of a source's rows, matched by id; unchanged rows cost a lookup."""
+    deltas: dict[str, list[int]] = {}
+    before = {row.id: row for row in old_rows}
+    for row in new_rows:
+        previous = before.pop(row.id, None)
+        if previous is row or (previous is not None and previous == row):
+            continue
+        if previous is not None:
+            _add(deltas, source.contribute(previous), -1)
+        _add(deltas, source.contribute(row), 1)
+    for previous in before.values():
+        _add(deltas, source.contribute(previous), -1)
+    return deltas
+
+
+def _apply(days: dict[str, list[int]], deltas: dict[str, list[int]]) -> None:
+    for day, delta in deltas.items():
+        if not any(delta):
+            continue
+        row = [value + change for value, change in zip(days.get(day, [0] * len(COLUMNS)), delta, strict=True)]
+        if any(row):
+            days[day] = row
+        else:
+            days.pop(day, None)
+
+
+def _replace_columns(days: dict[str, list[int]], columns: tuple[str, ...], totals: dict[str, list[int]]) -> None:
+    indexes = [_INDEX[column] for column in columns]
+    for day in list(days.keys() | totals.keys()):
+        row = list(days.get(day, [0] * len(COLUMNS)))
+        fresh = totals.get(day)
+        for index in indexes:
+            row[index] = fresh[index] if fresh is not None else 0
+        if any(row):
+            days[day] = row
+        else:
+            days.pop(day, None)
+
+
+def _on_save(source: _Source, previous: Any, value: Any, before: Signature | None, after: Signature | None) -> None:
+    # Runs under the source collection's lock; a failure here must not fail the write that already happened.
+    if previous is None:
+        return  # nothing to diff against: the columns stay stale until ``current`` rebuilds them
+    try:
+        with _lock:
+            state = rollup_store.get()
+            if state["sources"].get(source.name) != (list(before) if before is not None else None):
+                return  # already stale (changed outside a save); a delta on top of it would stay wrong
+            if not archive.is_moving():
+                _apply(state["days"], _deltas(source, source.rows(previous), source.rows(value)))
+            state["sources"][source.name] = list(after) if after is not None else None
+            rollup_store.save(state)
+    except Exception:  # noqa: BLE001 - the signature check rebuilds the columns on the next read
+        metrics.inc("rollup_errors_total", (source.name,))
+
+
+def _totals(source: _Source) -> tuple[dict[str, list[int]], list[int] | None]:
+    """Columns of one source recomputed from its hot rows and archive partitions, with the signature they match."""
+    # Stat first: the rows read next are at least this new, so a later write shows up as a mismatch.
+    signature = source.signature()
+    rows = source.rows(source.store.get())
+    totals: dict[str, list[int]] = {}
+    for row in rows:
+        _add(totals, source.contribute(row), 1)
+    if source.archive_name is not None:
+        # A crash between writing a partition and shrinking the hot file leaves rows in both; count them once.
+        # Only an identical row is the same record: a different row under an archived id (possible in data
+        # written before ids stayed above the archived ones) still counts.
+        hot = {row.id: row for row in rows}
+        for year in archive.partitions(source.archive_name):
+            for row in source.parse_archived(archive.read_partition(source.archive_name, year)):
+                if hot.get(row.id) != row:
+                    _add(totals, source.contribute(row), 1)
+    return totals, signature
+
+
+def rebuild(names: Iterable[str] | None = None) -> dict[str, int]:
+    """Recompute the given sources' columns (default all); returns the number of active days per source."""
+    result: dict[str, int] = {}
+    for name in names if names is not None else list(_sources):
+        source = _sources[name]
+        totals, signature = _totals(source)
+        with _lock:
+            state = rollup_store.get()
+            _replace_columns(state["days"], source.columns, totals)
+            state["sources"][name] = signature
+            rollup_store.save(state)
+        metrics.inc("rollup_rebuilds_total", (name,))
+        result[name] = len(totals)
+    return result
+
+
+def current() -> dict[str, list[int]]:
+    """Day (ISO) -> ``COLUMNS`` values for days with any activity, rebuilding sources that are out of date."""
+    state = rollup_store.get()
+    stale = [name for name, source in _sources.items() if state["sources"].get(name) != source.signature()]
+    if stale:
+        rebuild(stale)
+        state = rollup_store.get()
+    return state["days"]
+
+
+def sources() -> list[str]:
+    return list(_sources)
+
+
+metrics.describe("rollup_rebuilds_total", "counter", "Rollup columns recomputed from a source's records.", ("source",))
+metrics.describe("rollup_errors_total", "counter", "Failed incremental rollup updates (left for a rebuild).", ("source",))
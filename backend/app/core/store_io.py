@@ -0,0 +1,132 @@
+import asyncio
+import contextvars
+import functools
+import inspect
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar
+
+from fastapi import HTTPException, Response
+from fastapi.routing import APIRoute
+
+from app.core import profiler
+from app.core.responses import encode_trusted
+from app.core.config import settings
+from app.core.repository import Collection
+
+T = TypeVar("T")
+
+_READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+_executor: ThreadPoolExecutor | None = None
+# Only touched from the event loop thread, so plain counters are enough.
+_in_flight: dict[str, int] = {}
+_rejected: dict[str, int] = {}
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=max(1, settings.store_io_workers), thread_name_prefix="store-io")
+    return _executor
+
+
+def shutdown() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+async def run_store(collection: str, func: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+    """Run blocking store work on the store executor, or fail fast with 503 when the collection is saturated."""
+    current = _in_flight.get(collection, 0)
+    if current >= settings.store_max_in_flight:
+        _rejected[collection] = _rejected.get(collection, 0) + 1
+        raise HTTPException(
+            status_code=503,
+            detail=f"{collection} is busy, retry shortly",
+            headers={"Retry-After": str(settings.store_retry_after_seconds)},
+        )
+
+    _in_flight[collection] = current + 1
+    try:
+        session = profiler.current() if settings.profiling_enabled else None
+        if session is not None:
+            # Let the sampler see this worker thread while it serves the profiled request.
+            func, args = profiler.run_attached, (session, func, *args)
+        # Carry request context variables into the worker thread.
+        call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(get_executor(), call)
+    finally:
+        _in_flight[collection] -= 1
+
+
+def _serialized(route: APIRoute, endpoint: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Any:
+    # Runs in the worker: encode trusted results here instead of revalidating them on the event loop.
+    result = endpoint(*args, **kwargs)
+    if isinstance(result, Response) or not route.fast_response:
+        return result
+    body = encode_trusted(result, route.response_model, by_alias=route.response_model_by_alias)
+    if body is None:
+        return result
+    return Response(content=body, status_code=route.status_code or 200, media_type="application/json")
+
+
+def _exclusive(store: Collection, endpoint: Callable[..., T]) -> Callable[..., T]:
+    # The whole load-modify-save runs under the collection's write lock, as MCP tools and archival hold it;
+    # otherwise two concurrent writes both start from the same state and the later save drops the other.
+    @functools.wraps(endpoint)
+    def run(*args: Any, **kwargs: Any) -> T:
+        lock = store.rw
+        lock.acquire_write()
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            lock.release_write()
+
+    return run
+
+
+def _offload(collection: str, route: APIRoute, endpoint: Callable[..., T]) -> Callable[..., Any]:
+    @functools.wraps(endpoint)
+    async def run(*args: Any, **kwargs: Any) -> Any:
+        return await run_store(collection, _serialized, route, endpoint, *args, **kwargs)
+
+    return run
+
+
+def store_route(collection: str, store: Collection | None = None) -> type[APIRoute]:
+    """Route class that serves sync endpoints from the store executor with per-collection admission control.
+
+    Endpoint functions stay plain sync functions, so other callers (the MCP server) can use them directly.
+    Their results are serialized in the worker too, skipping FastAPI's response revalidation when the
+    rows already have the declared model type. With ``store``, writing methods hold its write lock.
+    """
+
+    class StoreRoute(APIRoute):
+        def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+            if not inspect.iscoroutinefunction(endpoint):
+                if store is not None and not set(kwargs.get("methods") or ()) <= _READ_METHODS:
+                    endpoint = _exclusive(store, endpoint)
+                endpoint = _offload(collection, self, endpoint)
+            super().__init__(path, endpoint, **kwargs)
+            # Include/exclude options change the output shape, so those routes keep FastAPI's own encoding.
+            self.fast_response = settings.response_fast_path and not (
+                self.response_model_include
+                or self.response_model_exclude
+                or self.response_model_exclude_unset
+                or self.response_model_exclude_defaults
+                or self.response_model_exclude_none
+            )
+
+    return StoreRoute
+
+
+def stats() -> dict[str, Any]:
+    return {
+        "workers": settings.store_io_workers,
+        "max_in_flight": settings.store_max_in_flight,
+        "in_flight": dict(_in_flight),
+        "rejected": dict(_rejected),
+    }
@@ -0,0 +1,357 @@
+import json
+import math
+from collections.abc import Iterable
+from functools import cache
+from pathlib import Path
+from threading import Lock
+
+import numpy as np
+
+from app.core import profiles
+from app.core.config import settings
+from app.core.json_store import current_profile, profile_dir, read_json
+
+_NGRAM_SIZES = (1, 2, 3)
+_HASH_MULTIPLIER = np.uint64(1000003)
+_HASH_MIX = np.uint64(0x9E3779B97F4A7C15)
+_MIN_CAPACITY = 256
+
+
+class HashingEmbedder:
+    """Character 1-3 gram hashing vectorizer with sublinear TF; IDF is applied on the query side.
+
+    Character n-grams work for both CJK text (no word boundaries) and Latin words, and hashing
+    keeps the vocabulary fixed so documents can be added without refitting.
+    """
+
+    uses_idf = True
+
+    def __init__(self, dim: int) -> None:
+        self.dim = dim
+        self.name = f"hashing-ngram-{dim}"
+
+    def embed(self, text: str) -> np.ndarray:
+        normalized = " ".join(text.lower().split())
+        codes = np.frombuffer(normalized.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        counts = np.zeros(self.dim, dtype=np.float64)
+        for size in _NGRAM_SIZES:
+            if len(codes) < size:
+                break
+            hashed = np.full(len(codes) - size + 1, size, dtype=np.uint64)
+            for offset in range(size):
+                hashed = hashed * _HASH_MULTIPLIER + codes[offset : len(codes) - size + 1 + offset]
+            buckets = ((hashed * _HASH_MIX) >> np.uint64(32)) % np.uint64(self.dim)
+            counts += np.bincount(buckets.astype(np.intp), minlength=self.dim)
+        return _normalize(np.log1p(counts).astype(np.float32))
+
+
+class SentenceTransformerEmbedder:
+    """Small local embedding model, used only when configured and installed."""
+
+    uses_idf = False
+
+    def __init__(self, model_name: str) -> None:
+        from sentence_transformers import SentenceTransformer
+
+        self._model = SentenceTransformer(model_name)
+        self.dim = int(self._model.get_sentence_embedding_dimension())
+        self.name = f"st-{model_name}"
+
+    def embed(self, text: str) -> np.ndarray:
+        return _normalize(np.asarray(self._model.encode(text), dtype=np.float32))
+
+
+def _normalize(vector: np.ndarray) -> np.ndarray:
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm > 0 else vector
+
+
+@cache
+def _make_embedder() -> HashingEmbedder | SentenceTransformerEmbedder:
+    # Shared by every profile's index: a sentence-transformers model is loaded once per process.
+    if settings.search_model:
+        try:
+            return SentenceTransformerEmbedder(settings.search_model)
+        except ImportError:
+            pass
+    return HashingEmbedder(settings.search_dim)
+
+
+class VectorIndex:
+    """Unit vectors in a memory-mapped float32 matrix with one row per document.
+
+    Rows are addressed by "<source>:<id>" keys; deleted rows are zeroed and reused. Metadata
+    (keys, labels, document frequencies) lives next to the matrix in meta.json.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self._lock = Lock()
+        self._embedder: HashingEmbedder | SentenceTransformerEmbedder | None = None
+        self._matrix: np.memmap | None = None
+        self._keys: list[str | None] = []
+        self._labels: list[str] = []
+        self._slots: dict[str, int] = {}
+        self._free: list[int] = []
+        # Per-slot source code (-1 = empty) so filtering is a vectorized comparison.
+        self._sources = np.zeros(0, dtype=np.int16)
+        self._source_codes: dict[str, int] = {}
+        self._df = np.zeros(0, dtype=np.int64)
+        self._meta_mtime: float | None = None
+        self.built = False
+
+    @property
+    def _matrix_path(self) -> Path:
+        return self.root / "vectors.f32"
+
+    @property
+    def _meta_path(self) -> Path:
+        return self.root / "meta.json"
+
+    def _ensure_loaded(self) -> None:
+        if self._embedder is None:
+            self._embedder = _make_embedder()
+
+        mtime = self._meta_path.stat().st_mtime if self._meta_path.exists() else None
+        if self._matrix is not None and mtime == self._meta_mtime:
+            return
+
+        meta = json.loads(self._meta_path.read_text(encoding="utf-8")) if mtime is not None else None
+        if meta is None or meta.get("embedder") != self._embedder.name:
+            self._reset(_MIN_CAPACITY)
+            return
+
+        self._keys = meta["keys"]
+        self._labels = meta["labels"]
+        self._df = np.asarray(meta["df"], dtype=np.int64)
+        self.built = meta.get("built", False)
+        self._slots = {key: slot for slot, key in enumerate(self._keys) if key is not None}
+        self._free = [slot for slot, key in enumerate(self._keys) if key is None]
+        self._sources = np.array([self._source_code(key) for key in self._keys], dtype=np.int16)
+        self._matrix = np.memmap(self._matrix_path, dtype=np.float32, mode="r+", shape=(len(self._keys), self._embedder.dim))
+        self._meta_mtime = mtime
+
+    def _reset(self, capacity: int) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        dim = self._embedder.dim
+        with self._matrix_path.open("wb") as f:
+            f.truncate(capacity * dim * 4)
+        self._matrix = np.memmap(self._matrix_path, dtype=np.float32, mode="r+", shape=(capacity, dim))
+        self._keys = [None] * capacity
+        self._labels = [""] * capacity
+        self._slots = {}
+        self._free = list(range(capacity))
+        self._sources = np.full(capacity, -1, dtype=np.int16)
+        self._df = np.zeros(dim, dtype=np.int64)
+        self.built = False
+        self._save_meta()
+
+    def _grow(self) -> None:
+        old_capacity = len(self._keys)
+        capacity = old_capacity * 2
+        dim = self._embedder.dim
+        self._matrix.flush()
+        self._matrix = None
+        with self._matrix_path.open("r+b") as f:
+            f.truncate(capacity * dim * 4)
+        self._matrix = np.memmap(self._matrix_path, dtype=np.float32, mode="r+", shape=(capacity, dim))
+        self._keys.extend([None] * (capacity - old_capacity))
+        self._labels.extend([""] * (capacity - old_capacity))
+        self._free.extend(range(old_capacity, capacity))
+        self._sources = np.concatenate([self._sources, np.full(capacity - old_capacity, -1, dtype=np.int16)])
+
+    def _source_code(self, key: str | None) -> int:
+        if key is None:
+            return -1
+        return self._source_codes.setdefault(key.split(":", 1)[0], len(self._source_codes))
+
+    def _save_meta(self) -> None:
+        self._matrix.flush()
+        meta = {
+            "embedder": self._embedder.name,
+            "built": self.built,
+            "keys": self._keys,
+            "labels": self._labels,
+            "df": self._df.tolist(),
+        }
+        self._meta_path.write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+        self._meta_mtime = self._meta_path.stat().st_mtime
+
+    def _remove_locked(self, key: str) -> bool:
+        slot = self._slots.pop(key, None)
+        if slot is None:
+            return False
+        self._df -= self._matrix[slot] > 0
+        self._matrix[slot] = 0
+        self._keys[slot] = None
+        self._labels[slot] = ""
+        self._sources[slot] = -1
+        self._free.append(slot)
+        return True
+
+    def _upsert_locked(self, key: str, text: str, label: str) -> None:
+        self._remove_locked(key)
+        if not self._free:
+            self._grow()
+        slot = self._free.pop()
+        vector = self._embedder.embed(text)
+        self._matrix[slot] = vector
+        self._df += vector > 0
+        self._keys[slot] = key
+        self._labels[slot] = label[:80]
+        self._sources[slot] = self._source_code(key)
+        self._slots[key] = slot
+
+    def upsert(self, key: str, text: str, label: str) -> None:
+        with self._lock:
+            self._ensure_loaded()
+            self._upsert_locked(key, text, label)
+            self._save_meta()
+
+    def upsert_many(self, documents: Iterable[tuple[str, str, str]]) -> None:
+        with self._lock:
+            self._ensure_loaded()
+            for key, text, label in documents:
+                self._upsert_locked(key, text, label)
+            self._save_meta()
+
+    def remove(self, key: str) -> None:
+        self.remove_many([key])
+
+    def remove_many(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            self._ensure_loaded()
+            removed = [self._remove_locked(key) for key in keys]
+            if any(removed):
+                self._save_meta()
+
+    def rebuild(self, documents: Iterable[tuple[str, str, str]]) -> int:
+        """Replace the index with (key, text, label) documents; returns the document count."""
+        rows = list(documents)
+        with self._lock:
+            if self._embedder is None:
+                self._embedder = _make_embedder()
+            self._matrix = None
+            self._reset(max(_MIN_CAPACITY, 1 << math.ceil(math.log2(len(rows) + 1))))
+            for key, text, label in rows:
+                self._upsert_locked(key, text, label)
+            self.built = True
+            self._save_meta()
+        return len(rows)
+
+    def is_built(self) -> bool:
+        with self._lock:
+            self._ensure_loaded()
+            return self.built
+
+    def search(self, query: str, k: int, source: str | None = None) -> list[tuple[str, str, float]]:
+        with self._lock:
+            self._ensure_loaded()
+            if not self._slots:
+                return []
+
+            vector = self._embedder.embed(query)
+            if self._embedder.uses_idf:
+                idf = np.log((1 + len(self._slots)) / (1 + self._df)) + 1
+                vector = _normalize(vector * idf.astype(np.float32))
+
+            scores = np.asarray(self._matrix @ vector)
+            if source:
+                mask = self._sources == self._source_codes.get(source, -2)
+            else:
+                mask = self._sources >= 0
+            scores = np.where(mask, scores, -np.inf)
+
+            k = min(k, int(mask.sum()))
+            if k <= 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(self._keys[slot], self._labels[slot], float(scores[slot])) for slot in top if scores[slot] > 0]
+
+    def stats(self) -> dict[str, int | str | bool]:
+        with self._lock:
+            self._ensure_loaded()
+            return {
+                "embedder": self._embedder.name,
+                "dim": self._embedder.dim,
+                "documents": len(self._slots),
+                "capacity": len(self._keys),
+                "built": self.built,
+            }
+
+
+_indexes: dict[str, VectorIndex] = {}
+_indexes_lock = Lock()
+
+
+def current() -> VectorIndex:
+    """The current profile's index."""
+    profile = current_profile()
+    index = _indexes.get(profile)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.setdefault(profile, VectorIndex(profile_dir(profile) / "vector_index"))
+    return index
+
+
+@profiles.on_evict
+def _evict(profile: str) -> bool:
+    index = _indexes.get(profile)
+    if index is None:
+        return True
+    if not index._lock.acquire(blocking=False):
+        return False
+    try:
+        with _indexes_lock:
+            _indexes.pop(profile, None)
+    finally:
+        index._lock.release()
+    return True
+
+
+def _knowledge_document(row: dict) -> tuple[str, str, str]:
+    return f"knowledge:{row['id']}", f"{row.get('title', '')}\n{row.get('markdown', '')}", str(row.get("title", ""))
+
+
+def _feed_document(row: dict) -> tuple[str, str, str]:
+    return f"feed:{row['id']}", f"{row.get('category', '')} {row.get('content', '')}", str(row.get("content", ""))
+
+
+def iter_documents() -> Iterable[tuple[str, str, str]]:
+    for row in read_json("knowledge.json", []):
+        yield _knowledge_document(row)
+    for row in read_json("feed.json", []):
+        yield _feed_document(row)
+
+
+def index_knowledge(row: dict) -> None:
+    current().upsert(*_knowledge_document(row))
+
+
+def index_feed(row: dict) -> None:
+    current().upsert(*_feed_document(row))
+
+
+def index_knowledge_many(rows: list[dict]) -> None:
+    current().upsert_many(_knowledge_document(row) for row in rows)
+
+
+def index_feed_many(rows: list[dict]) -> None:
+    current().upsert_many(_feed_document(row) for row in rows)
+
+
+def remove_document(source: str, item_id: int) -> None:
+    current().remove(f"{source}:{item_id}")
+
+
+def remove_documents(source: str, item_ids: Iterable[int]) -> None:
+    current().remove_many(f"{source}:{item_id}" for item_id in item_ids)
+
+
+def search(query: str, k: int, source: str | None = None) -> list[tuple[str, str, float]]:
+    # First use (or a changed embedder) builds the index from the stored collections.
+    index = current()
+    if not index.is_built():
+        index.rebuild(iter_documents())
+    return index.search(query, k, source)
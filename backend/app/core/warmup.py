@@ -0,0 +1,53 @@
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from functools import partial
+from typing import Any
+
+from app.core import store_io
+from app.core.repository import Collection
+
+_state: dict[str, Any] = {"ready": False, "started_at": None, "seconds": None, "collections": {}, "routers": {}, "errors": {}}
+
+
+def ready() -> bool:
+    return _state["ready"]
+
+
+def status() -> dict[str, Any]:
+    return {**_state, "collections": dict(_state["collections"]), "routers": dict(_state["routers"]), "errors": dict(_state["errors"])}
+
+
+async def _timed(kind: str, name: str, load: Callable[[], Awaitable[Any]]) -> None:
+    started = time.perf_counter()
+    try:
+        await load()
+    except Exception as exc:  # noqa: BLE001 - a bad file must not stop the rest of the warm-up
+        _state["errors"][name] = f"{type(exc).__name__}: {exc}"
+    _state[kind][name] = round(time.perf_counter() - started, 4)
+
+
+async def run(collections: dict[str, Collection], loaders: dict[str, Callable[[], Awaitable[Any]]]) -> None:
+    """Parse and validate collections in parallel on the store pool, then import lazy routers.
+
+    Readiness flips once every step has been attempted; failures are listed under ``errors`` so a
+    corrupt file shows up in /health/ready without keeping the process out of rotation forever.
+    """
+    _state["started_at"] = time.time()
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(
+            _timed("collections", name, partial(store_io.run_store, name, store.get))
+            for name, store in collections.items()
+        )
+    )
+    # Router imports contend for the import lock, so they go one at a time after the data is warm.
+    for name, load in loaders.items():
+        await _timed("routers", name, load)
+    _state["seconds"] = round(time.perf_counter() - started, 4)
+    _state["ready"] = True
+
+
+def mark_ready() -> None:
+    """Used when warm-up is disabled: the process is ready as soon as it serves."""
+    _state["ready"] = True
@@ -1,18 +1,92 @@
+import asyncio
+import sys
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api.routes_ai import router as ai_router
+from app.api.routes_assets import assets_store
 from app.api.routes_assets import router as assets_router
+from app.api.routes_changes import router as changes_router
+from app.api.routes_dashboard import router as dashboard_router
+from app.api.routes_feed import feed_store
 from app.api.routes_feed import router as feed_router
+from app.api.routes_health import metrics_router
 from app.api.routes_health import router as health_router
+from app.api.routes_knowledge import knowledge_store
 from app.api.routes_knowledge import router as knowledge_router
 from app.api.routes_settings import router as settings_router
+from app.api.routes_settings import settings_store
 from app.api.routes_sleep import router as sleep_router
+from app.api.routes_sleep import sleep_store
 from app.api.routes_tasks import router as tasks_router
+from app.api.routes_tasks import task_store
+from app.core import changes, store_io, warmup
 from app.core.config import settings
+from app.core.lazy_router import LazyRouter, include_lazy
+from app.core.metrics import MetricsMiddleware
+from app.core.profiler import ProfilingMiddleware
+from app.core.profiles import ProfileMiddleware
+from app.core.responses import CompressionMiddleware
+
+_COLLECTIONS = {
+    "settings": settings_store,
+    "tasks": task_store,
+    "feed": feed_store,
+    "sleep": sleep_store,
+    "assets": assets_store,
+    "knowledge": knowledge_store,
+}
+# Rarely used subsystems, imported on first request or by the warm-up task once data is loaded.
+_LAZY_ROUTERS = {
+    "/ai": "app.api.routes_ai",
+    "/search": "app.api.routes_search",
+    "/audit": "app.api.routes_audit",
+    "/archive": "app.api.routes_archive",
+    "/stats": "app.api.routes_stats",
+    "/admin": "app.api.routes_admin",
+}
+_lazy: list[LazyRouter] = []
+
+
+def _wait_for_lazy_loads() -> None:
+    for router in _lazy:
+        router.wait()
+
 
-app = FastAPI(title=settings.app_name)
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    warming = None
+    if settings.warmup_enabled:
+        names = [name.strip() for name in settings.warmup_collections.split(",") if name.strip()]
+        collections = {name: _COLLECTIONS[name] for name in names if name in _COLLECTIONS}
+        warming = asyncio.create_task(warmup.run(collections, {router.module: router.load_async for router in _lazy}))
+    else:
+        warmup.mark_ready()
+    changes.enable()
+    watching = asyncio.create_task(changes.poll_forever())
+    yield
+    watching.cancel()
+    try:
+        if warming is not None and not warming.done():
+            warming.cancel()
+        # Cancelling does not stop an import already running in a worker thread. Wait for it, so the
+        # modules below are either absent or fully initialised rather than half-imported.
+        await asyncio.to_thread(_wait_for_lazy_loads)
+        # Lazily loaded subsystems only need shutting down if they were imported.
+        if (aclose := getattr(sys.modules.get("app.core.ai_gateway"), "aclose", None)) is not None:
+            await aclose()
+        if (sessions := getattr(sys.modules.get("app.api.routes_ai"), "sessions", None)) is not None:
+            sessions.spill_all()
+    finally:
+        store_io.shutdown()
 
+
+app = FastAPI(title=settings.app_name, lifespan=lifespan)
+
+# Innermost, so a rejected X-Data-Profile header still gets CORS headers and is counted in metrics.
+app.add_middleware(ProfileMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000"],
@@ -21,14 +95,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(CompressionMiddleware)
+if settings.profiling_enabled:
+    app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(health_router)
-app.include_router(ai_router)
+app.include_router(metrics_router)
 app.include_router(assets_router)
 app.include_router(tasks_router)
 app.include_router(feed_router)
 app.include_router(knowledge_router)
 app.include_router(settings_router)
 app.include_router(sleep_router)
+app.include_router(dashboard_router)
+app.include_router(changes_router)
+
+for prefix, module in _LAZY_ROUTERS.items():
+    if settings.lazy_routers:
+        _lazy.append(include_lazy(app, prefix, module))
+    else:
+        LazyRouter(app, prefix, module).load()
 
 
 @app.get("/")
@@ -23,3 +23,30 @@ class AIParseRecordResponse(BaseModel):
     normalized_text: str
     extracted_amount: str | None = None
     extracted_time: str | None = None
+
+
+class AIParseRecordsRequest(BaseModel):
+    texts: list[str]
+
+
+class AIParseRecordsResponse(BaseModel):
+    results: list[AIParseRecordResponse]
+
+
+class ParseRule(BaseModel):
+    detected_type: str
+    suggested_category: str
+    keywords: list[str]
+
+
+class ParseTimeKeyword(BaseModel):
+    keyword: str
+    value: str = Field(description="literal value; 'today' resolves to the current date")
+
+
+class ParseRuleTable(BaseModel):
+    # Classifiers are evaluated by priority: the first rule with any matching keyword wins.
+    classifiers: list[ParseRule]
+    time_keywords: list[ParseTimeKeyword]
+    fallback_type: str = "feed"
+    fallback_category: str = "其他"
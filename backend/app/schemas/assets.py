@@ -1,8 +1,11 @@
 ﻿from datetime import date
 from decimal import Decimal
+from typing import Any, Self
 
 from pydantic import BaseModel
 
+from app.core.records import Record, amount_json, pack_amount, shared_date, shared_str, unpack_amount
+
 
 class TransactionCreate(BaseModel):
     account: str
@@ -26,3 +29,114 @@ class InvestmentLogCreate(BaseModel):
 
 class InvestmentLogOut(InvestmentLogCreate):
     id: int
+
+
+class TransactionRecord(Record):
+    """How a transaction is held in memory (see ``app.core.records``); ``TransactionOut`` is built from it."""
+
+    __slots__ = ("id", "account", "type", "category", "_amount", "happened_on", "note")
+    model = TransactionOut
+
+    def __init__(
+        self, id: int, account: str, type: str, category: str, amount: Decimal, happened_on: date | str, note: str | None
+    ) -> None:
+        self.id = id
+        self.account = shared_str(account)
+        self.type = shared_str(type)
+        self.category = shared_str(category)
+        self._amount = pack_amount(amount)
+        self.happened_on = shared_date(happened_on)
+        self.note = note
+
+    @property
+    def amount(self) -> Decimal:
+        return unpack_amount(self._amount)
+
+    @classmethod
+    def from_model(cls, item: TransactionOut) -> Self:
+        return cls(item.id, item.account, item.type, item.category, item.amount, item.happened_on, item.note)
+
+    @classmethod
+    def from_json(cls, row: dict[str, Any]) -> Self:
+        return cls(
+            int(row["id"]),
+            row["account"],
+            row["type"],
+            row["category"],
+            Decimal(str(row["amount"])),
+            row["happened_on"],
+            row.get("note"),
+        )
+
+    def fields(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "account": self.account,
+            "type": self.type,
+            "category": self.category,
+            "amount": self.amount,
+            "happened_on": self.happened_on,
+            "note": self.note,
+        }
+
+    def to_json(self) -> dict[str, Any]:
+        # Same keys, order and formatting as TransactionOut.model_dump(mode="json").
+        return {
+            "account": self.account,
+            "type": self.type,
+            "category": self.category,
+            "amount": amount_json(self._amount),
+            "happened_on": self.happened_on.isoformat(),
+            "note": self.note,
+            "id": self.id,
+        }
+
+
+class InvestmentLogRecord(Record):
+    """How an investment log is held in memory; ``InvestmentLogOut`` is built from it."""
+
+    __slots__ = ("id", "happened_on", "_invested", "_daily_profit", "note")
+    model = InvestmentLogOut
+
+    def __init__(self, id: int, happened_on: date | str, invested: Decimal, daily_profit: Decimal, note: str | None) -> None:
+        self.id = id
+        self.happened_on = shared_date(happened_on)
+        self._invested = pack_amount(invested)
+        self._daily_profit = pack_amount(daily_profit)
+        self.note = note
+
+    @property
+    def invested(self) -> Decimal:
+        return unpack_amount(self._invested)
+
+    @property
+    def daily_profit(self) -> Decimal:
+        return unpack_amount(self._daily_profit)
+
+    @classmethod
+    def from_model(cls, item: InvestmentLogOut) -> Self:
+        return cls(item.id, item.happened_on, item.invested, item.daily_profit, item.note)
+
+    @classmethod
+    def from_json(cls, row: dict[str, Any]) -> Self:
+        return cls(
+            int(row["id"]), row["happened_on"], Decimal(str(row["invested"])), Decimal(str(row["daily_profit"])), row.get("note")
+        )
+
+    def fields(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "happened_on": self.happened_on,
+            "invested": self.invested,
+            "daily_profit": self.daily_profit,
+            "note": self.note,
+        }
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "happened_on": self.happened_on.isoformat(),
+            "invested": amount_json(self._invested),
+            "daily_profit": amount_json(self._daily_profit),
+            "note": self.note,
+            "id": self.id,
+        }
@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+
+
+class SearchHit(BaseModel):
+    source: str
+    id: int
+    label: str
+    score: float
@@ -1,7 +1,27 @@
-from datetime import datetime
+from datetime import date, datetime
+from typing import Any
+
 from pydantic import BaseModel, ConfigDict, Field
 
 
+class RecurrenceRule(BaseModel):
+    freq: str = Field(description="daily/weekly/monthly")
+    interval: int = 1
+    by_weekday: list[int] | None = Field(default=None, description="0=Mon ... 6=Sun, weekly only")
+    until: date | None = None
+    count: int | None = None
+
+
+class TaskOccurrencePatch(BaseModel):
+    status: str | None = None
+    planned_start_at: datetime | None = None
+    planned_end_at: datetime | None = None
+    actual_start_at: datetime | None = None
+    actual_end_at: datetime | None = None
+    completed_at: datetime | None = None
+    note: str | None = None
+
+
 class TaskCreate(BaseModel):
     title: str
     category: str
@@ -14,6 +34,7 @@ class TaskCreate(BaseModel):
     actual_end_at: datetime | None = None
     completed_at: datetime | None = None
     note: str | None = None
+    recurrence: RecurrenceRule | None = None
 
     model_config = ConfigDict(populate_by_name=True)
 
@@ -30,9 +51,39 @@ class TaskUpdate(BaseModel):
     actual_end_at: datetime | None = None
     completed_at: datetime | None = None
     note: str | None = None
+    recurrence: RecurrenceRule | None = None
 
     model_config = ConfigDict(populate_by_name=True)
 
 
 class TaskOut(TaskCreate):
     id: int
+    # Sparse per-occurrence overrides keyed by the original occurrence date (YYYY-MM-DD).
+    exceptions: dict[str, TaskOccurrencePatch] = Field(default_factory=dict)
+
+
+class TaskOccurrenceOut(TaskCreate):
+    id: int
+    occurrence_date: date | None = None
+
+
+class TaskBatchOperation(BaseModel):
+    op: str = Field(description="create/update/delete")
+    id: int | None = None
+    data: dict[str, Any] | None = Field(default=None, description="TaskCreate body for create, TaskUpdate body for update")
+
+
+class TaskBatchRequest(BaseModel):
+    operations: list[TaskBatchOperation]
+
+
+class TaskBatchResult(BaseModel):
+    index: int
+    op: str
+    id: int
+    task: TaskOut | None = None
+    deleted: bool = False
+
+
+class TaskBatchResponse(BaseModel):
+    results: list[TaskBatchResult]
@@ -0,0 +1,107 @@
+"""Cold-start budget check: import time of ``app.main`` and time-to-first-byte of a fresh server process.
+
+Spawns ``uvicorn app.main:app`` on a free port and measures, from process spawn:
+the first byte of ``GET /health/``, the first full ``GET /dashboard/`` and ``/health/ready`` turning 200.
+Exits non-zero when the import time or TTFB exceeds its budget, so it can gate a deploy or CI job.
+
+    uv run python -m benchmarks.cold_start --runs 3 --import-budget 0.8 --ttfb-budget 1.5
+"""
+
+import argparse
+import http.client
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+_IMPORT_PROBE = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _get(port: int, path: str) -> tuple[int, bytes] | None:
+    try:
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        conn.request("GET", path)
+        response = conn.getresponse()
+        body = response.read()
+        conn.close()
+        return response.status, body
+    except OSError:
+        return None
+
+
+def measure_import() -> float:
+    output = subprocess.run([sys.executable, "-c", _IMPORT_PROBE], cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def measure_server(timeout: float = 30.0) -> dict[str, float]:
+    port = _free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+    )
+    result: dict[str, float] = {}
+    try:
+        while "ttfb" not in result:
+            if time.perf_counter() - started > timeout or process.poll() is not None:
+                raise RuntimeError("server did not answer /health/ in time")
+            if _get(port, "/health/") is not None:
+                result["ttfb"] = time.perf_counter() - started
+            else:
+                time.sleep(0.005)
+        response = _get(port, "/dashboard/")
+        result["dashboard"] = time.perf_counter() - started
+        if response is None or response[0] != 200:
+            raise RuntimeError(f"/dashboard/ failed: {response}")
+        while "ready" not in result:
+            if time.perf_counter() - started > timeout:
+                raise RuntimeError("server did not become ready in time")
+            response = _get(port, "/health/ready")
+            if response is not None and response[0] == 200:
+                result["ready"] = time.perf_counter() - started
+            else:
+                time.sleep(0.01)
+        return result
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--import-budget", type=float, default=0.8, help="seconds for `import app.main` (median)")
+    parser.add_argument("--ttfb-budget", type=float, default=1.5, help="seconds from spawn to first /health/ byte (median)")
+    args = parser.parse_args()
+
+    imports = [measure_import() for _ in range(args.runs)]
+    servers = [measure_server() for _ in range(args.runs)]
+    medians = {
+        "import": statistics.median(imports),
+        **{key: statistics.median(run[key] for run in servers) for key in ("ttfb", "dashboard", "ready")},
+    }
+    for key, value in medians.items():
+        print(f"{key:<10}{value * 1000:8.0f} ms")
+
+    failures = []
+    if medians["import"] > args.import_budget:
+        failures.append(f"import {medians['import']:.3f}s > budget {args.import_budget}s")
+    if medians["ttfb"] > args.ttfb_budget:
+        failures.append(f"ttfb {medians['ttfb']:.3f}s > budget {args.ttfb_budget}s")
+    if failures:
+        sys.exit("over budget: " + "; ".join(failures))
+    print("within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""Concurrent mixed read/write load test with lost-update detection.
+
+Drives the app in-process (httpx over ASGI, so the store worker pool and admission control are real) or a
+running server (``--url``) with ``--concurrency`` virtual users for ``--duration`` seconds. Each user picks
+requests from a weighted mix:
+
+    dashboard    GET /dashboard/
+    feed         POST /feed/
+    transaction  POST /assets/transactions
+    task         PUT /tasks/{id}   (each user owns its own tasks, so it is their only writer)
+
+Reports throughput, p50/p95/p99 latency and errors per route, then checks that no acknowledged write was
+lost: account balances must match the ledger, every acknowledged transaction and feed item must have its own
+id and be stored, and every task must hold the last note its owner wrote. Exits non-zero when a check fails
+or the error rate exceeds ``--max-error-rate``. All traffic goes to a fresh data profile (X-Data-Profile), so
+existing notebooks are untouched; in-process runs delete it afterwards unless ``--keep``.
+
+    uv run python -m benchmarks.loadtest --concurrency 32 --duration 10 --mix dashboard=70,feed=10,transaction=10,task=10
+    uv run python -m benchmarks.loadtest --url http://127.0.0.1:8000 --duration 30
+"""
+
+import argparse
+import asyncio
+import random
+import shutil
+import sys
+import time
+from collections import Counter, defaultdict
+from contextlib import AsyncExitStack
+from datetime import date
+from decimal import Decimal
+from typing import Any
+
+import httpx
+
+ROUTES = {
+    "dashboard": "GET /dashboard/",
+    "feed": "POST /feed/",
+    "transaction": "POST /assets/transactions",
+    "task": "PUT /tasks/{id}",
+}
+_CATEGORY = "loadtest"
+
+
+class Results:
+    def __init__(self) -> None:
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, Counter[str]] = defaultdict(Counter)
+        self.transactions: list[dict[str, Any]] = []
+        self.feed_ids: list[int] = []
+        # task id -> note of the last acknowledged PUT (each task has exactly one writer).
+        self.task_notes: dict[int, str] = {}
+
+
+def parse_mix(text: str) -> dict[str, int]:
+    mix: dict[str, int] = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ROUTES:
+            raise argparse.ArgumentTypeError(f"unknown workload {name!r}; choose from {', '.join(ROUTES)}")
+        mix[name] = int(weight or 1)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("the mix needs at least one positive weight")
+    return mix
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    # Nearest rank on an already sorted list.
+    return ordered[min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))]
+
+
+def _signed(row: dict[str, Any]) -> Decimal:
+    amount = Decimal(str(row["amount"]))
+    return amount if row["type"] == "income" else -amount
+
+
+async def _request(client: httpx.AsyncClient, results: Results, kind: str, method: str, path: str, body: Any = None) -> Any:
+    started = time.perf_counter()
+    try:
+        response = await client.request(method, path, json=body)
+    except httpx.HTTPError as exc:
+        results.latencies[kind].append(time.perf_counter() - started)
+        results.errors[kind][type(exc).__name__] += 1
+        return None
+    results.latencies[kind].append(time.perf_counter() - started)
+    if response.status_code >= 400:
+        results.errors[kind][str(response.status_code)] += 1
+        return None
+    return response.json()
+
+
+async def _user(
+    client: httpx.AsyncClient,
+    results: Results,
+    user: int,
+    mix: dict[str, int],
+    accounts: list[str],
+    tasks: list[int],
+    deadline: float,
+    rng: random.Random,
+) -> None:
+    names, weights = list(mix), list(mix.values())
+    sequence = 0
+    while time.perf_counter() < deadline:
+        kind = rng.choices(names, weights)[0]
+        sequence += 1
+        if kind == "dashboard":
+            await _request(client, results, kind, "GET", "/dashboard/")
+        elif kind == "feed":
+            row = await _request(client, results, kind, "POST", "/feed/", {"category": _CATEGORY, "content": f"u{user}-{sequence}"})
+            if row is not None:
+                results.feed_ids.append(row["id"])
+        elif kind == "transaction":
+            body = {
+                "account": rng.choice(accounts),
+                "type": rng.choice(("income", "expense")),
+                "category": _CATEGORY,
+                "amount": f"{rng.randint(1, 10000) / 100:.2f}",
+                "happened_on": date.today().isoformat(),
+                "note": f"u{user}-{sequence}",
+            }
+            row = await _request(client, results, kind, "POST", "/assets/transactions", body)
+            if row is not None:
+                results.transactions.append(row)
+        elif tasks:
+            task_id = rng.choice(tasks)
+            note = f"u{user}-{sequence}"
+            if await _request(client, results, kind, "PUT", f"/tasks/{task_id}", {"note": note}) is not None:
+                results.task_notes[task_id] = note
+
+
+async def _seed_tasks(client: httpx.AsyncClient, count: int) -> list[int]:
+    body = {
+        "operations": [
+            {"op": "create", "data": {"title": f"loadtest {index}", "category": _CATEGORY, "importance": "low"}}
+            for index in range(count)
+        ]
+    }
+    response = await client.post("/tasks/batch", json=body)
+    response.raise_for_status()
+    return [row["id"] for row in response.json()["results"]]
+
+
+async def _balances(client: httpx.AsyncClient) -> dict[str, Decimal]:
+    response = await client.get("/assets/accounts")
+    response.raise_for_status()
+    return {row["name"]: Decimal(str(row["balance"])) for row in response.json()}
+
+
+async def _verify(client: httpx.AsyncClient, results: Results, initial: dict[str, Decimal]) -> list[str]:
+    failures: list[str] = []
+
+    acked = [row["id"] for row in results.transactions]
+    duplicated = sorted(key for key, count in Counter(acked).items() if count > 1)
+    if duplicated:
+        failures.append(f"transactions: {len(duplicated)} ids acknowledged more than once (e.g. {duplicated[:5]})")
+    response = await client.get("/assets/transactions", params={"category": _CATEGORY})
+    response.raise_for_status()
+    ledger = response.json()
+    stored = Counter(row["id"] for row in ledger)
+    missing = set(acked) - set(stored)
+    if missing:
+        failures.append(f"transactions: {len(missing)} acknowledged rows missing from the ledger")
+    if any(count > 1 for count in stored.values()):
+        failures.append("transactions: duplicate ids in the ledger")
+    if len(ledger) != len(acked):
+        failures.append(f"transactions: ledger has {len(ledger)} rows, {len(acked)} were acknowledged")
+
+    final = await _balances(client)
+    expected: dict[str, Decimal] = defaultdict(Decimal)
+    for row in ledger:
+        expected[row["account"]] += _signed(row)
+    for name, balance in final.items():
+        delta = balance - initial.get(name, Decimal("0"))
+        if delta != expected[name]:
+            failures.append(f"balance {name}: moved {delta}, ledger says {expected[name]}")
+
+    duplicated = sorted(key for key, count in Counter(results.feed_ids).items() if count > 1)
+    if duplicated:
+        failures.append(f"feed: {len(duplicated)} ids acknowledged more than once (e.g. {duplicated[:5]})")
+    # GET /feed/ returns the newest 20 items; the last acknowledged ones must be among them.
+    response = await client.get("/feed/")
+    response.raise_for_status()
+    latest = {row["id"] for row in response.json()}
+    lost = [feed_id for feed_id in results.feed_ids[-5:] if feed_id not in latest]
+    if lost:
+        failures.append(f"feed: latest acknowledged items {lost} not stored")
+
+    response = await client.get("/tasks/")
+    response.raise_for_status()
+    notes = {row["id"]: row.get("note") for row in response.json()}
+    reverted = {task_id: note for task_id, note in results.task_notes.items() if notes.get(task_id) != note}
+    if reverted:
+        failures.append(f"tasks: {len(reverted)} tasks lost their last acknowledged update")
+    return failures
+
+
+def _report(results: Results, elapsed: float) -> tuple[int, int]:
+    print(f"{'route':<28}{'ok':>8}{'err':>6}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}  errors")
+    total_requests = total_errors = 0
+    for kind, route in ROUTES.items():
+        latencies = sorted(results.latencies.get(kind, []))
+        if not latencies:
+            continue
+        errors = sum(results.errors[kind].values())
+        total_requests += len(latencies)
+        total_errors += errors
+        detail = ", ".join(f"{code}x{count}" for code, count in results.errors[kind].most_common())
+        print(
+            f"{route:<28}{len(latencies) - errors:>8}{errors:>6}{len(latencies) / elapsed:>9.1f}"
+            f"{_percentile(latencies, 0.50) * 1000:>9.1f}{_percentile(latencies, 0.95) * 1000:>9.1f}"
+            f"{_percentile(latencies, 0.99) * 1000:>9.1f}  {detail}"
+        )
+    rate = total_errors / total_requests if total_requests else 0.0
+    print(f"{'total':<28}{total_requests - total_errors:>8}{total_errors:>6}{total_requests / elapsed:>9.1f}  error rate {rate:.2%}")
+    return total_requests, total_errors
+
+
+async def run(args: argparse.Namespace) -> int:
+    profile = args.profile or f"loadtest-{int(time.time())}"
+    headers = {"X-Data-Profile": profile}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with AsyncExitStack() as stack:
+        if args.url:
+            client = httpx.AsyncClient(base_url=args.url, headers=headers, limits=limits, timeout=args.timeout)
+        else:
+            from app.main import app
+
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            transport = httpx.ASGITransport(app=app)
+            client = httpx.AsyncClient(transport=transport, base_url="http://loadtest", headers=headers, timeout=args.timeout)
+        await stack.enter_async_context(client)
+
+        tasks = await _seed_tasks(client, args.concurrency) if args.mix.get("task") else []
+        accounts = list(initial := await _balances(client))
+        print(f"profile {profile}: {args.concurrency} users for {args.duration:g}s, mix {args.mix}")
+
+        started = time.perf_counter()
+        deadline = started + args.duration
+        results = Results()
+        await asyncio.gather(
+            *(
+                _user(client, results, user, args.mix, accounts, tasks[user :: args.concurrency], deadline, random.Random(args.seed + user))
+                for user in range(args.concurrency)
+            )
+        )
+        elapsed = time.perf_counter() - started
+        total, errors = _report(results, elapsed)
+        failures = await _verify(client, results, initial)
+
+    if not args.url and not args.keep:
+        from app.core import json_store
+
+        shutil.rmtree(json_store.profile_dir(profile), ignore_errors=True)
+
+    if total and errors / total > args.max_error_rate:
+        failures.append(f"error rate {errors / total:.2%} > {args.max_error_rate:.2%}")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if not failures:
+        print(f"consistent: {len(results.transactions)} transactions, {len(results.feed_ids)} feed items, {len(results.task_notes)} tasks verified")
+    return 1 if failures else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="load a running server instead of the in-process app")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("dashboard=70,feed=10,transaction=10,task=10"))
+    parser.add_argument("--profile", help="data profile to run in (default: a fresh loadtest-<time> profile)")
+    parser.add_argument("--keep", action="store_true", help="keep the in-process run's profile data")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="fraction of failed requests tolerated")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
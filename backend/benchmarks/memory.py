@@ -0,0 +1,104 @@
+"""Resident bytes per row of the cached assets collection: pydantic models vs compact records.
+
+Parses ``--rows`` synthetic rows per list the way ``assets.json`` is loaded, before (one model per row) and
+after (``app/core/records.py``: slots, shared strings and dates, integer cents), and reports the bytes each
+keeps alive (tracemalloc), the load time and the time to dump the rows back for a save. The dumps must be
+identical, so the file format is unchanged.
+
+    uv run python -m benchmarks.memory --rows 100000
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+from collections.abc import Callable
+from datetime import date, timedelta
+from typing import Any
+
+from app.schemas.assets import InvestmentLogOut, InvestmentLogRecord, TransactionOut, TransactionRecord
+
+_CATEGORIES = ("餐饮", "交通", "购物", "工资", "房租", "娱乐", "医疗", "教育")
+_ACCOUNTS = ("微信钱包", "支付宝钱包", "支付宝理财")
+
+
+def _transaction_rows(count: int) -> list[dict[str, Any]]:
+    return [
+        {
+            "account": _ACCOUNTS[i % len(_ACCOUNTS)],
+            "type": "expense" if i % 5 else "income",
+            "category": _CATEGORIES[i % len(_CATEGORIES)],
+            "amount": f"{i % 2000}.{i % 100:02d}",
+            "happened_on": (date(2020, 1, 1) + timedelta(days=i % 2500)).isoformat(),
+            "note": f"note {i}" if i % 4 == 0 else None,
+            "id": i + 1,
+        }
+        for i in range(count)
+    ]
+
+
+def _investment_rows(count: int) -> list[dict[str, Any]]:
+    return [
+        {
+            "happened_on": (date(2020, 1, 1) + timedelta(days=i % 3650)).isoformat(),
+            "invested": f"{10000 + i}.00",
+            "daily_profit": f"{(i % 300) - 100}.{i % 100:02d}",
+            "note": None,
+            "id": i + 1,
+        }
+        for i in range(count)
+    ]
+
+
+def _measure(parse: Callable[[dict[str, Any]], Any], raw: list[dict[str, Any]]) -> tuple[list[Any], int, float]:
+    """(rows, bytes they keep alive, seconds to parse); timed in a separate run, tracing slows it down."""
+    gc.collect()
+    started = time.perf_counter()
+    [parse(row) for row in raw]
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    rows = [parse(row) for row in raw]
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    return rows, size, elapsed
+
+
+def _timed(func: Callable[[list[Any]], Any], rows: list[Any]) -> tuple[Any, float]:
+    started = time.perf_counter()
+    result = func(rows)
+    return result, time.perf_counter() - started
+
+
+def run(count: int) -> None:
+    print(f"{count} rows per list; bytes are what the parsed rows keep alive (tracemalloc)")
+    print(f"{'collection':<20}{'before B/row':>13}{'after B/row':>12}{'saved':>8}{'load ms':>17}{'save ms':>17}")
+    for name, raw, model, record in (
+        ("transactions", _transaction_rows(count), TransactionOut, TransactionRecord),
+        ("investment logs", _investment_rows(count), InvestmentLogOut, InvestmentLogRecord),
+    ):
+        models, model_bytes, model_load = _measure(model.model_validate, raw)
+        model_dump, model_save = _timed(lambda rows: [row.model_dump(mode="json") for row in rows], models)
+        del models
+        records, record_bytes, record_load = _measure(record.from_json, raw)
+        record_dump, record_save = _timed(lambda rows: [row.to_json() for row in rows], records)
+        assert record_dump == model_dump == raw, f"{name}: records dump differently"
+        assert [row.to_model() for row in records[:1000]] == [model.model_validate(row) for row in raw[:1000]]
+        del records
+        print(
+            f"{name:<20}{model_bytes / count:13.0f}{record_bytes / count:12.0f}{1 - record_bytes / model_bytes:8.0%}"
+            f"{model_load * 1000:9.0f} → {record_load * 1000:<5.0f}{model_save * 1000:9.0f} → {record_save * 1000:<5.0f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+    run(args.rows)
+
+
+if __name__ == "__main__":
+    main()
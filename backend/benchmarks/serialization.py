@@ -0,0 +1,128 @@
+"""Serialization cost and bytes on the wire for large list responses.
+
+Compares FastAPI's default path (validate the returned rows against ``response_model``, then dump JSON,
+on the event loop for store routes) with the store worker fast path (dump trusted model rows directly),
+and the response size raw / gzip / br.
+
+    uv run python -m benchmarks.serialization --rows 10000
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.api.routes_knowledge import EntryOut
+from app.core import responses
+from app.schemas.assets import TransactionOut
+from app.schemas.tasks import TaskOut
+
+
+def _transactions(count: int) -> list[TransactionOut]:
+    return [
+        TransactionOut(
+            id=i,
+            account="微信钱包",
+            type="expense" if i % 3 else "income",
+            category=("餐饮", "交通", "购物", "工资")[i % 4],
+            amount=Decimal(i % 500) + Decimal("0.25"),
+            happened_on=date(2024, 1, 1) + timedelta(days=i % 700),
+            note=f"note {i}" if i % 2 else None,
+        )
+        for i in range(count)
+    ]
+
+
+def _tasks(count: int) -> list[TaskOut]:
+    start = datetime(2026, 1, 1, 8, 0)
+    return [
+        TaskOut.model_validate(
+            {
+                "id": i,
+                "title": f"task {i}",
+                "category": "日常",
+                "importance": "medium",
+                "type": "task",
+                "status": "todo",
+                "planned_start_at": start + timedelta(hours=i),
+                "planned_end_at": start + timedelta(hours=i, minutes=30),
+                "created_at": start,
+                "updated_at": start,
+            }
+        )
+        for i in range(count)
+    ]
+
+
+def _entries(count: int) -> list[EntryOut]:
+    now = datetime(2026, 1, 1, 8, 0)
+    return [
+        EntryOut(id=i, kind="note", title=f"entry {i}", markdown=f"# entry {i}\n\nsome markdown body " * 4, updated_at=now)
+        for i in range(count)
+    ]
+
+
+def _best(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def _trend(count: int) -> list[dict[str, str]]:
+    return [
+        {"date": (date(2024, 1, 1) + timedelta(days=i)).isoformat(), "invested": f"{i}.00", "daily_profit": "1.00"}
+        for i in range(count)
+    ]
+
+
+def run(rows: int, repeat: int) -> None:
+    print(f"{rows} rows, best of {repeat}; brotli={'yes' if responses.brotli else 'no (pip install brotli)'}")
+    print("before: FastAPI validates + dumps on the event loop; after: store worker dumps trusted rows")
+    print(f"{'response':<20}{'before ms':>10}{'after ms':>10}{'raw KB':>10}{'gzip KB':>10}{'gzip ms':>9}{'br KB':>8}{'br ms':>7}")
+    for name, annotation, data in (
+        ("transactions", list[TransactionOut], _transactions(rows)),
+        ("tasks", list[TaskOut], _tasks(rows)),
+        ("knowledge entries", list[EntryOut], _entries(rows)),
+        ("investment trend", list[dict[str, str]], _trend(rows)),
+    ):
+        # The same response field FastAPI builds for ``response_model=annotation``.
+        field = create_model_field(name="response", type_=annotation, mode="serialization")
+
+        def before() -> bytes:
+            return asyncio.run(serialize_response(field=field, response_content=data, dump_json=True))
+
+        def after() -> bytes:
+            return responses.encode_trusted(data, annotation)
+
+        body = after()
+        assert body == before(), f"{name}: fast path output differs"
+        gzip_body = responses.compress(body, "gzip")
+        gzip_ms = _best(lambda: responses.compress(body, "gzip"), repeat) * 1000
+        if responses.brotli is not None:
+            br_kb = f"{len(responses.compress(body, 'br')) / 1024:8.1f}"
+            br_ms = f"{_best(lambda: responses.compress(body, 'br'), repeat) * 1000:7.1f}"
+        else:
+            br_kb, br_ms = f"{'-':>8}", f"{'-':>7}"
+        print(
+            f"{name:<20}{_best(before, repeat) * 1000:10.1f}{_best(after, repeat) * 1000:10.1f}"
+            f"{len(body) / 1024:10.1f}{len(gzip_body) / 1024:10.1f}{gzip_ms:9.1f}{br_kb}{br_ms}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
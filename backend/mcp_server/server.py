@@ -1,60 +1,140 @@
 from __future__ import annotations
 
+import argparse
+import asyncio
+import functools
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from datetime import UTC, date, datetime
 from decimal import Decimal, InvalidOperation
-from typing import Any
+from threading import Lock
+from typing import Any, TypeVar
+from weakref import WeakKeyDictionary
 
+from fastapi import HTTPException
 from mcp.server.fastmcp import FastMCP
 from pydantic import BaseModel, ValidationError
 
-from app.core.json_store import DATA_DIR, read_json, write_json
-from app.schemas.assets import TransactionCreate, TransactionOut
-from app.schemas.tasks import TaskCreate, TaskOut
+from app.api import routes_assets, routes_feed, routes_knowledge, routes_settings, routes_sleep, routes_tasks
+from app.api.routes_search import semantic_search as _semantic_search
+from app.core import metrics, profiles
+from app.core.audit_log import audit_log
+from app.core.config import settings
+from app.core.json_store import current_profile, valid_profile
+from app.core.pagination import SortedIndex, decode_cursor, encode_cursor, parse_fields, project, time_value
+from app.core.repository import Collection
+from app.schemas.assets import TransactionCreate
+from app.schemas.sleep import SleepLogCreate, SleepLogOut
+from app.schemas.tasks import TaskBatchOperation, TaskCreate, TaskOut, TaskUpdate
 
-mcp = FastMCP("life-notebook")
+mcp = FastMCP("life-notebook", host=settings.mcp_host, port=settings.mcp_port)
 
-TASKS_FILE = "tasks.json"
-SLEEP_FILE = "sleep.json"
-FEED_FILE = "feed.json"
-KNOWLEDGE_FILE = "knowledge.json"
-ASSETS_FILE = "assets.json"
-SETTINGS_FILE = "settings.json"
+T = TypeVar("T")
 
-AUDIT_FILE = DATA_DIR / "mcp_audit.log"
+_executor: ThreadPoolExecutor | None = None
 
-DEFAULT_ASSETS = {
-    "accounts": [
-        {"name": "WeChat Wallet", "is_cash": True, "balance": "0.00"},
-        {"name": "Alipay Wallet", "is_cash": True, "balance": "0.00"},
-        {"name": "Alipay Investment", "is_cash": False, "balance": "0.00"},
-    ],
-    "transactions": [],
-    "investment_logs": [],
-}
 
-class SettingsPayload(BaseModel):
-    default_provider: str
-    model_name: str
-    theme: str
-    local_only: bool
+class _ToolStats:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
 
 
-class SleepLogCreate(BaseModel):
-    start_at: datetime
-    end_at: datetime
-    note: str | None = None
+_tool_stats: dict[str, _ToolStats] = {}
+_stats_lock = Lock()
+# Profile picked with profile_use, per client session; forgotten when the session goes away.
+_session_profiles: WeakKeyDictionary[Any, str] = WeakKeyDictionary()
 
 
-class SleepLogOut(SleepLogCreate):
-    id: int
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=max(1, settings.mcp_max_concurrency), thread_name_prefix="mcp-tool")
+    return _executor
 
 
-DEFAULT_SETTINGS = SettingsPayload(
-    default_provider="codex",
-    model_name="gpt-5-codex",
-    theme="sci-fi",
-    local_only=True,
-).model_dump(mode="json")
+def _session_profile() -> str | None:
+    """The calling session's profile: profile_use, else an X-Data-Profile header (HTTP transports), else MCP_PROFILE."""
+    try:
+        request_context = mcp.get_context().request_context
+    except ValueError:
+        return settings.mcp_profile
+    profile = _session_profiles.get(request_context.session)
+    if profile is None and request_context.request is not None:
+        profile = request_context.request.headers.get(profiles.HEADER)
+    return profile or settings.mcp_profile
+
+
+def _run_locked(
+    func: Callable[..., T],
+    reads: tuple[Collection, ...],
+    writes: tuple[Collection, ...],
+    kwargs: dict[str, Any],
+    profile: str | None,
+) -> T:
+    with profiles.active(profile):
+        return _run_in_profile(func, reads, writes, kwargs)
+
+
+def _run_in_profile(func: Callable[..., T], reads: tuple[Collection, ...], writes: tuple[Collection, ...], kwargs: dict[str, Any]) -> T:
+    # Locks are always taken in file-name order so two tools touching the same pair cannot deadlock.
+    locks = sorted([(store.name, store, False) for store in reads] + [(store.name, store, True) for store in writes], key=lambda item: item[0])
+    acquired: list[tuple[Collection, bool]] = []
+    try:
+        for _, store, write in locks:
+            if write:
+                store.rw.acquire_write()
+            else:
+                store.rw.acquire_read()
+            acquired.append((store, write))
+        return func(**kwargs)
+    finally:
+        for store, write in reversed(acquired):
+            if write:
+                store.rw.release_write()
+            else:
+                store.rw.release_read()
+
+
+def _tool(reads: tuple[Collection, ...] = (), writes: tuple[Collection, ...] = ()) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Register a sync tool that runs on the bounded worker pool under per-collection read/write locks.
+
+    The undecorated function is returned, so tools stay directly callable from Python.
+    """
+
+    def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        stats = _tool_stats.setdefault(func.__name__, _ToolStats())
+
+        @functools.wraps(func)
+        async def run(**kwargs: Any) -> T:
+            loop = asyncio.get_running_loop()
+            started = time.perf_counter()
+            with _stats_lock:
+                stats.in_flight += 1
+            failed = False
+            try:
+                return await loop.run_in_executor(_get_executor(), _run_locked, func, reads, writes, kwargs, _session_profile())
+            except Exception:
+                failed = True
+                raise
+            finally:
+                elapsed = time.perf_counter() - started
+                with _stats_lock:
+                    stats.in_flight -= 1
+                    stats.calls += 1
+                    stats.errors += failed
+                    stats.total_seconds += elapsed
+                    stats.max_seconds = max(stats.max_seconds, elapsed)
+                metrics.observe("mcp_tool_duration_seconds", (func.__name__, "error" if failed else "ok"), elapsed)
+
+        mcp.add_tool(run, name=func.__name__, description=func.__doc__)
+        return func
+
+    return decorator
 
 
 def _now_iso() -> str:
@@ -62,15 +142,17 @@ def _now_iso() -> str:
 
 
 def _append_audit(tool: str, payload: dict[str, Any]) -> None:
-    row = {"time": _now_iso(), "tool": tool, "payload": payload}
-    line = f"{row}\n"
-    AUDIT_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with AUDIT_FILE.open("a", encoding="utf-8") as f:
-        f.write(line)
+    audit_log.append(tool, payload)
 
 
-def _next_id(rows: list[dict[str, Any]]) -> int:
-    return max([int(row.get("id", 0)) for row in rows], default=0) + 1
+def _call(func: Callable[..., T], *args: Any) -> T:
+    """Run router domain logic, surfacing HTTP/validation errors as tool errors."""
+    try:
+        return func(*args)
+    except ValidationError as exc:
+        raise ValueError(str(exc)) from exc
+    except HTTPException as exc:
+        raise ValueError(str(exc.detail)) from exc
 
 
 def _parse_decimal(amount: str) -> Decimal:
@@ -83,66 +165,85 @@ def _parse_decimal(amount: str) -> Decimal:
     return value
 
 
-def _load_tasks() -> list[TaskOut]:
-    rows = read_json(TASKS_FILE, [])
-    return [TaskOut.model_validate(row) for row in rows]
-
-
-def _save_tasks(tasks: list[TaskOut]) -> None:
-    write_json(TASKS_FILE, [row.model_dump(mode="json") for row in tasks])
-
-
-def _load_sleep() -> list[SleepLogOut]:
-    rows = read_json(SLEEP_FILE, [])
-    return [SleepLogOut.model_validate(row) for row in rows]
-
-
-def _save_sleep(rows: list[SleepLogOut]) -> None:
-    write_json(SLEEP_FILE, [row.model_dump(mode="json") for row in rows])
-
+def _validate_items(items: list[dict[str, Any]], parse: Callable[[dict[str, Any]], T]) -> list[T]:
+    """Parse every batch item before anything is written; the first bad item rejects the batch."""
+    parsed: list[T] = []
+    for index, item in enumerate(items):
+        try:
+            parsed.append(parse(item))
+        except (ValidationError, ValueError, TypeError) as exc:
+            raise ValueError(f"item {index}: {exc}") from exc
+    return parsed
 
-def _load_feed() -> list[dict[str, Any]]:
-    return read_json(FEED_FILE, [])
 
+def _task_body(task: Any) -> dict[str, Any]:
+    return task.model_dump(mode="json", by_alias=True)
 
-def _save_feed(rows: list[dict[str, Any]]) -> None:
-    write_json(FEED_FILE, rows)
 
-
-def _load_knowledge() -> list[dict[str, Any]]:
-    return read_json(KNOWLEDGE_FILE, [])
-
-
-def _save_knowledge(rows: list[dict[str, Any]]) -> None:
-    write_json(KNOWLEDGE_FILE, rows)
-
-
-def _load_assets() -> dict[str, Any]:
-    return read_json(ASSETS_FILE, DEFAULT_ASSETS)
-
-
-def _save_assets(state: dict[str, Any]) -> None:
-    write_json(ASSETS_FILE, state)
-
-
-def _load_settings() -> dict[str, Any]:
-    return read_json(SETTINGS_FILE, DEFAULT_SETTINGS)
+def _list_page(
+    store: Collection,
+    index_name: str,
+    key: Callable[[Any], tuple[float, int] | None],
+    model: type[BaseModel],
+    limit: int,
+    cursor: str | None,
+    fields: str | None,
+    since: str | None,
+    predicate: Callable[[Any], bool] | None = None,
+) -> dict[str, Any]:
+    """One newest-first page from a sorted index cached on the collection until its next load or save."""
+    include = parse_fields(fields, model)
+    after = decode_cursor(cursor, index_name) if cursor else None
+    since_value = time_value(datetime.fromisoformat(since)) if since else None
+    index = store.derived(index_name, lambda rows: SortedIndex(index_name, rows, key))
+    rows, next_key = index.page_desc(max(1, min(limit, 200)), after, since_value, predicate)
+    return {
+        "items": [project(row, include) for row in rows],
+        "next_cursor": encode_cursor(index_name, next_key) if next_key else None,
+    }
 
 
-@mcp.tool()
+@_tool()
 def health_ping() -> dict[str, str]:
     """Health check for MCP server."""
-    return {"status": "ok", "time": _now_iso()}
+    return {"status": "ok", "time": _now_iso(), "profile": current_profile()}
 
 
 @mcp.tool()
-def task_list(limit: int = 50) -> list[dict[str, Any]]:
-    """List tasks ordered by id desc."""
-    tasks = list(reversed(_load_tasks()))
-    return [row.model_dump(mode="json") for row in tasks[: max(1, min(limit, 200))]]
+async def profile_use(profile: str) -> dict[str, str]:
+    """Serve this session's later tool calls from another notebook profile (letters, digits, '_', '-', '.')."""
+    if not valid_profile(profile):
+        raise ValueError("invalid profile name")
+    _session_profiles[mcp.get_context().session] = profile
+    return {"profile": profile}
+
+
+@_tool(reads=(routes_tasks.task_store,))
+def task_list(
+    limit: int = 50,
+    cursor: str | None = None,
+    fields: str | None = None,
+    since: str | None = None,
+) -> dict[str, Any]:
+    """List tasks by id desc, or by planned start desc with since (ISO, planned_start_at >= since).
+
+    fields: comma-separated output fields, e.g. "id,title,status". Pass next_cursor back as cursor for the next page.
+    """
+    if since:
+        return _list_page(
+            routes_tasks.task_store,
+            "tasks_by_planned_start",
+            lambda row: (time_value(row.planned_start_at), row.id) if row.planned_start_at else None,
+            TaskOut,
+            limit,
+            cursor,
+            fields,
+            since,
+        )
+    return _list_page(routes_tasks.task_store, "tasks_by_id", lambda row: (row.id, row.id), TaskOut, limit, cursor, fields, None)
 
 
-@mcp.tool()
+@_tool(writes=(routes_tasks.task_store,))
 def task_create(
     title: str,
     category: str = "general",
@@ -150,48 +251,33 @@ def task_create(
     start_at: str | None = None,
     end_at: str | None = None,
 ) -> dict[str, Any]:
-    """Create one task."""
-    try:
-        payload = TaskCreate(
-            title=title,
-            category=category,
-            importance=importance,
-            start_at=start_at,
-            end_at=end_at,
-        )
-    except ValidationError as exc:
-        raise ValueError(str(exc)) from exc
-
-    if payload.start_at and payload.end_at and payload.end_at <= payload.start_at:
-        raise ValueError("end_at must be later than start_at")
-
-    tasks = _load_tasks()
-    next_id = max([row.id for row in tasks], default=0) + 1
-    task = TaskOut(id=next_id, **payload.model_dump())
-    tasks.append(task)
-    _save_tasks(tasks)
-    body = task.model_dump(mode="json")
-    _append_audit("task_create", {"id": next_id, "title": title})
-    return body
-
-
-@mcp.tool()
+    """Create one task; start_at/end_at are the planned ISO start and end times."""
+    payload = _call(
+        TaskCreate.model_validate,
+        {
+            "title": title,
+            "category": category,
+            "importance": importance,
+            "planned_start_at": start_at,
+            "planned_end_at": end_at,
+        },
+    )
+    task = _call(routes_tasks.create_task, payload)
+    _append_audit("task_create", {"id": task.id, "title": title})
+    return _task_body(task)
+
+
+@_tool(writes=(routes_tasks.task_store,))
 def task_delete(task_id: int, confirm: bool = False) -> dict[str, Any]:
     """Delete one task (confirm=true required)."""
     if not confirm:
         raise ValueError("confirm must be true to delete task")
-
-    tasks = _load_tasks()
-    new_rows = [row for row in tasks if row.id != task_id]
-    if len(new_rows) == len(tasks):
-        raise ValueError("task not found")
-
-    _save_tasks(new_rows)
+    result = _call(routes_tasks.delete_task, task_id)
     _append_audit("task_delete", {"id": task_id})
-    return {"deleted": True, "id": task_id}
+    return result
 
 
-@mcp.tool()
+@_tool(writes=(routes_tasks.task_store,))
 def task_update(
     task_id: int,
     title: str | None = None,
@@ -200,180 +286,245 @@ def task_update(
     start_at: str | None = None,
     end_at: str | None = None,
 ) -> dict[str, Any]:
-    """Update one task. Any None field keeps original value."""
-    tasks = _load_tasks()
-    target = next((row for row in tasks if row.id == task_id), None)
-    if not target:
-        raise ValueError("task not found")
-
-    merged = target.model_dump(mode="python")
-    if title is not None:
-        merged["title"] = title
-    if category is not None:
-        merged["category"] = category
-    if importance is not None:
-        merged["importance"] = importance
-    if start_at is not None:
-        merged["start_at"] = datetime.fromisoformat(start_at)
-    if end_at is not None:
-        merged["end_at"] = datetime.fromisoformat(end_at)
-
-    if merged.get("start_at") and merged.get("end_at") and merged["end_at"] <= merged["start_at"]:
-        raise ValueError("end_at must be later than start_at")
-
-    updated = TaskOut.model_validate(merged)
-    rows = [updated if row.id == task_id else row for row in tasks]
-    _save_tasks(rows)
+    """Update one task; start_at/end_at are the planned times. Any None field keeps original value."""
+    fields = {
+        "title": title,
+        "category": category,
+        "importance": importance,
+        "planned_start_at": start_at,
+        "planned_end_at": end_at,
+    }
+    payload = _call(TaskUpdate.model_validate, {name: value for name, value in fields.items() if value is not None})
+    task = _call(routes_tasks.update_task, task_id, payload)
     _append_audit("task_update", {"id": task_id})
-    return updated.model_dump(mode="json")
+    return _task_body(task)
 
 
-@mcp.tool()
+@_tool(writes=(routes_tasks.task_store,))
 def task_mark_done(task_id: int, done_at: str | None = None) -> dict[str, Any]:
-    """Mark one task as done by setting end_at (legacy task model)."""
-    tasks = _load_tasks()
-    target = next((row for row in tasks if row.id == task_id), None)
-    if not target:
+    """Mark one task as done; done_at (ISO) defaults to now."""
+    current = next((row for row in routes_tasks.task_store.get() if row.id == task_id), None)
+    if current is None:
         raise ValueError("task not found")
-    if target.end_at:
-        return target.model_dump(mode="json")
-
-    end_time = datetime.fromisoformat(done_at) if done_at else datetime.now(UTC)
-    if target.start_at and end_time <= target.start_at:
-        end_time = target.start_at
-
-    merged = target.model_dump(mode="python")
-    merged["end_at"] = end_time
-    updated = TaskOut.model_validate(merged)
-    rows = [updated if row.id == task_id else row for row in tasks]
-    _save_tasks(rows)
+    if current.status == "done":
+        return _task_body(current)
+
+    fields: dict[str, Any] = {"status": "done"}
+    if done_at:
+        fields["completed_at"] = done_at
+    task = _call(routes_tasks.update_task, task_id, _call(TaskUpdate.model_validate, fields))
     _append_audit("task_mark_done", {"id": task_id})
-    return updated.model_dump(mode="json")
+    return _task_body(task)
 
 
-@mcp.tool()
-def sleep_log_list(limit: int = 30) -> list[dict[str, Any]]:
-    """List sleep logs ordered by end time desc."""
-    rows = sorted(_load_sleep(), key=lambda row: row.end_at, reverse=True)
-    return [row.model_dump(mode="json") for row in rows[: max(1, min(limit, 200))]]
+@_tool(writes=(routes_tasks.task_store,))
+def task_batch(operations: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Apply task create/update/delete operations atomically with a single write.
 
+    Each operation is {"op": "create|update|delete", "id": int, "data": {...}} using the /tasks/ field names.
+    """
+    parsed = [_call(TaskBatchOperation.model_validate, row) for row in operations]
+    results = _call(routes_tasks.apply_task_batch, parsed)
+    _append_audit("task_batch", {"count": len(results), "ids": [row.id for row in results]})
+    return [row.model_dump(mode="json", by_alias=True) for row in results]
 
-@mcp.tool()
+
+@_tool(writes=(routes_tasks.task_store,))
+def task_create_many(tasks: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Create several tasks atomically with a single write. Items use the /tasks/ field names."""
+    payloads = _validate_items(tasks, TaskCreate.model_validate)
+    operations = [TaskBatchOperation(op="create", data=payload.model_dump(mode="json", by_alias=True)) for payload in payloads]
+    results = _call(routes_tasks.apply_task_batch, operations)
+    _append_audit("task_create_many", {"count": len(results), "ids": [row.id for row in results]})
+    return [_task_body(row.task) for row in results]
+
+
+@_tool(reads=(routes_sleep.sleep_store,))
+def sleep_log_list(
+    limit: int = 30,
+    cursor: str | None = None,
+    fields: str | None = None,
+    since: str | None = None,
+) -> dict[str, Any]:
+    """List sleep logs ordered by end time desc; since (ISO) keeps logs ending at or after it.
+
+    fields: comma-separated output fields. Pass next_cursor back as cursor for the next page.
+    """
+    return _list_page(
+        routes_sleep.sleep_store,
+        "sleep_by_end",
+        lambda row: (time_value(row.end_at), row.id),
+        SleepLogOut,
+        limit,
+        cursor,
+        fields,
+        since,
+    )
+
+
+@_tool(writes=(routes_sleep.sleep_store,))
 def sleep_log_create(start_at: str, end_at: str, note: str | None = None) -> dict[str, Any]:
     """Create one sleep log."""
-    try:
-        payload = SleepLogCreate(start_at=start_at, end_at=end_at, note=note)
-    except ValidationError as exc:
-        raise ValueError(str(exc)) from exc
-    if payload.end_at <= payload.start_at:
-        raise ValueError("end_at must be later than start_at")
-
-    rows = _load_sleep()
-    next_id = max([row.id for row in rows], default=0) + 1
-    item = SleepLogOut(id=next_id, **payload.model_dump())
-    rows.append(item)
-    _save_sleep(rows)
-    _append_audit("sleep_log_create", {"id": next_id})
+    payload = _call(SleepLogCreate.model_validate, {"start_at": start_at, "end_at": end_at, "note": note})
+    item = _call(routes_sleep.create_sleep_log, payload)
+    _append_audit("sleep_log_create", {"id": item.id})
     return item.model_dump(mode="json")
 
 
-@mcp.tool()
+@_tool(writes=(routes_sleep.sleep_store,))
 def sleep_log_delete(log_id: int, confirm: bool = False) -> dict[str, Any]:
     """Delete one sleep log (confirm=true required)."""
     if not confirm:
         raise ValueError("confirm must be true to delete sleep log")
-    rows = _load_sleep()
-    new_rows = [row for row in rows if row.id != log_id]
-    if len(new_rows) == len(rows):
-        raise ValueError("sleep log not found")
-    _save_sleep(new_rows)
+    result = _call(routes_sleep.delete_sleep_log, log_id)
     _append_audit("sleep_log_delete", {"id": log_id})
-    return {"deleted": True, "id": log_id}
-
+    return result
 
-@mcp.tool()
-def feed_list(limit: int = 20) -> list[dict[str, Any]]:
-    """List feed items, newest first."""
-    rows = list(reversed(_load_feed()))
-    return rows[: max(1, min(limit, 200))]
 
-
-@mcp.tool()
+@_tool(reads=(routes_feed.feed_store,))
+def feed_list(
+    limit: int = 20,
+    cursor: str | None = None,
+    fields: str | None = None,
+    since: str | None = None,
+) -> dict[str, Any]:
+    """List feed items, newest first; since (ISO) keeps items created at or after it.
+
+    fields: comma-separated output fields. Pass next_cursor back as cursor for the next page.
+    """
+    return _list_page(
+        routes_feed.feed_store,
+        "feed_by_created",
+        lambda row: (time_value(row.created_at), row.id),
+        routes_feed.FeedOut,
+        limit,
+        cursor,
+        fields,
+        since,
+    )
+
+
+@_tool(writes=(routes_feed.feed_store,))
 def feed_add(category: str, content: str) -> dict[str, Any]:
     """Create one feed item."""
-    rows = _load_feed()
-    item = {"id": _next_id(rows), "category": category, "content": content, "created_at": _now_iso()}
-    rows.append(item)
-    _save_feed(rows)
-    _append_audit("feed_add", {"id": item["id"], "category": category})
-    return item
+    item = _call(routes_feed.create_feed, routes_feed.FeedCreate(category=category, content=content))
+    _append_audit("feed_add", {"id": item.id, "category": category})
+    return item.model_dump(mode="json")
 
 
-@mcp.tool()
-def knowledge_list(kind: str | None = None, query: str | None = None, limit: int = 30) -> list[dict[str, Any]]:
-    """List knowledge entries by kind/query."""
-    rows = _load_knowledge()
-    if kind:
-        rows = [row for row in rows if row.get("kind") == kind]
-    if query:
-        q = query.lower()
-        rows = [row for row in rows if q in str(row.get("title", "")).lower() or q in str(row.get("markdown", "")).lower()]
-    rows = sorted(rows, key=lambda row: str(row.get("updated_at", "")), reverse=True)
-    return rows[: max(1, min(limit, 200))]
+@_tool(writes=(routes_feed.feed_store,))
+def feed_add_many(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Create several feed items ({"category", "content"}) with a single write."""
+    payloads = _validate_items(items, routes_feed.FeedCreate.model_validate)
+    created = _call(routes_feed.create_feeds, payloads)
+    _append_audit("feed_add_many", {"count": len(created), "ids": [item.id for item in created]})
+    return [item.model_dump(mode="json") for item in created]
 
 
-@mcp.tool()
+@_tool(reads=(routes_knowledge.knowledge_store,))
+def knowledge_list(
+    kind: str | None = None,
+    query: str | None = None,
+    limit: int = 30,
+    cursor: str | None = None,
+    fields: str | None = None,
+    since: str | None = None,
+) -> dict[str, Any]:
+    """List knowledge entries by kind/query, most recently updated first; since (ISO) filters on updated_at.
+
+    fields: comma-separated output fields, e.g. "id,kind,title" to skip markdown bodies.
+    Pass next_cursor back as cursor for the next page.
+    """
+    q = query.lower() if query else None
+
+    def matches(row: routes_knowledge.EntryOut) -> bool:
+        if kind and row.kind != kind:
+            return False
+        return q is None or q in row.title.lower() or q in row.markdown.lower()
+
+    return _list_page(
+        routes_knowledge.knowledge_store,
+        "knowledge_by_updated",
+        lambda row: (time_value(row.updated_at), row.id),
+        routes_knowledge.EntryOut,
+        limit,
+        cursor,
+        fields,
+        since,
+        matches if kind or q else None,
+    )
+
+
+@_tool(writes=(routes_knowledge.knowledge_store,))
 def knowledge_add(kind: str, title: str, markdown: str) -> dict[str, Any]:
     """Create one knowledge entry."""
     if kind not in {"entry", "blog"}:
         raise ValueError("kind must be entry or blog")
-    rows = _load_knowledge()
-    item = {
-        "id": _next_id(rows),
-        "kind": kind,
-        "title": title,
-        "markdown": markdown,
-        "updated_at": _now_iso(),
-    }
-    rows.append(item)
-    _save_knowledge(rows)
-    _append_audit("knowledge_add", {"id": item["id"], "kind": kind})
-    return item
+    payload = routes_knowledge.EntryCreate(kind=kind, title=title, markdown=markdown)
+    item = _call(routes_knowledge.create_entry, payload)
+    _append_audit("knowledge_add", {"id": item.id, "kind": kind})
+    return item.model_dump(mode="json")
 
 
-@mcp.tool()
+def _parse_entry(item: dict[str, Any]) -> routes_knowledge.EntryCreate:
+    payload = routes_knowledge.EntryCreate.model_validate(item)
+    if payload.kind not in {"entry", "blog"}:
+        raise ValueError("kind must be entry or blog")
+    return payload
+
+
+@_tool(writes=(routes_knowledge.knowledge_store,))
+def knowledge_add_many(entries: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Create several knowledge entries ({"kind", "title", "markdown"}) with a single write."""
+    payloads = _validate_items(entries, _parse_entry)
+    created = _call(routes_knowledge.create_entries, payloads)
+    _append_audit("knowledge_add_many", {"count": len(created), "ids": [item.id for item in created]})
+    return [item.model_dump(mode="json") for item in created]
+
+
+@_tool(writes=(routes_knowledge.knowledge_store,))
 def knowledge_delete(entry_id: int, confirm: bool = False) -> dict[str, Any]:
     """Delete one knowledge entry (confirm=true required)."""
     if not confirm:
         raise ValueError("confirm must be true to delete knowledge entry")
-    rows = _load_knowledge()
-    new_rows = [row for row in rows if int(row.get("id", 0)) != entry_id]
-    if len(new_rows) == len(rows):
-        raise ValueError("entry not found")
-    _save_knowledge(new_rows)
+    result = _call(routes_knowledge.delete_entry, entry_id)
     _append_audit("knowledge_delete", {"id": entry_id})
-    return {"deleted": True, "id": entry_id}
+    return result
 
 
-@mcp.tool()
+@_tool(reads=(routes_feed.feed_store, routes_knowledge.knowledge_store))
+def semantic_search(query: str, k: int = 10, source: str | None = None) -> list[dict[str, Any]]:
+    """Find knowledge entries / feed items by meaning (local vectors). source: knowledge/feed."""
+    return [row.model_dump(mode="json") for row in _semantic_search(query, max(1, min(k, 100)), source)]
+
+
+@_tool(reads=(routes_assets.assets_store,))
 def asset_list_accounts() -> list[dict[str, Any]]:
     """List asset accounts."""
-    state = _load_assets()
-    return state.get("accounts", [])
+    return routes_assets.list_accounts()
 
 
-@mcp.tool()
+@_tool(reads=(routes_assets.assets_store,))
 def asset_cash_total() -> dict[str, str]:
     """Get total cash across cash accounts."""
-    state = _load_assets()
-    total = Decimal("0")
-    for account in state.get("accounts", []):
-        if account.get("is_cash"):
-            total += Decimal(str(account.get("balance", "0")))
-    return {"currency": "CNY", "cash_total": f"{total:.2f}"}
+    return routes_assets.cash_total()
 
 
-@mcp.tool()
+def _parse_transaction(item: dict[str, Any]) -> TransactionCreate:
+    tx_type = item.get("tx_type")
+    if tx_type not in {"income", "expense"}:
+        raise ValueError("tx_type must be income or expense")
+    return TransactionCreate(
+        account=item.get("account"),
+        type=tx_type,
+        category=item.get("category"),
+        amount=_parse_decimal(str(item.get("amount"))),
+        happened_on=date.fromisoformat(str(item.get("happened_on"))),
+        note=item.get("note"),
+    )
+
+
+@_tool(writes=(routes_assets.assets_store,))
 def asset_record_transaction(
     account: str,
     tx_type: str,
@@ -383,52 +534,65 @@ def asset_record_transaction(
     note: str | None = None,
 ) -> dict[str, Any]:
     """Create one asset transaction and update account balance."""
-    if tx_type not in {"income", "expense"}:
-        raise ValueError("tx_type must be income or expense")
-    dec_amount = _parse_decimal(amount)
-
+    fields = {
+        "account": account,
+        "tx_type": tx_type,
+        "category": category,
+        "amount": amount,
+        "happened_on": happened_on,
+        "note": note,
+    }
     try:
-        payload = TransactionCreate(
-            account=account,
-            type=tx_type,
-            category=category,
-            amount=dec_amount,
-            happened_on=date.fromisoformat(happened_on),
-            note=note,
-        )
+        payload = _parse_transaction(fields)
     except (ValidationError, ValueError) as exc:
         raise ValueError(str(exc)) from exc
 
-    state = _load_assets()
-    accounts = state.get("accounts", [])
-    account_map = {row.get("name"): row for row in accounts}
-    account_row = account_map.get(account)
-    if not account_row:
-        raise ValueError("account not found")
-
-    rows = [TransactionOut.model_validate(row) for row in state.get("transactions", [])]
-    next_id = max([row.id for row in rows], default=0) + 1
-    row = TransactionOut(id=next_id, **payload.model_dump())
-    rows.append(row)
-
-    balance = Decimal(str(account_row.get("balance", "0")))
-    balance = balance + dec_amount if tx_type == "income" else balance - dec_amount
-    account_row["balance"] = f"{balance:.2f}"
-
-    state["transactions"] = [item.model_dump(mode="json") for item in rows]
-    _save_assets(state)
-    _append_audit("asset_record_transaction", {"id": next_id, "account": account, "tx_type": tx_type})
+    row = _call(routes_assets.create_transaction, payload)
+    _append_audit("asset_record_transaction", {"id": row.id, "account": account, "tx_type": tx_type})
     return row.model_dump(mode="json")
 
 
-@mcp.tool()
+@_tool(writes=(routes_assets.assets_store,))
+def asset_record_transactions(transactions: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Record several transactions atomically with a single write; each account balance is updated once.
+
+    Items use the asset_record_transaction arguments: account, tx_type, category, amount, happened_on, note.
+    """
+    payloads = _validate_items(transactions, _parse_transaction)
+    created = _call(routes_assets.create_transactions, payloads)
+    _append_audit(
+        "asset_record_transactions",
+        {"count": len(created), "ids": [row.id for row in created], "accounts": sorted({row.account for row in created})},
+    )
+    return [row.model_dump(mode="json") for row in created]
+
+
+@_tool()
+def audit_query(
+    tool: str | None = None,
+    since: str | None = None,
+    until: str | None = None,
+    event_id: str | None = None,
+    limit: int = 50,
+) -> list[dict[str, Any]]:
+    """Query MCP audit events by tool, ISO time range and/or event id, newest first."""
+    return audit_log.query(
+        tool=tool,
+        start=datetime.fromisoformat(since) if since else None,
+        end=datetime.fromisoformat(until) if until else None,
+        event_id=event_id,
+        limit=max(1, min(limit, 500)),
+        profile=current_profile(),
+    )
+
+
+@_tool(reads=(routes_settings.settings_store,))
 def settings_get() -> dict[str, Any]:
     """Get current app settings."""
-    row = _load_settings()
-    return SettingsPayload.model_validate(row).model_dump(mode="json")
+    return routes_settings.get_settings().model_dump(mode="json")
 
 
-@mcp.tool()
+@_tool(writes=(routes_settings.settings_store,))
 def settings_update(
     default_provider: str | None = None,
     model_name: str | None = None,
@@ -436,28 +600,49 @@ def settings_update(
     local_only: bool | None = None,
 ) -> dict[str, Any]:
     """Partially update app settings."""
-    row = _load_settings()
-    updated_keys: list[str] = []
-    if default_provider is not None:
-        row["default_provider"] = default_provider
-        updated_keys.append("default_provider")
-    if model_name is not None:
-        row["model_name"] = model_name
-        updated_keys.append("model_name")
-    if theme is not None:
-        row["theme"] = theme
-        updated_keys.append("theme")
-    if local_only is not None:
-        row["local_only"] = local_only
-        updated_keys.append("local_only")
-    out = SettingsPayload.model_validate(row).model_dump(mode="json")
-    write_json(SETTINGS_FILE, out)
-    _append_audit("settings_update", {"keys": updated_keys})
+    fields = {"default_provider": default_provider, "model_name": model_name, "theme": theme, "local_only": local_only}
+    updates = {name: value for name, value in fields.items() if value is not None}
+    current = routes_settings.get_settings()
+    payload = _call(routes_settings.SettingsPayload.model_validate, {**current.model_dump(), **updates})
+    out = routes_settings.update_settings(payload).model_dump(mode="json")
+    _append_audit("settings_update", {"keys": list(updates)})
     return out
 
 
+@_tool()
+def mcp_stats() -> dict[str, Any]:
+    """Per-tool call counts, errors and latency (seconds) for this server process."""
+    p95 = {row["tool"]: row["p95"] for row in metrics.summary().get("mcp_tool_duration_seconds", []) if row["outcome"] == "ok"}
+    with _stats_lock:
+        tools = {
+            name: {
+                "calls": row.calls,
+                "errors": row.errors,
+                "in_flight": row.in_flight,
+                "avg_seconds": round(row.total_seconds / row.calls, 6) if row.calls else 0.0,
+                "max_seconds": round(row.max_seconds, 6),
+                "p95_seconds": p95.get(name),
+            }
+            for name, row in sorted(_tool_stats.items())
+            if row.calls or row.in_flight
+        }
+    return {"max_concurrency": settings.mcp_max_concurrency, "tools": tools}
+
+
 def main() -> None:
-    mcp.run()
+    parser = argparse.ArgumentParser(description="life-notebook MCP server")
+    parser.add_argument("--transport", choices=["stdio", "sse", "streamable-http"], default=settings.mcp_transport)
+    parser.add_argument("--host", default=settings.mcp_host)
+    parser.add_argument("--port", type=int, default=settings.mcp_port)
+    parser.add_argument("--profile", default=settings.mcp_profile, help="profile for sessions that do not pick one")
+    args = parser.parse_args()
+    if args.profile and not valid_profile(args.profile):
+        parser.error(f"invalid profile name: {args.profile!r}")
+    settings.mcp_profile = args.profile or None
+
+    mcp.settings.host = args.host
+    mcp.settings.port = args.port
+    mcp.run(transport=args.transport)
 
 
 if __name__ == "__main__":